@@ -8,21 +8,24 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from reconciliation.artifacts import read_artifact
+from reconciliation.dates import parse_dates
+
 print("=" * 80)
 print("🔍 ANALYZING NOT FOUND TRANSACTIONS")
 print("=" * 80)
 
-# Load the NOT FOUND report
+# Load the NOT FOUND report (the .parquet sibling is used when the run wrote one)
 not_found_file = "/Users/richardmas/latcom-fix/reconciliation_reports/ENHANCED_NOT_FOUND_20251010_100900.csv"
 
 print(f"\n📂 Loading: {not_found_file}")
-df = pd.read_csv(not_found_file)
+df = read_artifact(not_found_file)
 
 print(f"   ✅ Loaded {len(df):,} NOT FOUND transactions")
 print(f"   Total USD: ${df['AMOUNT'].sum():,.2f}")
 
 # Parse dates
-df['DATE'] = pd.to_datetime(df['DATE'], errors='coerce', format='%d/%m/%Y')
+df['DATE'] = parse_dates(df['DATE'], formats=['%d/%m/%Y'], infer=False)
 
 # Extract year and month
 df['YEAR'] = df['DATE'].dt.year
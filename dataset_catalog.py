@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Dataset catalog: what every source file contains, without re-reading it
+
+    python dataset_catalog.py scan        # profile new/changed files into the manifest
+    python dataset_catalog.py coverage    # months per source and the gaps vs the TEMM claims
+    python dataset_catalog.py show [text] # per-file hash, sheets, rows, month, layout
+
+`scan` walks the TEMM CSV, the Latcom TOPUP / BUNDLES workbooks and the
+Excel Workings company files once and records, per file, its content hash,
+sheet names with row counts, header layout signature and detected month
+(RECON_CATALOG, default reconciliation_reports/dataset_catalog.json).
+Files whose size and mtime are unchanged are not opened again, so
+`coverage` and the loaders answer from the manifest.
+"""
+
+import glob
+import os
+import sys
+from collections import Counter
+
+from reconciliation.catalog import DatasetCatalog
+
+# Sources (same locations as reconciliation_analysis.py / reconcile-operator-disputes.py)
+TELEFONICA_FILE = "/Users/richardmas/Downloads/Datos de TF auditoria/Registros_TEMM_NoSoporteActual_202309_202412.csv"
+LATCOM_DIR = "/Users/richardmas/Downloads/Reconciliacion TF Latcom 2023 al presente"
+COMPANY_DIR = "/Users/richardmas/Downloads/Excel Workings"
+
+SOURCE_FILES = {
+    'TEMM': [TELEFONICA_FILE],
+    'TOPUP': glob.glob(f"{LATCOM_DIR}/TOPUP  2023/*.xlsx") + glob.glob(f"{LATCOM_DIR}/TOPUP  2024/*.xlsx"),
+    'BUNDLES': glob.glob(f"{LATCOM_DIR}/BUNDLES 2023/*.xlsx") + glob.glob(f"{LATCOM_DIR}/BUNDLES 2024/*.xlsx"),
+    'COMPANY': (glob.glob(f"{COMPANY_DIR}/2023/*.xlsx") + glob.glob(f"{COMPANY_DIR}/2024/*.xlsx")
+                + glob.glob(f"{COMPANY_DIR}/2025/*.csv")),
+}
+
+# Claim rows are counted per month from this column
+DATE_COLUMNS = {'TEMM': ('FECHA', '%d/%m/%Y')}
+
+
+def scan(catalog=None):
+    catalog = catalog or DatasetCatalog()
+    profiled = current = 0
+    print(f"📚 Scanning sources into {catalog.path}...")
+    for source, files in SOURCE_FILES.items():
+        date_column, date_format = DATE_COLUMNS.get(source, (None, None))
+        for path in sorted(files):
+            if '~$' in path:
+                continue
+            if not os.path.exists(path):
+                print(f"   ✗ Not found: {path}")
+                continue
+            if catalog.entry(path) and 'hash' in catalog.entry(path):
+                current += 1
+                continue
+            try:
+                entry = catalog.refresh(path, source, date_column, date_format)
+            except Exception as e:
+                print(f"   ✗ {os.path.basename(path)}: {e}")
+                continue
+            profiled += 1
+            sheets = ', '.join(str(sheet['name']) for sheet in entry['sheets'] if sheet['name'])
+            print(f"   ✓ {source} {os.path.basename(path)}: {entry['rows']:,} rows"
+                  f"{f' [{sheets}]' if sheets else ''} month={entry.get('month') or '-'} layout={entry['layout']}")
+    catalog.save()
+    print(f"\n✅ Catalog ready: {profiled} profiled, {current} unchanged")
+    return catalog
+
+
+def coverage(catalog=None):
+    catalog = scan(catalog)
+
+    temm_rows = Counter()
+    for path, entry in catalog.files.items():
+        if entry.get('source') == 'TEMM' and os.path.exists(path):
+            temm_rows.update(entry.get('months', {}))
+
+    print("\n📅 TELEFÓNICA TRANSACTIONS BY MONTH:")
+    for month in sorted(temm_rows):
+        print(f"   {month}: {temm_rows[month]:,}")
+
+    for source in ('TOPUP', 'BUNDLES', 'COMPANY'):
+        covered = catalog.covered_months(source)
+        missing = sorted(set(temm_rows) - set(covered))
+        print(f"\n{source}: {len(covered)} months covered")
+        print(f"   Months we have: {sorted(covered)}")
+        print(f"   MISSING vs claims: {missing if missing else 'none'}")
+        # Year-only names / folders are not counted as covering any month
+        unverified = [os.path.basename(path) for path in catalog.unverified(source)]
+        if unverified:
+            print(f"   ⚠️  Unverified (no month in the name, no dated rows scanned): {', '.join(unverified)}")
+
+        # A file whose header differs from the rest of its source needs a look before loading
+        layouts = Counter(entry['layout'] for path, entry in catalog.files.items()
+                          if entry.get('source') == source and entry.get('layout') and os.path.exists(path))
+        if len(layouts) > 1:
+            usual = layouts.most_common(1)[0][0]
+            for path, entry in sorted(catalog.files.items()):
+                if entry.get('source') == source and entry.get('layout') not in (None, usual) and os.path.exists(path):
+                    print(f"   ⚠️  Different layout ({entry['layout']}): {os.path.basename(path)}")
+
+
+def show(text=None):
+    catalog = DatasetCatalog()
+    for path, entry in sorted(catalog.files.items()):
+        if text and text.lower() not in path.lower():
+            continue
+        state = '' if catalog.entry(path) else ' (changed since scan)'
+        print(f"\n{path}{state}")
+        print(f"   source={entry.get('source')} kind={entry.get('kind')} rows={entry.get('rows', 0):,} "
+              f"month={entry.get('month') or '-'} span={entry.get('min_date', '-')}..{entry.get('max_date', '-')}")
+        print(f"   sha256={entry.get('hash')} layout={entry.get('layout')}")
+        for sheet in entry.get('sheets', []):
+            rows = f"{sheet['rows']:,}" if sheet['rows'] is not None else '?'
+            print(f"   - {sheet['name'] or '(csv)'}: {rows} rows, {len(sheet['columns'])} columns ({sheet['layout']})")
+
+
+if __name__ == '__main__':
+    commands = {'scan': scan, 'coverage': coverage, 'show': show}
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("Usage:")
+        print("  python dataset_catalog.py scan")
+        print("  python dataset_catalog.py coverage")
+        print("  python dataset_catalog.py show [path text]")
+        sys.exit(1)
+
+    if sys.argv[1] == 'show':
+        show(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        commands[sys.argv[1]]()
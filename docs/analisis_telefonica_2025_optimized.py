@@ -8,6 +8,11 @@ import pandas as pd
 import os
 from datetime import datetime
 import glob
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reconciliation.artifacts import output_format, write_artifact
+from reconciliation.rules import RuleTable
 
 print("=" * 80)
 print("🔍 ANÁLISIS TELEFÓNICA vs LATCOM - 2025 (OPTIMIZADO)")
@@ -18,6 +23,9 @@ TELEFONICA_DIR = "/Users/richardmas/Downloads/Ficheros 2025 gustavo"
 LATCOM_DIR = "/Users/richardmas/Downloads/Excel Workings/2025"
 OUTPUT_DIR = "/Users/richardmas/latcom-fix/analisis_2025"
 
+# Formato de salida: csv | parquet | both (variable de entorno RECON_OUTPUT_FORMAT)
+OUTPUT_FORMAT = output_format()
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # ============================================
@@ -76,6 +84,37 @@ latcom['KEY_NO_STATUS'] = latcom['MSISDN_CLEAN'] + '_' + latcom['TX_ID']
 
 print(f"   ✅ Datos preparados")
 
+# ============================================
+# Clasificación: una pasada vectorizada sobre Telefónica
+# ============================================
+# Banderas por fila (una búsqueda por clave), luego la tabla de reglas
+# asigna la categoría de cada fila en un solo np.select (la primera regla
+# que cumple gana)
+latcom_success_keys = latcom.loc[latcom['STATUS_CLEAN'] == 'SUCCESS', 'KEY_NO_STATUS']
+latcom_fail_keys = latcom.loc[latcom['STATUS_CLEAN'] == 'FAIL', 'KEY_NO_STATUS']
+telefonica['EXACT_MATCH'] = telefonica['KEY_WITH_STATUS'].isin(latcom['KEY_WITH_STATUS'])
+telefonica['LATCOM_FAIL'] = telefonica['KEY_NO_STATUS'].isin(latcom_fail_keys)
+telefonica['LATCOM_SUCCESS'] = telefonica['KEY_NO_STATUS'].isin(latcom_success_keys)
+
+# Claves con status cruzado: PASO 6 las excluía de Telefónica3 aunque la fila tuviera otro status
+cross_status = ((telefonica['STATUS_CLEAN'] == 'SUCCESS') & telefonica['LATCOM_FAIL'] & ~telefonica['EXACT_MATCH']) | \
+               ((telefonica['STATUS_CLEAN'] == 'FAIL') & telefonica['LATCOM_SUCCESS'] & ~telefonica['EXACT_MATCH'])
+telefonica['CROSS_KEY'] = telefonica['KEY_NO_STATUS'].isin(telefonica.loc[cross_status, 'KEY_NO_STATUS'])
+
+CATEGORY_RULES = (
+    ('SUCCESS_SUCCESS', {'STATUS_CLEAN': 'SUCCESS', 'EXACT_MATCH': True}),
+    ('FAIL_FAIL', {'STATUS_CLEAN': 'FAIL', 'EXACT_MATCH': True}),
+    ('SUCCESS_TO_FAIL', {'STATUS_CLEAN': 'SUCCESS', 'LATCOM_FAIL': True}),
+    ('FAIL_TO_SUCCESS', {'STATUS_CLEAN': 'FAIL', 'LATCOM_SUCCESS': True}),
+    ('CROSS_KEY_OTHER', {'CROSS_KEY': True}),
+    ('SUCCESS_SIN_COINCIDENCIA', {'STATUS_CLEAN': 'SUCCESS'}),
+)
+category_rules = RuleTable(CATEGORY_RULES, default='SIN_COINCIDENCIA')
+telefonica['CATEGORY'] = category_rules.assign(telefonica)
+flag_columns = ['EXACT_MATCH', 'LATCOM_FAIL', 'LATCOM_SUCCESS', 'CROSS_KEY', 'CATEGORY']
+report_columns = [col for col in telefonica.columns if col not in flag_columns]
+categories = category_rules.split(telefonica, telefonica['CATEGORY'], report_columns)
+
 # ============================================
 # PASO 1: SUCCESS en Telefónica = SUCCESS en Latcom
 # ============================================
@@ -83,23 +122,21 @@ print("\n" + "=" * 80)
 print("📊 PASO 1: Transacciones SUCCESS coincidentes")
 print("=" * 80)
 
-telefonica_success = telefonica[telefonica['STATUS_CLEAN'] == 'SUCCESS'].copy()
-latcom_success = latcom[latcom['STATUS_CLEAN'] == 'SUCCESS'].copy()
+telefonica_success_count = int((telefonica['STATUS_CLEAN'] == 'SUCCESS').sum())
+latcom_success_count = len(latcom_success_keys)
 
 # Match por MSISDN + TRANSACTION_ID + SUCCESS
-success_match = telefonica_success[
-    telefonica_success['KEY_WITH_STATUS'].isin(latcom_success['KEY_WITH_STATUS'])
-].copy()
+success_match = categories['SUCCESS_SUCCESS']
 
 print(f"\n✅ Encontradas {len(success_match):,} transacciones SUCCESS coincidentes")
-print(f"   Total en Telefónica SUCCESS: {len(telefonica_success):,}")
-print(f"   Total en Latcom SUCCESS: {len(latcom_success):,}")
-print(f"   Coincidencias: {len(success_match):,} ({len(success_match)/len(telefonica_success)*100:.1f}%)")
+print(f"   Total en Telefónica SUCCESS: {telefonica_success_count:,}")
+print(f"   Total en Latcom SUCCESS: {latcom_success_count:,}")
+print(f"   Coincidencias: {len(success_match):,} ({len(success_match)/telefonica_success_count*100:.1f}%)")
 
 # Guardar coincidencias SUCCESS
 success_file = f"{OUTPUT_DIR}/01_COINCIDENCIAS_SUCCESS.csv"
-success_match.to_csv(success_file, index=False)
-print(f"\n💾 Guardado: {success_file}")
+saved = write_artifact(success_match, success_file, OUTPUT_FORMAT)
+print(f"\n💾 Guardado: {', '.join(saved)}")
 
 # ============================================
 # PASO 2: FAIL en Telefónica = FAIL en Latcom
@@ -108,23 +145,21 @@ print("\n" + "=" * 80)
 print("📊 PASO 2: Transacciones FAIL coincidentes")
 print("=" * 80)
 
-telefonica_fail = telefonica[telefonica['STATUS_CLEAN'] == 'FAIL'].copy()
-latcom_fail = latcom[latcom['STATUS_CLEAN'] == 'FAIL'].copy()
+telefonica_fail_count = int((telefonica['STATUS_CLEAN'] == 'FAIL').sum())
+latcom_fail_count = len(latcom_fail_keys)
 
 # Match por MSISDN + TRANSACTION_ID + FAIL
-fail_match = telefonica_fail[
-    telefonica_fail['KEY_WITH_STATUS'].isin(latcom_fail['KEY_WITH_STATUS'])
-].copy()
+fail_match = categories['FAIL_FAIL']
 
 print(f"\n✅ Encontradas {len(fail_match):,} transacciones FAIL coincidentes")
-print(f"   Total en Telefónica FAIL: {len(telefonica_fail):,}")
-print(f"   Total en Latcom FAIL: {len(latcom_fail):,}")
-print(f"   Coincidencias: {len(fail_match):,} ({len(fail_match)/len(telefonica_fail)*100:.1f}%)")
+print(f"   Total en Telefónica FAIL: {telefonica_fail_count:,}")
+print(f"   Total en Latcom FAIL: {latcom_fail_count:,}")
+print(f"   Coincidencias: {len(fail_match):,} ({len(fail_match)/telefonica_fail_count*100:.1f}%)")
 
 # Guardar coincidencias FAIL
 fail_file = f"{OUTPUT_DIR}/02_COINCIDENCIAS_FAIL.csv"
-fail_match.to_csv(fail_file, index=False)
-print(f"\n💾 Guardado: {fail_file}")
+saved = write_artifact(fail_match, fail_file, OUTPUT_FORMAT)
+print(f"\n💾 Guardado: {', '.join(saved)}")
 
 # ============================================
 # PASO 3: Telefónica2 (sin coincidencias exactas)
@@ -133,17 +168,18 @@ print("\n" + "=" * 80)
 print("📊 PASO 3: Generando Telefónica2 (Disparidades)")
 print("=" * 80)
 
-# Eliminar todas las coincidencias exactas (SUCCESS-SUCCESS y FAIL-FAIL)
-matched_keys = set(success_match['KEY_WITH_STATUS']).union(set(fail_match['KEY_WITH_STATUS']))
-telefonica2 = telefonica[~telefonica['KEY_WITH_STATUS'].isin(matched_keys)].copy()
+# Todas las categorías salvo las coincidencias exactas (SUCCESS-SUCCESS y FAIL-FAIL)
+exact_match = telefonica['CATEGORY'].isin(['SUCCESS_SUCCESS', 'FAIL_FAIL'])
+matched_key_count = telefonica.loc[exact_match, 'KEY_WITH_STATUS'].nunique()
+telefonica2 = telefonica.loc[~exact_match, report_columns]
 
 print(f"\n📋 Telefónica Original: {len(telefonica):,} transacciones")
-print(f"   Coincidencias eliminadas: {len(matched_keys):,}")
+print(f"   Coincidencias eliminadas: {matched_key_count:,}")
 print(f"   Telefónica2 (Disparidades): {len(telefonica2):,} transacciones")
 
 telefonica2_file = f"{OUTPUT_DIR}/03_TELEFONICA2_DISPARIDADES.csv"
-telefonica2.to_csv(telefonica2_file, index=False)
-print(f"\n💾 Guardado: {telefonica2_file}")
+saved = write_artifact(telefonica2, telefonica2_file, OUTPUT_FORMAT)
+print(f"\n💾 Guardado: {', '.join(saved)}")
 
 # ============================================
 # PASO 4: SUCCESS en Telefónica2 = FAIL en Latcom (OPTIMIZADO)
@@ -152,15 +188,12 @@ print("\n" + "=" * 80)
 print("📊 PASO 4: SUCCESS en Telefónica → FAIL en Latcom (OPTIMIZADO)")
 print("=" * 80)
 
-telefonica2_success = telefonica2[telefonica2['STATUS_CLEAN'] == 'SUCCESS'].copy()
-
-# OPTIMIZACIÓN: Usar merge en lugar de iteración
-# Preparar latcom_fail con sufijos para el merge
-latcom_fail_subset = latcom_fail[['KEY_NO_STATUS', 'DATETIME', 'VENDOR_RESPONSE_MESSAGE']].copy()
+# Las filas ya están clasificadas; el merge sólo trae las columnas de Latcom
+latcom_fail_subset = latcom.loc[latcom['STATUS_CLEAN'] == 'FAIL', ['KEY_NO_STATUS', 'DATETIME', 'VENDOR_RESPONSE_MESSAGE']]
 latcom_fail_subset.columns = ['KEY_NO_STATUS', 'DATE_LATCOM', 'VENDOR_RESPONSE_MESSAGE']
 
 # Merge telefónica SUCCESS con latcom FAIL por KEY_NO_STATUS
-success_to_fail_df = telefonica2_success.merge(
+success_to_fail_df = categories['SUCCESS_TO_FAIL'].merge(
     latcom_fail_subset,
     on='KEY_NO_STATUS',
     how='inner'
@@ -177,8 +210,8 @@ print(f"   Telefónica dice SUCCESS, Latcom dice FAIL")
 
 if len(success_to_fail_df) > 0:
     success_to_fail_file = f"{OUTPUT_DIR}/04_SUCCESS_TELEFONICA_FAIL_LATCOM.csv"
-    success_to_fail_df.to_csv(success_to_fail_file, index=False)
-    print(f"\n💾 Guardado: {success_to_fail_file}")
+    saved = write_artifact(success_to_fail_df, success_to_fail_file, OUTPUT_FORMAT)
+    print(f"\n💾 Guardado: {', '.join(saved)}")
 
 # ============================================
 # PASO 5: FAIL en Telefónica2 = SUCCESS en Latcom (OPTIMIZADO)
@@ -187,14 +220,11 @@ print("\n" + "=" * 80)
 print("📊 PASO 5: FAIL en Telefónica → SUCCESS en Latcom (OPTIMIZADO)")
 print("=" * 80)
 
-telefonica2_fail = telefonica2[telefonica2['STATUS_CLEAN'] == 'FAIL'].copy()
-
-# OPTIMIZACIÓN: Usar merge en lugar de iteración
-latcom_success_subset = latcom_success[['KEY_NO_STATUS', 'DATETIME', 'VENDOR_RESPONSE_MESSAGE']].copy()
+latcom_success_subset = latcom.loc[latcom['STATUS_CLEAN'] == 'SUCCESS', ['KEY_NO_STATUS', 'DATETIME', 'VENDOR_RESPONSE_MESSAGE']]
 latcom_success_subset.columns = ['KEY_NO_STATUS', 'DATE_LATCOM', 'VENDOR_RESPONSE_MESSAGE_LATCOM']
 
 # Merge telefónica FAIL con latcom SUCCESS por KEY_NO_STATUS
-fail_to_success_df = telefonica2_fail.merge(
+fail_to_success_df = categories['FAIL_TO_SUCCESS'].merge(
     latcom_success_subset,
     on='KEY_NO_STATUS',
     how='inner'
@@ -214,8 +244,8 @@ print(f"   Telefónica dice FAIL, Latcom dice SUCCESS")
 
 if len(fail_to_success_df) > 0:
     fail_to_success_file = f"{OUTPUT_DIR}/05_FAIL_TELEFONICA_SUCCESS_LATCOM.csv"
-    fail_to_success_df.to_csv(fail_to_success_file, index=False)
-    print(f"\n💾 Guardado: {fail_to_success_file}")
+    saved = write_artifact(fail_to_success_df, fail_to_success_file, OUTPUT_FORMAT)
+    print(f"\n💾 Guardado: {', '.join(saved)}")
 
 # ============================================
 # PASO 6: Telefónica3 (sin coincidencias de status cruzado)
@@ -224,22 +254,19 @@ print("\n" + "=" * 80)
 print("📊 PASO 6: Generando Telefónica3 (Sin Coincidencia)")
 print("=" * 80)
 
-# Eliminar las transacciones con status cruzado
-cross_matched_keys = set()
-if len(success_to_fail_df) > 0:
-    cross_matched_keys.update(success_to_fail_df['KEY_NO_STATUS'].values)
-if len(fail_to_success_df) > 0:
-    cross_matched_keys.update(fail_to_success_df['KEY_NO_STATUS'].values)
-
-telefonica3 = telefonica2[~telefonica2['KEY_NO_STATUS'].isin(cross_matched_keys)].copy()
+# Telefónica3 = las dos categorías sin coincidencia (SUCCESS y el resto)
+cross_matched_key_count = telefonica.loc[telefonica['CROSS_KEY'], 'KEY_NO_STATUS'].nunique()
+telefonica3 = telefonica.loc[
+    telefonica['CATEGORY'].isin(['SUCCESS_SIN_COINCIDENCIA', 'SIN_COINCIDENCIA']), report_columns
+]
 
 print(f"\n📋 Telefónica2: {len(telefonica2):,} transacciones")
-print(f"   Coincidencias cruzadas eliminadas: {len(cross_matched_keys):,}")
+print(f"   Coincidencias cruzadas eliminadas: {cross_matched_key_count:,}")
 print(f"   Telefónica3 (Sin Coincidencia): {len(telefonica3):,} transacciones")
 
 telefonica3_file = f"{OUTPUT_DIR}/06_TELEFONICA3_SIN_COINCIDENCIA.csv"
-telefonica3.to_csv(telefonica3_file, index=False)
-print(f"\n💾 Guardado: {telefonica3_file}")
+saved = write_artifact(telefonica3, telefonica3_file, OUTPUT_FORMAT)
+print(f"\n💾 Guardado: {', '.join(saved)}")
 
 # ============================================
 # PASO 7: SUCCESS sin coincidencia (Impacto Económico)
@@ -248,7 +275,7 @@ print("\n" + "=" * 80)
 print("📊 PASO 7: SUCCESS sin Coincidencia - Impacto Económico")
 print("=" * 80)
 
-telefonica3_success_only = telefonica3[telefonica3['STATUS_CLEAN'] == 'SUCCESS'].copy()
+telefonica3_success_only = categories['SUCCESS_SIN_COINCIDENCIA']
 
 print(f"\n💰 TRANSACCIONES SUCCESS SIN COINCIDENCIA:")
 print(f"   Cantidad: {len(telefonica3_success_only):,} transacciones")
@@ -259,8 +286,8 @@ if len(telefonica3_success_only) > 0:
     print(f"   Monto promedio: ${telefonica3_success_only['AMOUNT'].mean():.2f} USD")
 
     success_only_file = f"{OUTPUT_DIR}/07_SUCCESS_SIN_COINCIDENCIA_IMPACTO.csv"
-    telefonica3_success_only.to_csv(success_only_file, index=False)
-    print(f"\n💾 Guardado: {success_only_file}")
+    saved = write_artifact(telefonica3_success_only, success_only_file, OUTPUT_FORMAT)
+    print(f"\n💾 Guardado: {', '.join(saved)}")
 
 # ============================================
 # RESUMEN FINAL
@@ -288,7 +315,7 @@ COINCIDENCIAS CON STATUS DIFERENTE:
 
 SIN COINCIDENCIA (Telefónica3):    {len(telefonica3):,} ({len(telefonica3)/len(telefonica)*100:.1f}%)
   - SUCCESS sin match:             {len(telefonica3_success_only):,}
-  - FAIL sin match:                {len(telefonica3[telefonica3['STATUS_CLEAN'] == 'FAIL']):,}
+  - FAIL sin match:                {(telefonica3['STATUS_CLEAN'] == 'FAIL').sum():,}
 """)
 
 if len(telefonica3_success_only) > 0:
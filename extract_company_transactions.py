@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Company records straight from Postgres instead of the Excel Workings export
+
+    python extract_company_transactions.py [start] [end]   # default 2023-09-01 .. 2025-01-01 (end exclusive)
+
+Streams the `transactions` table by date slice (RECON_EXTRACT_SLICE_DAYS,
+default 7) on RECON_EXTRACT_WORKERS parallel connections (default 4) into
+RECON_COMPANY_DB_DIR (default reconciliation_reports/company_db), one
+Parquet file per slice. Slices already on disk are kept, so re-running
+only fetches what is missing; set RECON_EXTRACT_OVERWRITE=1 to refetch.
+reconcile-enhanced.py reads these files instead of the workbooks when
+RECON_COMPANY_DB_DIR is set.
+
+The database is DATABASE_PUBLIC_URL / DATABASE_URL, e.g. a local copy:
+    DATABASE_URL=postgresql://localhost/latcom python extract_company_transactions.py
+"""
+
+import os
+import sys
+
+from reconciliation.pgextract import database_url, date_slices, extract_transactions, read_extracted
+from reconciliation.progress import Progress
+
+OUTPUT_DIR = os.environ.get('RECON_COMPANY_DB_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'reconciliation_reports', 'company_db')
+SLICE_DAYS = int(os.environ.get('RECON_EXTRACT_SLICE_DAYS') or 7)
+WORKERS = int(os.environ.get('RECON_EXTRACT_WORKERS') or 4)
+OVERWRITE = os.environ.get('RECON_EXTRACT_OVERWRITE', '0') == '1'
+
+
+if __name__ == '__main__':
+    start = sys.argv[1] if len(sys.argv) > 1 else '2023-09-01'
+    end = sys.argv[2] if len(sys.argv) > 2 else '2025-01-01'
+
+    print("=" * 80)
+    print("🗄️  COMPANY TRANSACTIONS FROM POSTGRES")
+    print("=" * 80)
+    print(f"   Range: {start} .. {end} (end exclusive), {SLICE_DAYS}-day slices, {WORKERS} connections")
+    print(f"   Output: {OUTPUT_DIR}")
+
+    try:
+        dsn = database_url()
+    except ValueError as e:
+        print(f"   ✗ {e}")
+        sys.exit(1)
+
+    progress = Progress('Extracting transactions', total=len(date_slices(start, end, SLICE_DAYS)), unit='slices')
+    paths = extract_transactions(dsn, start, end, OUTPUT_DIR, slice_days=SLICE_DAYS, workers=WORKERS,
+                                 overwrite=OVERWRITE, progress=progress)
+    progress.finish()
+
+    company = read_extracted(OUTPUT_DIR, columns=['DATETIME', 'STATUS'])
+    print(f"\n✅ {len(paths)} slices, {len(company):,} transactions on disk")
+    if not company.empty:
+        print(f"   Span: {company['DATETIME'].min()} .. {company['DATETIME'].max()}")
+        print(f"   Status: {company['STATUS'].value_counts().to_dict()}")
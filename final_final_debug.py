@@ -3,19 +3,7 @@ import pandas as pd
 import glob
 from datetime import timedelta
 
-# Product mapping
-PRODUCT_MAPPING = {
-    'BFRECINT': 'TEMXN_BFRECINT_30_DAYS',
-    'BFSPRINT': 'TEMXN_BFSPRINT_UNLIMITED_30_DAYS',
-    'BFRIQUIN': 'TEMXN_BFRIQUIN_28_DAYS',
-    'BFRISEM': 'TEMXN_BFRISEM_7_DAYS',
-    'BFRIMEN': 'TEMXN_BFRIMEN_15_DAYS',
-    'PQRI412D': 'TEM_4GB_12_DAYS',
-    'PQRI3G9D': 'TEM_3GB_9_DAYS',
-    'PQRI2G7D': 'TEM_2GB_7_DAYS',
-    'PQRI1G4D': 'TEM_1GB_3_DAYS',
-    'PQRI6M2D': 'TEM_600MB_2_DAYS',
-}
+from reconciliation.products import PRODUCT_MAPPING, normalize_products, phone_product_keys
 
 # Load Telefónica
 tf = pd.read_csv("/Users/richardmas/Downloads/Datos de TF auditoria/Registros_TEMM_NoSoporteActual_202309_202412.csv", encoding='utf-8-sig')
@@ -35,16 +23,7 @@ for f in bundles_files:
 bundles = pd.concat(all_bundles, ignore_index=True)
 
 # Merge product columns properly
-product_columns = [col for col in bundles.columns if col in ['Product', 'Product MobiFin', 'Product MoviStar', 'Product Sagar', 'Product ']]
-
-bundles['PRODUCT_NORMALIZED'] = ''
-for col in product_columns:
-    mask = (bundles['PRODUCT_NORMALIZED'] == '') & (bundles[col].notna())
-    bundles.loc[mask, 'PRODUCT_NORMALIZED'] = bundles.loc[mask, col].astype(str)
-
-bundles['PRODUCT_NORMALIZED'] = bundles['PRODUCT_NORMALIZED'].str.strip()
-bundles['PRODUCT_NORMALIZED'] = bundles['PRODUCT_NORMALIZED'].replace('nan', '')
-bundles['PRODUCT_NORMALIZED'] = bundles['PRODUCT_NORMALIZED'].replace('None', '')
+bundles['PRODUCT_NORMALIZED'] = normalize_products(bundles)
 
 bundles['DATE_PARSED'] = pd.to_datetime(bundles['TransactionDate'], errors='coerce')
 bundles['PHONE'] = bundles['TargetMSISDN'].astype(str).str.strip()
@@ -63,9 +42,16 @@ bundles_clean = bundles[bundles['DATE_PARSED'].notna()].copy()
 print(f"\nTF clean: {len(tf_clean):,}")
 print(f"Bundles clean: {len(bundles_clean):,}")
 
-# Create phone+product keys
-tf_clean['PHONE_PRODUCT'] = tf_clean['PHONE'] + '|' + tf_clean['PRODUCT_LATCOM']
-bundles_clean['PHONE_PRODUCT'] = bundles_clean['PHONE'] + '|' + bundles_clean['PRODUCT_NORMALIZED']
+# Create phone+product keys (integer pairs over shared phone/product categories)
+tf_clean['PHONE_PRODUCT'], bundles_clean['PHONE_PRODUCT'] = phone_product_keys(
+    tf_clean['PHONE'], tf_clean['PRODUCT_LATCOM'],
+    bundles_clean['PHONE'], bundles_clean['PRODUCT_NORMALIZED']
+)
+
+def describe_key(df, product_col, key):
+    """Readable 'phone|product' for an integer PHONE_PRODUCT key"""
+    row = df[df['PHONE_PRODUCT'] == key].iloc[0]
+    return f"{row['PHONE']}|{row[product_col]}"
 
 # Check overlap
 tf_pp = set(tf_clean['PHONE_PRODUCT'])
@@ -82,11 +68,11 @@ if overlap:
     # Show some examples
     print(f"\nSample overlapping phone+product combinations:")
     for pp in list(overlap)[:5]:
-        print(f"  {pp}")
+        print(f"  {describe_key(tf_clean, 'PRODUCT_LATCOM', pp)}")
 
     # Test first one
     test_pp = list(overlap)[0]
-    print(f"\n\nTesting: {test_pp}")
+    print(f"\n\nTesting: {describe_key(tf_clean, 'PRODUCT_LATCOM', test_pp)}")
 
     tf_test = tf_clean[tf_clean['PHONE_PRODUCT'] == test_pp]
     bundles_test = bundles_clean[bundles_clean['PHONE_PRODUCT'] == test_pp]
@@ -121,10 +107,10 @@ else:
     sample_tf_pp = list(tf_pp)[:10]
     print(f"\nSample TF phone+product:")
     for pp in sample_tf_pp:
-        print(f"  {pp}")
+        print(f"  {describe_key(tf_clean, 'PRODUCT_LATCOM', pp)}")
 
     # Sample bundles phone+product
     sample_bundles_pp = list(bundles_pp)[:10]
     print(f"\nSample Bundles phone+product:")
     for pp in sample_bundles_pp:
-        print(f"  {pp}")
+        print(f"  {describe_key(bundles_clean, 'PRODUCT_NORMALIZED', pp)}")
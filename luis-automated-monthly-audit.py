@@ -13,9 +13,16 @@ import pandas as pd
 import sys
 from datetime import datetime
 
+from reconciliation.ids import ID_DTYPES, align_ids, id_set, transaction_ids
+from reconciliation.money import to_cents, total_cents, cents_to_usd, format_usd
+from reconciliation.readers import read_table
+
 def clean_transaction_id(df, column_name):
-    """Clean transaction IDs by removing decimals and whitespace"""
-    df[f'{column_name}_CLEAN'] = df[column_name].astype(str).str.split('.').str[0].str.strip()
+    """Add {column_name}_CLEAN as a native int64 ID (text if the file has non-numeric IDs)"""
+    df[f'{column_name}_CLEAN'], invalid = transaction_ids(df[column_name])
+    if invalid.any():
+        examples = ', '.join(df.loc[invalid, column_name].astype(str).head(3))
+        print(f'   ⚠️  {invalid.sum():,} rows with a malformed {column_name} (e.g. {examples})')
     return df
 
 def luis_three_way_analysis(temm_file, adjusted_file, total_file, month_name):
@@ -34,53 +41,43 @@ def luis_three_way_analysis(temm_file, adjusted_file, total_file, month_name):
 
     # 1. Load TEMM file (Telefónica)
     print('\n📦 Loading Telefónica TEMM file...')
-    try:
-        df_temm = pd.read_csv(temm_file, encoding='utf-8-sig')
-    except:
-        df_temm = pd.read_csv(temm_file, encoding='latin1')
+    df_temm = read_table(temm_file, dtype=ID_DTYPES)
 
     df_temm = clean_transaction_id(df_temm, 'SEC_ACTUACION')
     temm_count = len(df_temm)
-    temm_usd = df_temm['ImpUSD'].sum()
+    df_temm['ImpUSD_CENTS'] = to_cents(df_temm['ImpUSD'])
+    temm_cents = total_cents(df_temm['ImpUSD_CENTS'])
 
-    print(f'   Telefónica: {temm_count:,} transactions, ${temm_usd:,.0f}')
+    print(f'   Telefónica: {temm_count:,} transactions, ${format_usd(temm_cents)}')
 
     # 2. Load Latcom Total (all real data)
     print('\n📦 Loading Latcom Total (real data)...')
-    try:
-        df_total = pd.read_csv(total_file, encoding='utf-8-sig')
-    except:
-        try:
-            df_total = pd.read_excel(total_file)
-        except:
-            df_total = pd.read_csv(total_file, encoding='latin1')
+    df_total = read_table(total_file, dtype=ID_DTYPES)
 
     df_total = clean_transaction_id(df_total, 'VENDOR_TRANSACTION_ID')
     total_count = len(df_total)
-    total_usd = df_total['TransactionAmountUSD'].sum()
+    df_total['AMOUNT_CENTS'] = to_cents(df_total['TransactionAmountUSD'])
+    total_usd_cents = total_cents(df_total['AMOUNT_CENTS'])
 
-    print(f'   Latcom Total: {total_count:,} transactions, ${total_usd:,.0f}')
+    print(f'   Latcom Total: {total_count:,} transactions, ${format_usd(total_usd_cents)}')
 
     # 3. Load Latcom Adjusted (filtered successful transactions)
     print('\n📦 Loading Latcom Adjusted (reported data)...')
-    try:
-        df_adjusted = pd.read_csv(adjusted_file, encoding='utf-8-sig')
-    except:
-        try:
-            df_adjusted = pd.read_excel(adjusted_file)
-        except:
-            df_adjusted = pd.read_csv(adjusted_file, encoding='latin1')
+    df_adjusted = read_table(adjusted_file, dtype=ID_DTYPES)
 
     df_adjusted = clean_transaction_id(df_adjusted, 'VENDOR_TRANSACTION_ID')
     adjusted_count = len(df_adjusted)
-    adjusted_usd = df_adjusted['TransactionAmountUSD'].sum()
+    df_adjusted['AMOUNT_CENTS'] = to_cents(df_adjusted['TransactionAmountUSD'])
+    adjusted_cents = total_cents(df_adjusted['AMOUNT_CENTS'])
 
-    print(f'   Latcom Adjusted: {adjusted_count:,} transactions, ${adjusted_usd:,.0f}')
+    print(f'   Latcom Adjusted: {adjusted_count:,} transactions, ${format_usd(adjusted_cents)}')
 
-    # Create ID sets for comparison
-    temm_ids = set(df_temm['SEC_ACTUACION_CLEAN'])
-    total_ids = set(df_total['VENDOR_TRANSACTION_ID_CLEAN'])
-    adjusted_ids = set(df_adjusted['VENDOR_TRANSACTION_ID_CLEAN'])
+    # Create ID sets for comparison (one ID type across the three files)
+    df_temm['SEC_ACTUACION_CLEAN'], df_total['VENDOR_TRANSACTION_ID_CLEAN'], df_adjusted['VENDOR_TRANSACTION_ID_CLEAN'] = align_ids(
+        df_temm['SEC_ACTUACION_CLEAN'], df_total['VENDOR_TRANSACTION_ID_CLEAN'], df_adjusted['VENDOR_TRANSACTION_ID_CLEAN'])
+    temm_ids = id_set(df_temm['SEC_ACTUACION_CLEAN'])
+    total_ids = id_set(df_total['VENDOR_TRANSACTION_ID_CLEAN'])
+    adjusted_ids = id_set(df_adjusted['VENDOR_TRANSACTION_ID_CLEAN'])
 
     print('\n' + '=' * 100)
     print('LUIS METHODOLOGY: THREE-WAY CROSS-REFERENCE')
@@ -100,9 +97,9 @@ def luis_three_way_analysis(temm_file, adjusted_file, total_file, month_name):
 
     # Calculate amount missing
     df_temm_missing = df_temm[df_temm['SEC_ACTUACION_CLEAN'].isin(temm_not_in_total)]
-    missing_usd = df_temm_missing['ImpUSD'].sum()
+    missing_cents = total_cents(df_temm_missing['ImpUSD_CENTS'])
 
-    print(f'      💰 Missing amount: ${missing_usd:,.2f}')
+    print(f'      💰 Missing amount: ${format_usd(missing_cents)}')
 
     # ANALYSIS 2: Adjusted vs Total (Internal consistency check)
     print('\n🔍 2️⃣  LATCOM ADJUSTED vs LATCOM TOTAL:')
@@ -133,11 +130,11 @@ def luis_three_way_analysis(temm_file, adjusted_file, total_file, month_name):
     df_adjusted_in_temm = df_adjusted[df_adjusted['VENDOR_TRANSACTION_ID_CLEAN'].isin(adjusted_in_temm)]
     df_adjusted_not_in_temm = df_adjusted[df_adjusted['VENDOR_TRANSACTION_ID_CLEAN'].isin(adjusted_not_in_temm)]
 
-    adjusted_in_temm_usd = df_adjusted_in_temm['TransactionAmountUSD'].sum()
-    adjusted_not_in_temm_usd = df_adjusted_not_in_temm['TransactionAmountUSD'].sum()
+    adjusted_in_temm_cents = total_cents(df_adjusted_in_temm['AMOUNT_CENTS'])
+    adjusted_not_in_temm_cents = total_cents(df_adjusted_not_in_temm['AMOUNT_CENTS'])
 
-    print(f'      💰 Amount in TEMM: ${adjusted_in_temm_usd:,.2f}')
-    print(f'      💰 Amount NOT in TEMM: ${adjusted_not_in_temm_usd:,.2f}')
+    print(f'      💰 Amount in TEMM: ${format_usd(adjusted_in_temm_cents)}')
+    print(f'      💰 Amount NOT in TEMM: ${format_usd(adjusted_not_in_temm_cents)}')
 
     # ANALYSIS 4: Empirical observation (Latcom Total ≈ TEMM + Adjusted?)
     print('\n🔍 4️⃣  EMPIRICAL OBSERVATION (Luis\'s Note):')
@@ -164,7 +161,7 @@ def luis_three_way_analysis(temm_file, adjusted_file, total_file, month_name):
     if adjusted_not_in_temm_pct > 95:
         print('\n⚠️  🚨 LUIS PATTERN DETECTED! 🚨')
         print(f'\n   {len(adjusted_not_in_temm):,} adjusted transactions ({adjusted_not_in_temm_pct:.1f}%) NOT in Telefónica TEMM')
-        print(f'   Amount excluded: ${adjusted_not_in_temm_usd:,.2f}')
+        print(f'   Amount excluded: ${format_usd(adjusted_not_in_temm_cents)}')
         print('\n   This indicates TEMM file is PRE-FILTERED by Telefónica!')
         print('   They have already removed our successful/adjusted transactions.')
     else:
@@ -190,42 +187,48 @@ def luis_three_way_analysis(temm_file, adjusted_file, total_file, month_name):
     print('=' * 100)
 
     print(f'\n📊 Dataset Sizes:')
-    print(f'   Telefónica TEMM:    {temm_count:,} trx, ${temm_usd:,.0f}')
-    print(f'   Latcom Total:       {total_count:,} trx, ${total_usd:,.0f}')
-    print(f'   Latcom Adjusted:    {adjusted_count:,} trx, ${adjusted_usd:,.0f}')
+    print(f'   Telefónica TEMM:    {temm_count:,} trx, ${format_usd(temm_cents)}')
+    print(f'   Latcom Total:       {total_count:,} trx, ${format_usd(total_usd_cents)}')
+    print(f'   Latcom Adjusted:    {adjusted_count:,} trx, ${format_usd(adjusted_cents)}')
 
     print(f'\n🎯 Key Findings (Luis Methodology):')
-    print(f'   1. Missing from our system:     {len(temm_not_in_total):,} trx → ${missing_usd:,.2f}')
+    print(f'   1. Missing from our system:     {len(temm_not_in_total):,} trx → ${format_usd(missing_cents)}')
     print(f'   2. Adjusted in TEMM:            {len(adjusted_in_temm):,} trx ({adjusted_in_temm_pct:.2f}%)')
     print(f'   3. Adjusted NOT in TEMM:        {len(adjusted_not_in_temm):,} trx ({adjusted_not_in_temm_pct:.2f}%)')
-    print(f'   4. Amount excluded from TEMM:   ${adjusted_not_in_temm_usd:,.2f}')
+    print(f'   4. Amount excluded from TEMM:   ${format_usd(adjusted_not_in_temm_cents)}')
 
     print(f'\n💡 Conclusion:')
     if adjusted_not_in_temm_pct > 95:
         print(f'   ⚠️  LUIS PATTERN CONFIRMED!')
-        print(f'   Real discrepancy: ${missing_usd:,.2f} (transactions missing from our system)')
-        print(f'   Artificial discrepancy: ${adjusted_not_in_temm_usd:,.2f} (excluded by Telefónica)')
+        print(f'   Real discrepancy: ${format_usd(missing_cents)} (transactions missing from our system)')
+        print(f'   Artificial discrepancy: ${format_usd(adjusted_not_in_temm_cents)} (excluded by Telefónica)')
     else:
         print(f'   ✅ Normal reconciliation - no pre-filtering detected')
 
     print('\n' + '=' * 100)
 
-    # Return results for programmatic use
+    # Return results for programmatic use (*_cents exact; *_usd derived from them for display)
     return {
         'month': month_name,
         'temm_count': temm_count,
-        'temm_usd': temm_usd,
+        'temm_cents': temm_cents,
+        'temm_usd': cents_to_usd(temm_cents),
         'total_count': total_count,
-        'total_usd': total_usd,
+        'total_cents': total_usd_cents,
+        'total_usd': cents_to_usd(total_usd_cents),
         'adjusted_count': adjusted_count,
-        'adjusted_usd': adjusted_usd,
+        'adjusted_cents': adjusted_cents,
+        'adjusted_usd': cents_to_usd(adjusted_cents),
         'temm_in_total': len(temm_in_total),
         'temm_not_in_total': len(temm_not_in_total),
-        'missing_usd': missing_usd,
+        'missing_cents': missing_cents,
+        'missing_usd': cents_to_usd(missing_cents),
         'adjusted_in_temm': len(adjusted_in_temm),
         'adjusted_not_in_temm': len(adjusted_not_in_temm),
-        'adjusted_in_temm_usd': adjusted_in_temm_usd,
-        'adjusted_not_in_temm_usd': adjusted_not_in_temm_usd,
+        'adjusted_in_temm_cents': adjusted_in_temm_cents,
+        'adjusted_in_temm_usd': cents_to_usd(adjusted_in_temm_cents),
+        'adjusted_not_in_temm_cents': adjusted_not_in_temm_cents,
+        'adjusted_not_in_temm_usd': cents_to_usd(adjusted_not_in_temm_cents),
         'match_rate_pct': adjusted_in_temm_pct,
         'luis_pattern_detected': adjusted_not_in_temm_pct > 95,
         'duplicate_phones': duplicate_phones,
@@ -9,6 +9,11 @@ Replicating Luis's methodology:
 import pandas as pd
 import numpy as np
 
+from reconciliation.catalog import CSV_CHUNK_ROWS
+from reconciliation.excel import streaming_writer, write_rows
+from reconciliation.ids import ID_DTYPES, align_ids, id_set, transaction_ids
+from reconciliation.money import to_cents, total_cents, cents_to_usd, format_usd
+
 # File paths
 TEMM_FILE = '/Users/richardmas/Downloads/Datos de TF auditoria/Registros_TEMM_NoSoporteActual_202309_202412.csv'
 
@@ -36,28 +41,56 @@ print('LUIS-STYLE THREE-WAY ANALYSIS - 2024 COMPLETE YEAR')
 print('Replicating Luis methodology for all 12 months of 2024')
 print('=' * 120)
 
-# Read TEMM file
+# Read TEMM file in chunks, keeping only the 2024 rows and the columns used
+# below, bucketed by month; each month is assembled when it is analyzed
 print('\n📦 Loading Telefonica TEMM file...')
-df_temm = pd.read_csv(TEMM_FILE)
-df_temm['FECHA'] = pd.to_datetime(df_temm['FECHA'], format='%d/%m/%Y')
-df_temm['Year'] = df_temm['FECHA'].dt.year
-df_temm['Month'] = df_temm['FECHA'].dt.month
-df_temm_2024 = df_temm[df_temm['Year'] == 2024].copy()
-
-# Clean TEMM IDs
-df_temm_2024['SEC_ACT_STR'] = df_temm_2024['SEC_ACTUACION'].astype(str).str.strip()
+TEMM_COLUMNS = ['SEC_ACTUACION', 'FECHA', 'ImpUSD']
+temm_chunks = {month_num: [] for month_num in range(1, 13)}
+for chunk in pd.read_csv(TEMM_FILE, dtype=ID_DTYPES, usecols=TEMM_COLUMNS, chunksize=CSV_CHUNK_ROWS):
+    chunk['FECHA'] = pd.to_datetime(chunk['FECHA'], format='%d/%m/%Y')
+    chunk = chunk[chunk['FECHA'].dt.year == 2024].copy()
+    chunk['ImpUSD_CENTS'] = to_cents(chunk['ImpUSD'])
+    temm_template = chunk.iloc[:0]
+    for month_num, rows in chunk.groupby(chunk['FECHA'].dt.month):
+        temm_chunks[month_num].append(rows)
+
+month_counts = {month_num: sum(len(rows) for rows in chunks) for month_num, chunks in temm_chunks.items()}
+temm_total_cents = sum(total_cents(rows['ImpUSD_CENTS']) for chunks in temm_chunks.values() for rows in chunks)
+print(f'   Total 2024 TEMM records: {sum(month_counts.values()):,}')
+print(f'   Total USD amount: ${format_usd(temm_total_cents)}')
+
+
+def temm_month(month_num):
+    """This month's TEMM rows with typed IDs; the month's chunks are released"""
+    df = pd.concat(temm_chunks.pop(month_num) or [temm_template], ignore_index=True)
+    # TEMM IDs as int64 (read as text above, so long IDs keep every digit)
+    df['SEC_ACT_ID'], invalid_ids = transaction_ids(df['SEC_ACTUACION'])
+    if invalid_ids.any():
+        print(f'   ⚠️  {invalid_ids.sum():,} TEMM rows with a malformed SEC_ACTUACION')
+    return df
 
-print(f'   Total 2024 TEMM records: {len(df_temm_2024):,}')
-print(f'   Total USD amount: ${df_temm_2024["ImpUSD"].sum():,.2f}')
 
 # Check month distribution
-month_counts = df_temm_2024.groupby('Month').size()
 print(f'\n   Month distribution:')
 for month_num in range(1, 13):
     count = month_counts.get(month_num, 0)
     month_name = files_config[month_num]['name']
     print(f'   {month_name:>10}: {count:>6,} transactions')
 
+# The workbook is streamed: each month's detail sheets are written as soon as
+# the month is analyzed and only its stats are kept for the SUMMARY sheet
+writer = streaming_writer(OUTPUT_FILE)
+workbook = writer.book
+
+# Formats
+header_fmt = workbook.add_format({'bold': True, 'bg_color': '#4472C4', 'font_color': 'white', 'border': 1})
+detail_header_fmt = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+total_fmt = workbook.add_format({'bold': True, 'bg_color': '#E7E6E6', 'border': 1})
+highlight_fmt = workbook.add_format({'bg_color': '#FFE699', 'border': 1})
+
+# Reserve the first tab for SUMMARY, filled in once all months are done
+summary_sheet = workbook.add_worksheet('SUMMARY')
+
 all_results = {}
 
 # Analyze each month
@@ -72,20 +105,26 @@ for month_num in range(1, 13):
     try:
         # Read Latcom data
         print(f'   Loading {config["file"]}...')
-        df_adjusted = pd.read_excel(config['file'], sheet_name='ADJUSTED')
-        df_real = pd.read_excel(config['file'], sheet_name=config['real_sheet'])
+        df_adjusted = pd.read_excel(config['file'], sheet_name='ADJUSTED', dtype=ID_DTYPES)
+        df_real = pd.read_excel(config['file'], sheet_name=config['real_sheet'], dtype=ID_DTYPES)
+        df_adjusted['AMOUNT_CENTS'] = to_cents(df_adjusted['TransactionAmountUSD'])
+        df_real['AMOUNT_CENTS'] = to_cents(df_real['TransactionAmountUSD'])
 
         # Get TEMM for this month
-        df_temm_month = df_temm_2024[df_temm_2024['Month'] == month_num].copy()
+        df_temm_month = temm_month(month_num)
 
-        # Clean IDs
-        df_adjusted['VEND_TX_STR'] = df_adjusted['VENDOR_TRANSACTION_ID'].astype(str).str.split('.').str[0].str.strip()
-        df_real['VEND_TX_STR'] = df_real['VENDOR_TRANSACTION_ID'].astype(str).str.split('.').str[0].str.strip()
+        # Typed IDs (int64, or text if a file has non-numeric IDs)
+        df_adjusted['VEND_TX_ID'], invalid_adjusted = transaction_ids(df_adjusted['VENDOR_TRANSACTION_ID'])
+        df_real['VEND_TX_ID'], invalid_real = transaction_ids(df_real['VENDOR_TRANSACTION_ID'])
+        if invalid_adjusted.any() or invalid_real.any():
+            print(f'   ⚠️  Malformed VENDOR_TRANSACTION_ID: {invalid_adjusted.sum():,} adjusted, {invalid_real.sum():,} real')
+        df_temm_month['SEC_ACT_ID'], df_adjusted['VEND_TX_ID'], df_real['VEND_TX_ID'] = align_ids(
+            df_temm_month['SEC_ACT_ID'], df_adjusted['VEND_TX_ID'], df_real['VEND_TX_ID'])
 
         # Create ID sets
-        temm_ids = set(df_temm_month['SEC_ACT_STR'])
-        adjusted_ids = set(df_adjusted['VEND_TX_STR'])
-        real_ids = set(df_real['VEND_TX_STR'])
+        temm_ids = id_set(df_temm_month['SEC_ACT_ID'])
+        adjusted_ids = id_set(df_adjusted['VEND_TX_ID'])
+        real_ids = id_set(df_real['VEND_TX_ID'])
 
         # Three-way cross-reference (Luis methodology)
 
@@ -110,17 +149,17 @@ for month_num in range(1, 13):
 
         # Print results
         print(f'\n📊 DATASET SIZES:')
-        print(f'   Telefónica TEMM:   {len(df_temm_month):,} trx, ${df_temm_month["ImpUSD"].sum():,.0f}')
-        print(f'   Latcom Total:      {len(df_real):,} trx, ${df_real["TransactionAmountUSD"].sum():,.0f}')
-        print(f'   Latcom Adjusted:   {len(df_adjusted):,} trx, ${df_adjusted["TransactionAmountUSD"].sum():,.0f}')
+        print(f'   Telefónica TEMM:   {len(df_temm_month):,} trx, ${format_usd(total_cents(df_temm_month["ImpUSD_CENTS"]))}')
+        print(f'   Latcom Total:      {len(df_real):,} trx, ${format_usd(total_cents(df_real["AMOUNT_CENTS"]))}')
+        print(f'   Latcom Adjusted:   {len(df_adjusted):,} trx, ${format_usd(total_cents(df_adjusted["AMOUNT_CENTS"]))}')
 
         print(f'\n🔍 1️⃣ TELEFÓNICA vs LATCOM TOTAL:')
         print(f'   ✅ TEMM in Total:        {len(temm_in_real):,} ({len(temm_in_real)/len(df_temm_month)*100:.1f}%)')
         print(f'   ❌ TEMM NOT in Total:    {len(temm_not_in_real):,} (MISSING FROM OUR SYSTEM)')
 
         # Calculate amount for missing
-        df_temm_missing = df_temm_month[df_temm_month['SEC_ACT_STR'].isin(temm_not_in_real)]
-        print(f'      Amount missing: ${df_temm_missing["ImpUSD"].sum():,.2f}')
+        df_temm_missing = df_temm_month[df_temm_month['SEC_ACT_ID'].isin(temm_not_in_real)]
+        print(f'      Amount missing: ${format_usd(total_cents(df_temm_missing["ImpUSD_CENTS"]))}')
 
         print(f'\n🔍 2️⃣ TELEFÓNICA vs LATCOM ADJUSTED:')
         print(f'   ✅ TEMM in Adjusted:     {len(temm_in_adjusted):,} ({len(temm_in_adjusted)/len(df_temm_month)*100:.1f}%)')
@@ -135,38 +174,35 @@ for month_num in range(1, 13):
         print(f'   ❌ Adjusted NOT in TEMM: {len(adjusted_not_in_temm):,} ({len(adjusted_not_in_temm)/len(df_adjusted)*100:.1f}%)')
 
         # Calculate amounts
-        df_adjusted_in_temm = df_adjusted[df_adjusted['VEND_TX_STR'].isin(adjusted_in_temm)]
-        df_adjusted_not_in_temm = df_adjusted[df_adjusted['VEND_TX_STR'].isin(adjusted_not_in_temm)]
+        df_adjusted_in_temm = df_adjusted[df_adjusted['VEND_TX_ID'].isin(adjusted_in_temm)]
+        df_adjusted_not_in_temm = df_adjusted[df_adjusted['VEND_TX_ID'].isin(adjusted_not_in_temm)]
 
-        print(f'      Amount in TEMM: ${df_adjusted_in_temm["TransactionAmountUSD"].sum():,.2f}')
-        print(f'      Amount NOT in TEMM: ${df_adjusted_not_in_temm["TransactionAmountUSD"].sum():,.2f}')
+        print(f'      Amount in TEMM: ${format_usd(total_cents(df_adjusted_in_temm["AMOUNT_CENTS"]))}')
+        print(f'      Amount NOT in TEMM: ${format_usd(total_cents(df_adjusted_not_in_temm["AMOUNT_CENTS"]))}')
 
         print(f'\n🔍 5️⃣ FILTERING ANALYSIS:')
         removed_count = len(df_real) - len(df_adjusted)
         removed_pct = (removed_count / len(df_real) * 100) if len(df_real) > 0 else 0
         print(f'   Transactions removed: {removed_count:,} ({removed_pct:.1f}%)')
 
-        # Store results
+        # Store results (stats only - detail rows go straight to the workbook)
         all_results[month_num] = {
             'month_name': month_name,
-            'temm': df_temm_month,
-            'adjusted': df_adjusted,
-            'real': df_real,
             'stats': {
                 'temm_count': len(df_temm_month),
-                'temm_usd': df_temm_month['ImpUSD'].sum(),
+                'temm_cents': total_cents(df_temm_month['ImpUSD_CENTS']),
                 'adjusted_count': len(df_adjusted),
-                'adjusted_usd': df_adjusted['TransactionAmountUSD'].sum(),
+                'adjusted_cents': total_cents(df_adjusted['AMOUNT_CENTS']),
                 'real_count': len(df_real),
-                'real_usd': df_real['TransactionAmountUSD'].sum(),
+                'real_cents': total_cents(df_real['AMOUNT_CENTS']),
                 'temm_in_real': len(temm_in_real),
                 'temm_not_in_real': len(temm_not_in_real),
-                'temm_not_in_real_usd': df_temm_missing['ImpUSD'].sum(),
+                'temm_not_in_real_cents': total_cents(df_temm_missing['ImpUSD_CENTS']),
                 'temm_in_adjusted': len(temm_in_adjusted),
                 'adjusted_in_temm': len(adjusted_in_temm),
                 'adjusted_not_in_temm': len(adjusted_not_in_temm),
-                'adjusted_in_temm_usd': df_adjusted_in_temm['TransactionAmountUSD'].sum(),
-                'adjusted_not_in_temm_usd': df_adjusted_not_in_temm['TransactionAmountUSD'].sum(),
+                'adjusted_in_temm_cents': total_cents(df_adjusted_in_temm['AMOUNT_CENTS']),
+                'adjusted_not_in_temm_cents': total_cents(df_adjusted_not_in_temm['AMOUNT_CENTS']),
                 'adjusted_errors': len(adjusted_not_in_real),
                 'removed_count': removed_count,
                 'removed_pct': removed_pct
@@ -179,6 +215,18 @@ for month_num in range(1, 13):
             print(f'   {len(adjusted_not_in_temm):,} adjusted transactions NOT in Telefónica TEMM')
             print(f'   This suggests TEMM file is PRE-FILTERED by Telefónica!')
 
+        # Detailed comparison sheets for this month
+        if len(df_temm_month) > 0:
+            write_rows(workbook.add_worksheet(f'{month_name[:3]}_TEMM'),
+                       df_temm_month[['SEC_ACTUACION', 'FECHA', 'ImpUSD', 'SEC_ACT_ID']], detail_header_fmt)
+
+        if len(df_adjusted) > 0:
+            write_rows(workbook.add_worksheet(f'{month_name[:3]}_Adjusted'),
+                       df_adjusted[['VENDOR_TRANSACTION_ID', 'TransactionAmountUSD', 'VEND_TX_ID']], detail_header_fmt)
+
+        # Release this month's frames before loading the next workbook
+        del df_adjusted, df_real, df_temm_month
+
     except Exception as e:
         print(f'\n❌ ERROR processing {month_name}: {str(e)}')
         # Store empty result
@@ -187,19 +235,19 @@ for month_num in range(1, 13):
             'error': str(e),
             'stats': {
                 'temm_count': 0,
-                'temm_usd': 0,
+                'temm_cents': 0,
                 'adjusted_count': 0,
-                'adjusted_usd': 0,
+                'adjusted_cents': 0,
                 'real_count': 0,
-                'real_usd': 0,
+                'real_cents': 0,
                 'temm_in_real': 0,
                 'temm_not_in_real': 0,
-                'temm_not_in_real_usd': 0,
+                'temm_not_in_real_cents': 0,
                 'temm_in_adjusted': 0,
                 'adjusted_in_temm': 0,
                 'adjusted_not_in_temm': 0,
-                'adjusted_in_temm_usd': 0,
-                'adjusted_not_in_temm_usd': 0,
+                'adjusted_in_temm_cents': 0,
+                'adjusted_not_in_temm_cents': 0,
                 'adjusted_errors': 0,
                 'removed_count': 0,
                 'removed_pct': 0
@@ -211,91 +259,60 @@ print(f'\n{"=" * 120}')
 print('CREATING EXCEL REPORT...')
 print('=' * 120)
 
-with pd.ExcelWriter(OUTPUT_FILE, engine='xlsxwriter') as writer:
-    workbook = writer.book
-
-    # Formats
-    header_fmt = workbook.add_format({'bold': True, 'bg_color': '#4472C4', 'font_color': 'white', 'border': 1})
-    total_fmt = workbook.add_format({'bold': True, 'bg_color': '#E7E6E6', 'border': 1})
-    highlight_fmt = workbook.add_format({'bg_color': '#FFE699', 'border': 1})
-
-    # Summary sheet
-    summary_data = []
-    for month_num in range(1, 13):
-        r = all_results[month_num]
-        s = r['stats']
-
-        # Calculate match rate only if we have adjusted transactions
-        match_rate = round((s['adjusted_in_temm'] / s['adjusted_count'] * 100), 2) if s['adjusted_count'] > 0 else 0
-
-        summary_data.append({
-            'Month': r['month_name'],
-            'Telefonica_Count': s['temm_count'],
-            'Telefonica_USD': s['temm_usd'],
-            'Latcom_Total_Count': s['real_count'],
-            'Latcom_Total_USD': s['real_usd'],
-            'Latcom_Adjusted_Count': s['adjusted_count'],
-            'Latcom_Adjusted_USD': s['adjusted_usd'],
-            'TEMM_in_Total': s['temm_in_real'],
-            'TEMM_NOT_in_Total': s['temm_not_in_real'],
-            'Missing_USD': s['temm_not_in_real_usd'],
-            'Adjusted_in_TEMM': s['adjusted_in_temm'],
-            'Adjusted_NOT_in_TEMM': s['adjusted_not_in_temm'],
-            'Adjusted_in_TEMM_USD': s['adjusted_in_temm_usd'],
-            'Adjusted_NOT_in_TEMM_USD': s['adjusted_not_in_temm_usd'],
-            'Match_Rate_%': match_rate,
-            'Removed_Count': s['removed_count'],
-            'Removed_%': round(s['removed_pct'], 1)
-        })
-
-    # Add totals
+# Summary sheet
+summary_data = []
+for month_num in range(1, 13):
+    r = all_results[month_num]
+    s = r['stats']
+
+    # Calculate match rate only if we have adjusted transactions
+    match_rate = round((s['adjusted_in_temm'] / s['adjusted_count'] * 100), 2) if s['adjusted_count'] > 0 else 0
+
     summary_data.append({
-        'Month': 'TOTAL 2024',
-        'Telefonica_Count': sum(r['stats']['temm_count'] for r in all_results.values()),
-        'Telefonica_USD': sum(r['stats']['temm_usd'] for r in all_results.values()),
-        'Latcom_Total_Count': sum(r['stats']['real_count'] for r in all_results.values()),
-        'Latcom_Total_USD': sum(r['stats']['real_usd'] for r in all_results.values()),
-        'Latcom_Adjusted_Count': sum(r['stats']['adjusted_count'] for r in all_results.values()),
-        'Latcom_Adjusted_USD': sum(r['stats']['adjusted_usd'] for r in all_results.values()),
-        'TEMM_in_Total': sum(r['stats']['temm_in_real'] for r in all_results.values()),
-        'TEMM_NOT_in_Total': sum(r['stats']['temm_not_in_real'] for r in all_results.values()),
-        'Missing_USD': sum(r['stats']['temm_not_in_real_usd'] for r in all_results.values()),
-        'Adjusted_in_TEMM': sum(r['stats']['adjusted_in_temm'] for r in all_results.values()),
-        'Adjusted_NOT_in_TEMM': sum(r['stats']['adjusted_not_in_temm'] for r in all_results.values()),
-        'Adjusted_in_TEMM_USD': sum(r['stats']['adjusted_in_temm_usd'] for r in all_results.values()),
-        'Adjusted_NOT_in_TEMM_USD': sum(r['stats']['adjusted_not_in_temm_usd'] for r in all_results.values()),
-        'Match_Rate_%': '',
-        'Removed_Count': sum(r['stats']['removed_count'] for r in all_results.values()),
-        'Removed_%': ''
+        'Month': r['month_name'],
+        'Telefonica_Count': s['temm_count'],
+        'Telefonica_USD': cents_to_usd(s['temm_cents']),
+        'Latcom_Total_Count': s['real_count'],
+        'Latcom_Total_USD': cents_to_usd(s['real_cents']),
+        'Latcom_Adjusted_Count': s['adjusted_count'],
+        'Latcom_Adjusted_USD': cents_to_usd(s['adjusted_cents']),
+        'TEMM_in_Total': s['temm_in_real'],
+        'TEMM_NOT_in_Total': s['temm_not_in_real'],
+        'Missing_USD': cents_to_usd(s['temm_not_in_real_cents']),
+        'Adjusted_in_TEMM': s['adjusted_in_temm'],
+        'Adjusted_NOT_in_TEMM': s['adjusted_not_in_temm'],
+        'Adjusted_in_TEMM_USD': cents_to_usd(s['adjusted_in_temm_cents']),
+        'Adjusted_NOT_in_TEMM_USD': cents_to_usd(s['adjusted_not_in_temm_cents']),
+        'Match_Rate_%': match_rate,
+        'Removed_Count': s['removed_count'],
+        'Removed_%': round(s['removed_pct'], 1)
     })
 
-    df_summary = pd.DataFrame(summary_data)
-    df_summary.to_excel(writer, sheet_name='SUMMARY', index=False)
-
-    # Format summary
-    worksheet = writer.sheets['SUMMARY']
-    for col_num, value in enumerate(df_summary.columns.values):
-        worksheet.write(0, col_num, value, header_fmt)
-        worksheet.set_column(col_num, col_num, 18)
-
-    # Add detailed sheets for each month (if data exists)
-    for month_num in range(1, 13):
-        r = all_results[month_num]
-        if 'error' not in r and 'temm' in r:
-            # Add detailed comparison sheets
-            month_name = r['month_name']
-
-            # TEMM data
-            if len(r['temm']) > 0:
-                r['temm'][['SEC_ACTUACION', 'FECHA', 'ImpUSD', 'SEC_ACT_STR']].to_excel(
-                    writer, sheet_name=f'{month_name[:3]}_TEMM', index=False
-                )
-
-            # Adjusted data
-            if len(r['adjusted']) > 0:
-                r['adjusted'][['VENDOR_TRANSACTION_ID', 'TransactionAmountUSD', 'VEND_TX_STR']].to_excel(
-                    writer, sheet_name=f'{month_name[:3]}_Adjusted', index=False
-                )
+# Add totals
+summary_data.append({
+    'Month': 'TOTAL 2024',
+    'Telefonica_Count': sum(r['stats']['temm_count'] for r in all_results.values()),
+    'Telefonica_USD': cents_to_usd(sum(r['stats']['temm_cents'] for r in all_results.values())),
+    'Latcom_Total_Count': sum(r['stats']['real_count'] for r in all_results.values()),
+    'Latcom_Total_USD': cents_to_usd(sum(r['stats']['real_cents'] for r in all_results.values())),
+    'Latcom_Adjusted_Count': sum(r['stats']['adjusted_count'] for r in all_results.values()),
+    'Latcom_Adjusted_USD': cents_to_usd(sum(r['stats']['adjusted_cents'] for r in all_results.values())),
+    'TEMM_in_Total': sum(r['stats']['temm_in_real'] for r in all_results.values()),
+    'TEMM_NOT_in_Total': sum(r['stats']['temm_not_in_real'] for r in all_results.values()),
+    'Missing_USD': cents_to_usd(sum(r['stats']['temm_not_in_real_cents'] for r in all_results.values())),
+    'Adjusted_in_TEMM': sum(r['stats']['adjusted_in_temm'] for r in all_results.values()),
+    'Adjusted_NOT_in_TEMM': sum(r['stats']['adjusted_not_in_temm'] for r in all_results.values()),
+    'Adjusted_in_TEMM_USD': cents_to_usd(sum(r['stats']['adjusted_in_temm_cents'] for r in all_results.values())),
+    'Adjusted_NOT_in_TEMM_USD': cents_to_usd(sum(r['stats']['adjusted_not_in_temm_cents'] for r in all_results.values())),
+    'Match_Rate_%': '',
+    'Removed_Count': sum(r['stats']['removed_count'] for r in all_results.values()),
+    'Removed_%': ''
+})
+
+df_summary = pd.DataFrame(summary_data)
+write_rows(summary_sheet, df_summary, header_fmt, column_width=18)
+
+writer.close()
 
 print(f'✅ Report created: {OUTPUT_FILE}')
 
@@ -305,29 +322,29 @@ print('FINAL SUMMARY - LUIS METHODOLOGY APPLIED TO ALL 2024')
 print('=' * 120)
 
 total_temm = sum(r['stats']['temm_count'] for r in all_results.values())
-total_temm_usd = sum(r['stats']['temm_usd'] for r in all_results.values())
+total_temm_cents = sum(r['stats']['temm_cents'] for r in all_results.values())
 total_adjusted = sum(r['stats']['adjusted_count'] for r in all_results.values())
-total_adjusted_usd = sum(r['stats']['adjusted_usd'] for r in all_results.values())
+total_adjusted_cents = sum(r['stats']['adjusted_cents'] for r in all_results.values())
 total_real = sum(r['stats']['real_count'] for r in all_results.values())
-total_real_usd = sum(r['stats']['real_usd'] for r in all_results.values())
+total_real_cents = sum(r['stats']['real_cents'] for r in all_results.values())
 
 total_missing = sum(r['stats']['temm_not_in_real'] for r in all_results.values())
-total_missing_usd = sum(r['stats']['temm_not_in_real_usd'] for r in all_results.values())
+total_missing_cents = sum(r['stats']['temm_not_in_real_cents'] for r in all_results.values())
 
 total_adj_in_temm = sum(r['stats']['adjusted_in_temm'] for r in all_results.values())
 total_adj_not_in_temm = sum(r['stats']['adjusted_not_in_temm'] for r in all_results.values())
-total_adj_in_temm_usd = sum(r['stats']['adjusted_in_temm_usd'] for r in all_results.values())
-total_adj_not_in_temm_usd = sum(r['stats']['adjusted_not_in_temm_usd'] for r in all_results.values())
+total_adj_in_temm_cents = sum(r['stats']['adjusted_in_temm_cents'] for r in all_results.values())
+total_adj_not_in_temm_cents = sum(r['stats']['adjusted_not_in_temm_cents'] for r in all_results.values())
 
 print(f'\n📊 OVERALL NUMBERS:')
-print(f'Telefónica TEMM:     {total_temm:,} transactions → ${total_temm_usd:,.2f}')
-print(f'Latcom Total:        {total_real:,} transactions → ${total_real_usd:,.2f}')
-print(f'Latcom Adjusted:     {total_adjusted:,} transactions → ${total_adjusted_usd:,.2f}')
+print(f'Telefónica TEMM:     {total_temm:,} transactions → ${format_usd(total_temm_cents)}')
+print(f'Latcom Total:        {total_real:,} transactions → ${format_usd(total_real_cents)}')
+print(f'Latcom Adjusted:     {total_adjusted:,} transactions → ${format_usd(total_adjusted_cents)}')
 
 print(f'\n🚨 KEY FINDINGS (Luis Pattern):')
-print(f'1. Missing from our system:  {total_missing:,} trx → ${total_missing_usd:,.2f}')
-print(f'2. Adjusted in TEMM:         {total_adj_in_temm:,} trx → ${total_adj_in_temm_usd:,.2f}')
-print(f'3. Adjusted NOT in TEMM:     {total_adj_not_in_temm:,} trx → ${total_adj_not_in_temm_usd:,.2f}')
+print(f'1. Missing from our system:  {total_missing:,} trx → ${format_usd(total_missing_cents)}')
+print(f'2. Adjusted in TEMM:         {total_adj_in_temm:,} trx → ${format_usd(total_adj_in_temm_cents)}')
+print(f'3. Adjusted NOT in TEMM:     {total_adj_not_in_temm:,} trx → ${format_usd(total_adj_not_in_temm_cents)}')
 
 match_rate = (total_adj_in_temm / total_adjusted * 100) if total_adjusted > 0 else 0
 print(f'\n📈 Overall Match Rate: {match_rate:.2f}%')
@@ -338,7 +355,7 @@ if match_rate < 5:
     print('   ⚠️  LUIS PATTERN CONFIRMED FOR ALL MONTHS!')
     print('   TEMM file appears to be PRE-FILTERED by Telefónica')
     print('   They removed most adjusted/successful transactions')
-    print(f'   Real discrepancy: ${total_missing_usd:,.2f} (transactions missing from our system)')
+    print(f'   Real discrepancy: ${format_usd(total_missing_cents)} (transactions missing from our system)')
 else:
     print('   Pattern does not match Luis findings - further investigation needed')
 
@@ -9,6 +9,9 @@ Replicating Luis's methodology:
 import pandas as pd
 import numpy as np
 
+from reconciliation.ids import ID_DTYPES, align_ids, id_set, transaction_ids
+from reconciliation.money import to_cents, total_cents, cents_to_usd, format_usd
+
 # File paths
 TEMM_FILE = '/Users/richardmas/Downloads/Latcom/Ajustados 2023 Latcom /Registros_TEMM_NoSoporteActual_202309_202412.csv'
 SEP_FILE = '/Users/richardmas/Downloads/Latcom/Ajustados 2023 Latcom /FINAL SEPTIEMBRE 20231.xlsx'
@@ -25,14 +28,17 @@ print('=' * 120)
 
 # Read TEMM file
 print('\n📦 Loading Telefonica TEMM file...')
-df_temm = pd.read_csv(TEMM_FILE)
+df_temm = pd.read_csv(TEMM_FILE, dtype=ID_DTYPES)
 df_temm['FECHA'] = pd.to_datetime(df_temm['FECHA'], format='%d/%m/%Y')
 df_temm['Year'] = df_temm['FECHA'].dt.year
 df_temm['Month'] = df_temm['FECHA'].dt.month
 df_temm_2023 = df_temm[df_temm['Year'] == 2023].copy()
+df_temm_2023['ImpUSD_CENTS'] = to_cents(df_temm_2023['ImpUSD'])
 
-# Clean TEMM IDs
-df_temm_2023['SEC_ACT_STR'] = df_temm_2023['SEC_ACTUACION'].astype(str).str.strip()
+# TEMM IDs as int64 (read as text above, so long IDs keep every digit)
+df_temm_2023['SEC_ACT_ID'], invalid_ids = transaction_ids(df_temm_2023['SEC_ACTUACION'])
+if invalid_ids.any():
+    print(f'   ⚠️  {invalid_ids.sum():,} TEMM rows with a malformed SEC_ACTUACION')
 
 print(f'   Total 2023 TEMM records: {len(df_temm_2023):,}')
 
@@ -56,20 +62,26 @@ for month_num in [9, 10, 11, 12]:
     print('=' * 120)
 
     # Read Latcom data
-    df_adjusted = pd.read_excel(config['file'], sheet_name='ADJUSTED')
-    df_real = pd.read_excel(config['file'], sheet_name=config['real_sheet'])
+    df_adjusted = pd.read_excel(config['file'], sheet_name='ADJUSTED', dtype=ID_DTYPES)
+    df_real = pd.read_excel(config['file'], sheet_name=config['real_sheet'], dtype=ID_DTYPES)
+    df_adjusted['AMOUNT_CENTS'] = to_cents(df_adjusted['TransactionAmountUSD'])
+    df_real['AMOUNT_CENTS'] = to_cents(df_real['TransactionAmountUSD'])
 
     # Get TEMM for this month
     df_temm_month = df_temm_2023[df_temm_2023['Month'] == month_num].copy()
 
-    # Clean IDs
-    df_adjusted['VEND_TX_STR'] = df_adjusted['VENDOR_TRANSACTION_ID'].astype(str).str.split('.').str[0].str.strip()
-    df_real['VEND_TX_STR'] = df_real['VENDOR_TRANSACTION_ID'].astype(str).str.split('.').str[0].str.strip()
+    # Typed IDs (int64, or text if a file has non-numeric IDs)
+    df_adjusted['VEND_TX_ID'], invalid_adjusted = transaction_ids(df_adjusted['VENDOR_TRANSACTION_ID'])
+    df_real['VEND_TX_ID'], invalid_real = transaction_ids(df_real['VENDOR_TRANSACTION_ID'])
+    if invalid_adjusted.any() or invalid_real.any():
+        print(f'   ⚠️  Malformed VENDOR_TRANSACTION_ID: {invalid_adjusted.sum():,} adjusted, {invalid_real.sum():,} real')
+    df_temm_month['SEC_ACT_ID'], df_adjusted['VEND_TX_ID'], df_real['VEND_TX_ID'] = align_ids(
+        df_temm_month['SEC_ACT_ID'], df_adjusted['VEND_TX_ID'], df_real['VEND_TX_ID'])
 
     # Create ID sets
-    temm_ids = set(df_temm_month['SEC_ACT_STR'])
-    adjusted_ids = set(df_adjusted['VEND_TX_STR'])
-    real_ids = set(df_real['VEND_TX_STR'])
+    temm_ids = id_set(df_temm_month['SEC_ACT_ID'])
+    adjusted_ids = id_set(df_adjusted['VEND_TX_ID'])
+    real_ids = id_set(df_real['VEND_TX_ID'])
 
     # Three-way cross-reference (Luis methodology)
 
@@ -94,17 +106,17 @@ for month_num in [9, 10, 11, 12]:
 
     # Print results
     print(f'\n📊 DATASET SIZES:')
-    print(f'   Telefónica TEMM:   {len(df_temm_month):,} trx, ${df_temm_month["ImpUSD"].sum():,.0f}')
-    print(f'   Latcom Total:      {len(df_real):,} trx, ${df_real["TransactionAmountUSD"].sum():,.0f}')
-    print(f'   Latcom Adjusted:   {len(df_adjusted):,} trx, ${df_adjusted["TransactionAmountUSD"].sum():,.0f}')
+    print(f'   Telefónica TEMM:   {len(df_temm_month):,} trx, ${format_usd(total_cents(df_temm_month["ImpUSD_CENTS"]))}')
+    print(f'   Latcom Total:      {len(df_real):,} trx, ${format_usd(total_cents(df_real["AMOUNT_CENTS"]))}')
+    print(f'   Latcom Adjusted:   {len(df_adjusted):,} trx, ${format_usd(total_cents(df_adjusted["AMOUNT_CENTS"]))}')
 
     print(f'\n🔍 1️⃣ TELEFÓNICA vs LATCOM TOTAL:')
     print(f'   ✅ TEMM in Total:        {len(temm_in_real):,} ({len(temm_in_real)/len(df_temm_month)*100:.1f}%)')
     print(f'   ❌ TEMM NOT in Total:    {len(temm_not_in_real):,} (MISSING FROM OUR SYSTEM)')
 
     # Calculate amount for missing
-    df_temm_missing = df_temm_month[df_temm_month['SEC_ACT_STR'].isin(temm_not_in_real)]
-    print(f'      Amount missing: ${df_temm_missing["ImpUSD"].sum():,.2f}')
+    df_temm_missing = df_temm_month[df_temm_month['SEC_ACT_ID'].isin(temm_not_in_real)]
+    print(f'      Amount missing: ${format_usd(total_cents(df_temm_missing["ImpUSD_CENTS"]))}')
 
     print(f'\n🔍 2️⃣ TELEFÓNICA vs LATCOM ADJUSTED:')
     print(f'   ✅ TEMM in Adjusted:     {len(temm_in_adjusted):,} ({len(temm_in_adjusted)/len(df_temm_month)*100:.1f}%)')
@@ -119,11 +131,11 @@ for month_num in [9, 10, 11, 12]:
     print(f'   ❌ Adjusted NOT in TEMM: {len(adjusted_not_in_temm):,} ({len(adjusted_not_in_temm)/len(df_adjusted)*100:.1f}%)')
 
     # Calculate amounts
-    df_adjusted_in_temm = df_adjusted[df_adjusted['VEND_TX_STR'].isin(adjusted_in_temm)]
-    df_adjusted_not_in_temm = df_adjusted[df_adjusted['VEND_TX_STR'].isin(adjusted_not_in_temm)]
+    df_adjusted_in_temm = df_adjusted[df_adjusted['VEND_TX_ID'].isin(adjusted_in_temm)]
+    df_adjusted_not_in_temm = df_adjusted[df_adjusted['VEND_TX_ID'].isin(adjusted_not_in_temm)]
 
-    print(f'      Amount in TEMM: ${df_adjusted_in_temm["TransactionAmountUSD"].sum():,.2f}')
-    print(f'      Amount NOT in TEMM: ${df_adjusted_not_in_temm["TransactionAmountUSD"].sum():,.2f}')
+    print(f'      Amount in TEMM: ${format_usd(total_cents(df_adjusted_in_temm["AMOUNT_CENTS"]))}')
+    print(f'      Amount NOT in TEMM: ${format_usd(total_cents(df_adjusted_not_in_temm["AMOUNT_CENTS"]))}')
 
     print(f'\n🔍 5️⃣ FILTERING ANALYSIS:')
     removed_count = len(df_real) - len(df_adjusted)
@@ -138,19 +150,19 @@ for month_num in [9, 10, 11, 12]:
         'real': df_real,
         'stats': {
             'temm_count': len(df_temm_month),
-            'temm_usd': df_temm_month['ImpUSD'].sum(),
+            'temm_cents': total_cents(df_temm_month['ImpUSD_CENTS']),
             'adjusted_count': len(df_adjusted),
-            'adjusted_usd': df_adjusted['TransactionAmountUSD'].sum(),
+            'adjusted_cents': total_cents(df_adjusted['AMOUNT_CENTS']),
             'real_count': len(df_real),
-            'real_usd': df_real['TransactionAmountUSD'].sum(),
+            'real_cents': total_cents(df_real['AMOUNT_CENTS']),
             'temm_in_real': len(temm_in_real),
             'temm_not_in_real': len(temm_not_in_real),
-            'temm_not_in_real_usd': df_temm_missing['ImpUSD'].sum(),
+            'temm_not_in_real_cents': total_cents(df_temm_missing['ImpUSD_CENTS']),
             'temm_in_adjusted': len(temm_in_adjusted),
             'adjusted_in_temm': len(adjusted_in_temm),
             'adjusted_not_in_temm': len(adjusted_not_in_temm),
-            'adjusted_in_temm_usd': df_adjusted_in_temm['TransactionAmountUSD'].sum(),
-            'adjusted_not_in_temm_usd': df_adjusted_not_in_temm['TransactionAmountUSD'].sum(),
+            'adjusted_in_temm_cents': total_cents(df_adjusted_in_temm['AMOUNT_CENTS']),
+            'adjusted_not_in_temm_cents': total_cents(df_adjusted_not_in_temm['AMOUNT_CENTS']),
             'adjusted_errors': len(adjusted_not_in_real),
             'removed_count': removed_count,
             'removed_pct': removed_pct
@@ -184,18 +196,18 @@ with pd.ExcelWriter(OUTPUT_FILE, engine='xlsxwriter') as writer:
         summary_data.append({
             'Month': r['month_name'],
             'Telefonica_Count': s['temm_count'],
-            'Telefonica_USD': s['temm_usd'],
+            'Telefonica_USD': cents_to_usd(s['temm_cents']),
             'Latcom_Total_Count': s['real_count'],
-            'Latcom_Total_USD': s['real_usd'],
+            'Latcom_Total_USD': cents_to_usd(s['real_cents']),
             'Latcom_Adjusted_Count': s['adjusted_count'],
-            'Latcom_Adjusted_USD': s['adjusted_usd'],
+            'Latcom_Adjusted_USD': cents_to_usd(s['adjusted_cents']),
             'TEMM_in_Total': s['temm_in_real'],
             'TEMM_NOT_in_Total': s['temm_not_in_real'],
-            'Missing_USD': s['temm_not_in_real_usd'],
+            'Missing_USD': cents_to_usd(s['temm_not_in_real_cents']),
             'Adjusted_in_TEMM': s['adjusted_in_temm'],
             'Adjusted_NOT_in_TEMM': s['adjusted_not_in_temm'],
-            'Adjusted_in_TEMM_USD': s['adjusted_in_temm_usd'],
-            'Adjusted_NOT_in_TEMM_USD': s['adjusted_not_in_temm_usd'],
+            'Adjusted_in_TEMM_USD': cents_to_usd(s['adjusted_in_temm_cents']),
+            'Adjusted_NOT_in_TEMM_USD': cents_to_usd(s['adjusted_not_in_temm_cents']),
             'Match_Rate_%': round((s['adjusted_in_temm'] / s['adjusted_count'] * 100), 2),
             'Removed_Count': s['removed_count'],
             'Removed_%': round(s['removed_pct'], 1)
@@ -205,18 +217,18 @@ with pd.ExcelWriter(OUTPUT_FILE, engine='xlsxwriter') as writer:
     summary_data.append({
         'Month': 'TOTAL 2023',
         'Telefonica_Count': sum(r['stats']['temm_count'] for r in all_results.values()),
-        'Telefonica_USD': sum(r['stats']['temm_usd'] for r in all_results.values()),
+        'Telefonica_USD': cents_to_usd(sum(r['stats']['temm_cents'] for r in all_results.values())),
         'Latcom_Total_Count': sum(r['stats']['real_count'] for r in all_results.values()),
-        'Latcom_Total_USD': sum(r['stats']['real_usd'] for r in all_results.values()),
+        'Latcom_Total_USD': cents_to_usd(sum(r['stats']['real_cents'] for r in all_results.values())),
         'Latcom_Adjusted_Count': sum(r['stats']['adjusted_count'] for r in all_results.values()),
-        'Latcom_Adjusted_USD': sum(r['stats']['adjusted_usd'] for r in all_results.values()),
+        'Latcom_Adjusted_USD': cents_to_usd(sum(r['stats']['adjusted_cents'] for r in all_results.values())),
         'TEMM_in_Total': sum(r['stats']['temm_in_real'] for r in all_results.values()),
         'TEMM_NOT_in_Total': sum(r['stats']['temm_not_in_real'] for r in all_results.values()),
-        'Missing_USD': sum(r['stats']['temm_not_in_real_usd'] for r in all_results.values()),
+        'Missing_USD': cents_to_usd(sum(r['stats']['temm_not_in_real_cents'] for r in all_results.values())),
         'Adjusted_in_TEMM': sum(r['stats']['adjusted_in_temm'] for r in all_results.values()),
         'Adjusted_NOT_in_TEMM': sum(r['stats']['adjusted_not_in_temm'] for r in all_results.values()),
-        'Adjusted_in_TEMM_USD': sum(r['stats']['adjusted_in_temm_usd'] for r in all_results.values()),
-        'Adjusted_NOT_in_TEMM_USD': sum(r['stats']['adjusted_not_in_temm_usd'] for r in all_results.values()),
+        'Adjusted_in_TEMM_USD': cents_to_usd(sum(r['stats']['adjusted_in_temm_cents'] for r in all_results.values())),
+        'Adjusted_NOT_in_TEMM_USD': cents_to_usd(sum(r['stats']['adjusted_not_in_temm_cents'] for r in all_results.values())),
         'Match_Rate_%': '',
         'Removed_Count': sum(r['stats']['removed_count'] for r in all_results.values()),
         'Removed_%': ''
@@ -239,29 +251,29 @@ print('FINAL SUMMARY - LUIS METHODOLOGY APPLIED TO ALL 2023')
 print('=' * 120)
 
 total_temm = sum(r['stats']['temm_count'] for r in all_results.values())
-total_temm_usd = sum(r['stats']['temm_usd'] for r in all_results.values())
+total_temm_cents = sum(r['stats']['temm_cents'] for r in all_results.values())
 total_adjusted = sum(r['stats']['adjusted_count'] for r in all_results.values())
-total_adjusted_usd = sum(r['stats']['adjusted_usd'] for r in all_results.values())
+total_adjusted_cents = sum(r['stats']['adjusted_cents'] for r in all_results.values())
 total_real = sum(r['stats']['real_count'] for r in all_results.values())
-total_real_usd = sum(r['stats']['real_usd'] for r in all_results.values())
+total_real_cents = sum(r['stats']['real_cents'] for r in all_results.values())
 
 total_missing = sum(r['stats']['temm_not_in_real'] for r in all_results.values())
-total_missing_usd = sum(r['stats']['temm_not_in_real_usd'] for r in all_results.values())
+total_missing_cents = sum(r['stats']['temm_not_in_real_cents'] for r in all_results.values())
 
 total_adj_in_temm = sum(r['stats']['adjusted_in_temm'] for r in all_results.values())
 total_adj_not_in_temm = sum(r['stats']['adjusted_not_in_temm'] for r in all_results.values())
-total_adj_in_temm_usd = sum(r['stats']['adjusted_in_temm_usd'] for r in all_results.values())
-total_adj_not_in_temm_usd = sum(r['stats']['adjusted_not_in_temm_usd'] for r in all_results.values())
+total_adj_in_temm_cents = sum(r['stats']['adjusted_in_temm_cents'] for r in all_results.values())
+total_adj_not_in_temm_cents = sum(r['stats']['adjusted_not_in_temm_cents'] for r in all_results.values())
 
 print(f'\n📊 OVERALL NUMBERS:')
-print(f'Telefónica TEMM:     {total_temm:,} transactions → ${total_temm_usd:,.2f}')
-print(f'Latcom Total:        {total_real:,} transactions → ${total_real_usd:,.2f}')
-print(f'Latcom Adjusted:     {total_adjusted:,} transactions → ${total_adjusted_usd:,.2f}')
+print(f'Telefónica TEMM:     {total_temm:,} transactions → ${format_usd(total_temm_cents)}')
+print(f'Latcom Total:        {total_real:,} transactions → ${format_usd(total_real_cents)}')
+print(f'Latcom Adjusted:     {total_adjusted:,} transactions → ${format_usd(total_adjusted_cents)}')
 
 print(f'\n🚨 KEY FINDINGS (Luis Pattern):')
-print(f'1. Missing from our system:  {total_missing:,} trx → ${total_missing_usd:,.2f}')
-print(f'2. Adjusted in TEMM:         {total_adj_in_temm:,} trx → ${total_adj_in_temm_usd:,.2f}')
-print(f'3. Adjusted NOT in TEMM:     {total_adj_not_in_temm:,} trx → ${total_adj_not_in_temm_usd:,.2f}')
+print(f'1. Missing from our system:  {total_missing:,} trx → ${format_usd(total_missing_cents)}')
+print(f'2. Adjusted in TEMM:         {total_adj_in_temm:,} trx → ${format_usd(total_adj_in_temm_cents)}')
+print(f'3. Adjusted NOT in TEMM:     {total_adj_not_in_temm:,} trx → ${format_usd(total_adj_not_in_temm_cents)}')
 
 match_rate = (total_adj_in_temm / total_adjusted * 100)
 print(f'\n📈 Overall Match Rate: {match_rate:.2f}%')
@@ -272,7 +284,7 @@ if match_rate < 5:
     print('   ⚠️  LUIS PATTERN CONFIRMED FOR ALL MONTHS!')
     print('   TEMM file appears to be PRE-FILTERED by Telefónica')
     print('   They removed most adjusted/successful transactions')
-    print(f'   Real discrepancy: ${total_missing_usd:,.2f} (transactions missing from our system)')
+    print(f'   Real discrepancy: ${format_usd(total_missing_cents)} (transactions missing from our system)')
 else:
     print('   Pattern does not match Luis findings - further investigation needed')
 
@@ -5,6 +5,7 @@ Uses multiple matching strategies:
 1. Vendor Transaction ID
 2. Phone + Amount + Date
 3. Phone + Amount (looser match)
+4. Phone + Date + Amount adjusted by a known factor (16% IVA, ...)
 """
 
 import pandas as pd
@@ -13,6 +14,16 @@ from datetime import datetime, timedelta
 import glob
 import numpy as np
 
+from reconciliation.artifacts import output_format, write_artifact
+from reconciliation.money import to_cents, total_cents, format_usd
+from reconciliation.matching import (
+    AMOUNT_ADJUSTMENTS, normalize_phones, first_match, first_match_within_days, first_match_amount_band
+)
+from reconciliation.pgextract import extracted_files
+from reconciliation.state import MatchState
+from reconciliation.rules import RuleTable
+from reconciliation.partition import SpillPartitions, match_partitions, partition_count, spill_dir, remove_spill_dir
+
 print("=" * 80)
 print("🔍 ENHANCED OPERATOR TRANSACTION RECONCILIATION")
 print("=" * 80)
@@ -21,6 +32,18 @@ print("=" * 80)
 OPERATOR_FILE_1 = "/Users/richardmas/Desktop/Operator_Transactions202309_202312.csv"
 OPERATOR_FILE_2 = "/Users/richardmas/Desktop/Operator_Transactions_NoSoporteActual_202309_202412.csv"
 COMPANY_RECORDS_DIR = "/Users/richardmas/Downloads/Excel Workings"
+# Parquet slices from extract_company_transactions.py replace the workbooks when set
+COMPANY_DB_DIR = os.environ.get('RECON_COMPANY_DB_DIR')
+OUTPUT_FORMAT = output_format()  # csv | parquet | both (RECON_OUTPUT_FORMAT)
+MATCH_PARTITIONS = partition_count()  # phone/TX-hash partitions (RECON_MATCH_PARTITIONS, 0 = in memory)
+# (name, factor, tolerance cents) tried by strategy 4: company amount = claim amount x factor
+AMOUNT_BANDS = AMOUNT_ADJUSTMENTS
+# Claim after all strategies -> category (first match wins; matched with another status -> MATCHED_OTHER)
+DISPUTE_RULES = (
+    ('NOT_FOUND', {'MATCH_STRATEGY': None}),
+    ('SUCCESSFUL', {'STATUS': 'Success'}),
+    ('FAILED', {'STATUS': 'Fail'}),
+)
 
 # ============================================
 # STEP 1: Load Operator Claims
@@ -48,8 +71,9 @@ if 'SEC_ACTUACION' in op2.columns:
 
 # Combine
 operator_claims = pd.concat([op1, op2], ignore_index=True)
+operator_claims['AMOUNT_CENTS'] = to_cents(operator_claims['AMOUNT'])
 print(f"\n📊 Total operator claims: {len(operator_claims):,} transactions")
-print(f"   Total USD: ${operator_claims['AMOUNT'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(total_cents(operator_claims['AMOUNT_CENTS']))}")
 
 # Parse operator dates
 operator_claims['DATE'] = pd.to_datetime(operator_claims['DATE'], errors='coerce', format='%d/%m/%Y')
@@ -59,85 +83,93 @@ operator_claims['DATE'] = pd.to_datetime(operator_claims['DATE'], errors='coerce
 # ============================================
 print("\n📂 Loading company records (this may take a minute)...")
 
-all_records = []
-
-# Load 2023 Excel
-for file in glob.glob(f"{COMPANY_RECORDS_DIR}/2023/*.xlsx"):
-    if '~$' not in file:
-        df = pd.read_excel(file)
-        all_records.append(df)
-
-# Load 2024 Excel
-for file in glob.glob(f"{COMPANY_RECORDS_DIR}/2024/*.xlsx"):
-    if '~$' not in file:
-        df = pd.read_excel(file)
-        all_records.append(df)
-
-company_df = pd.concat(all_records, ignore_index=True)
-print(f"   ✅ Loaded {len(company_df):,} company records")
-
-# Filter to dispute period
-company_df['DATETIME'] = pd.to_datetime(company_df['DATETIME'], errors='coerce', utc=True)
-company_df['DATETIME'] = company_df['DATETIME'].dt.tz_localize(None)
-company_df['DATE'] = company_df['DATETIME'].dt.date
-
 start_date = pd.to_datetime('2023-09-01').date()
 end_date = pd.to_datetime('2024-12-31').date()
 
-company_df = company_df[
-    (company_df['DATE'] >= start_date) &
-    (company_df['DATE'] <= end_date)
-].copy()
 
-print(f"   ✅ Filtered to dispute period: {len(company_df):,} transactions")
+def prepare_company(df):
+    """Filter company records to the dispute period and clean the matching columns"""
+    df['DATETIME'] = pd.to_datetime(df['DATETIME'], errors='coerce', utc=True)
+    df['DATETIME'] = df['DATETIME'].dt.tz_localize(None)
+    df['DATE'] = df['DATETIME'].dt.date
+
+    df = df[
+        (df['DATE'] >= start_date) &
+        (df['DATE'] <= end_date)
+    ].copy()
+
+    df['PHONE_CLEAN'] = normalize_phones(df['MSISDN'])
+    df['AMOUNT_CENTS'] = to_cents(df['AMOUNT'])
+    df['AMOUNT'] = df['AMOUNT'].round(2)
+    df['TX_ID_CLEAN'] = df['VENDOR_TRANSACTION_ID'].astype(str).str.strip().str.upper()
+    return df
+
+
+def company_match_frame(df):
+    """The company columns the strategies read (keys + fields copied onto claims)"""
+    frame = df[['TX_ID_CLEAN', 'PHONE_CLEAN', 'AMOUNT_CENTS', 'STATUS', 'TRANSACTION_ID']].copy()
+    frame['DAY'] = df['DATETIME'].dt.normalize()
+    for col in ['RESPONSE_MESSAGE', 'VENDOR_RESPONSE_MESSAGE']:
+        frame[col] = df[col] if col in df.columns else ''
+    return frame
+
+
+if COMPANY_DB_DIR:
+    company_files = extracted_files(COMPANY_DB_DIR)
+    read_company = pd.read_parquet
+    print(f"   Reading {len(company_files)} Postgres extract slices from {COMPANY_DB_DIR}")
+else:
+    company_files = [
+        file
+        for year in ('2023', '2024')
+        for file in glob.glob(f"{COMPANY_RECORDS_DIR}/{year}/*.xlsx")
+        if '~$' not in file
+    ]
+    read_company = pd.read_excel
+
+if MATCH_PARTITIONS > 0:
+    # Out-of-core: each workbook is prepared and spilled by TX id and by phone
+    # hash as soon as it is read, so the full company history is never in memory
+    match_spill_dir = spill_dir()
+    company_sides = {
+        'TX_ID_CLEAN': SpillPartitions(match_spill_dir, 'company_by_tx', MATCH_PARTITIONS),
+        'PHONE_CLEAN': SpillPartitions(match_spill_dir, 'company_by_phone', MATCH_PARTITIONS),
+    }
+    loaded_count = 0
+    for file in company_files:
+        df = read_company(file)
+        loaded_count += len(df)
+        df = company_match_frame(prepare_company(df))
+        for key, side in company_sides.items():
+            side.append(df, df[key])
+    company_count = company_sides['TX_ID_CLEAN'].rows
+    print(f"   ✅ Loaded {loaded_count:,} company records")
+else:
+    company_df = pd.concat([read_company(file) for file in company_files], ignore_index=True)
+    print(f"   ✅ Loaded {len(company_df):,} company records")
+    company = company_match_frame(prepare_company(company_df))
+    del company_df
+    company_sides = {'TX_ID_CLEAN': company, 'PHONE_CLEAN': company}
+    company_count = len(company)
+
+print(f"   ✅ Filtered to dispute period: {company_count:,} transactions")
 
 # ============================================
 # STEP 3: Prepare Matching Keys
 # ============================================
 print("\n🔧 Preparing data for matching...")
 
-# Clean phone numbers
-def clean_phone(phone):
-    if pd.isna(phone):
-        return ''
-    phone_str = str(phone).strip()
-    phone_str = phone_str.replace('+52', '').replace('52', '', 1)
-    phone_str = phone_str.replace(' ', '').replace('-', '').replace('+', '')
-    return phone_str[-10:] if len(phone_str) >= 10 else phone_str
-
-operator_claims['PHONE_CLEAN'] = operator_claims['MSISDN'].apply(clean_phone)
-company_df['PHONE_CLEAN'] = company_df['MSISDN'].apply(clean_phone)
+# Clean phone numbers (company side is cleaned in prepare_company)
+operator_claims['PHONE_CLEAN'] = normalize_phones(operator_claims['MSISDN'])
 
 # Round amounts to 2 decimals
 operator_claims['AMOUNT'] = operator_claims['AMOUNT'].round(2)
-company_df['AMOUNT'] = company_df['AMOUNT'].round(2)
 
 # Clean transaction IDs
 operator_claims['TX_ID_CLEAN'] = operator_claims['VENDOR_TRANSACTION_ID'].astype(str).str.strip().str.upper()
-company_df['TX_ID_CLEAN'] = company_df['VENDOR_TRANSACTION_ID'].astype(str).str.strip().str.upper()
 
-# Create composite keys
-operator_claims['KEY_PHONE_AMOUNT_DATE'] = (
-    operator_claims['PHONE_CLEAN'] + '_' +
-    operator_claims['AMOUNT'].astype(str) + '_' +
-    operator_claims['DATE'].astype(str)
-)
-
-company_df['KEY_PHONE_AMOUNT_DATE'] = (
-    company_df['PHONE_CLEAN'] + '_' +
-    company_df['AMOUNT'].astype(str) + '_' +
-    company_df['DATE'].astype(str)
-)
-
-operator_claims['KEY_PHONE_AMOUNT'] = (
-    operator_claims['PHONE_CLEAN'] + '_' +
-    operator_claims['AMOUNT'].astype(str)
-)
-
-company_df['KEY_PHONE_AMOUNT'] = (
-    company_df['PHONE_CLEAN'] + '_' +
-    company_df['AMOUNT'].astype(str)
-)
+# Composite keys are (PHONE_CLEAN, AMOUNT_CENTS[, day]) column tuples - amounts
+# compare as integer cents, not as formatted float strings
 
 print("   ✅ Data prepared")
 
@@ -152,77 +184,115 @@ results['STATUS'] = None
 results['RESPONSE_MESSAGE'] = None
 results['VENDOR_RESPONSE_MESSAGE'] = None
 results['COMPANY_TX_ID'] = None
-
-# Strategy 1: Match by Transaction ID
-print("\n   Strategy 1: Transaction ID matching...")
-tx_id_matches = results[results['TX_ID_CLEAN'].isin(company_df['TX_ID_CLEAN'])]
-for idx in tx_id_matches.index:
-    tx_id = results.loc[idx, 'TX_ID_CLEAN']
-    match = company_df[company_df['TX_ID_CLEAN'] == tx_id].iloc[0]
-    results.loc[idx, 'MATCH_STRATEGY'] = 'TX_ID'
-    results.loc[idx, 'STATUS'] = match['STATUS']
-    results.loc[idx, 'RESPONSE_MESSAGE'] = match.get('RESPONSE_MESSAGE', '')
-    results.loc[idx, 'VENDOR_RESPONSE_MESSAGE'] = match.get('VENDOR_RESPONSE_MESSAGE', '')
-    results.loc[idx, 'COMPANY_TX_ID'] = match['TRANSACTION_ID']
-
-print(f"      ✅ Matched: {len(tx_id_matches):,} transactions")
-
-# Strategy 2: Match by Phone + Amount + Date (for unmatched)
-print("\n   Strategy 2: Phone + Amount + Date matching...")
-unmatched = results[results['MATCH_STRATEGY'].isna()]
-phone_amount_date_matches = unmatched[unmatched['KEY_PHONE_AMOUNT_DATE'].isin(company_df['KEY_PHONE_AMOUNT_DATE'])]
-
-for idx in phone_amount_date_matches.index:
-    key = results.loc[idx, 'KEY_PHONE_AMOUNT_DATE']
-    matches = company_df[company_df['KEY_PHONE_AMOUNT_DATE'] == key]
-    if len(matches) > 0:
-        match = matches.iloc[0]  # Take first match
-        results.loc[idx, 'MATCH_STRATEGY'] = 'PHONE_AMOUNT_DATE'
-        results.loc[idx, 'STATUS'] = match['STATUS']
-        results.loc[idx, 'RESPONSE_MESSAGE'] = match.get('RESPONSE_MESSAGE', '')
-        results.loc[idx, 'VENDOR_RESPONSE_MESSAGE'] = match.get('VENDOR_RESPONSE_MESSAGE', '')
-        results.loc[idx, 'COMPANY_TX_ID'] = match['TRANSACTION_ID']
-
-print(f"      ✅ Matched: {len(phone_amount_date_matches):,} transactions")
-
-# Strategy 3: Match by Phone + Amount (within 3 days, for unmatched)
-print("\n   Strategy 3: Phone + Amount (±3 days) matching...")
-unmatched = results[results['MATCH_STRATEGY'].isna()]
-phone_amount_matches = unmatched[unmatched['KEY_PHONE_AMOUNT'].isin(company_df['KEY_PHONE_AMOUNT'])]
-
-matched_count = 0
-for idx in phone_amount_matches.index:
-    key = results.loc[idx, 'KEY_PHONE_AMOUNT']
-    op_date = results.loc[idx, 'DATE']
-
-    # Find matches within ±3 days
-    matches = company_df[company_df['KEY_PHONE_AMOUNT'] == key]
-
-    for _, match in matches.iterrows():
-        company_date = match['DATE']
-        if pd.notna(op_date) and pd.notna(company_date):
-            date_diff = abs((op_date - pd.to_datetime(company_date)).days)
-            if date_diff <= 3:
-                results.loc[idx, 'MATCH_STRATEGY'] = f'PHONE_AMOUNT_±{date_diff}d'
-                results.loc[idx, 'STATUS'] = match['STATUS']
-                results.loc[idx, 'RESPONSE_MESSAGE'] = match.get('RESPONSE_MESSAGE', '')
-                results.loc[idx, 'VENDOR_RESPONSE_MESSAGE'] = match.get('VENDOR_RESPONSE_MESSAGE', '')
-                results.loc[idx, 'COMPANY_TX_ID'] = match['TRANSACTION_ID']
-                matched_count += 1
-                break
-
-print(f"      ✅ Matched: {matched_count:,} transactions")
+results['CLAIM_ROW'] = np.arange(len(results))
+
+CLAIM_MATCH_COLUMNS = ['CLAIM_ROW', 'TX_ID_CLEAN', 'PHONE_CLEAN', 'AMOUNT_CENTS', 'DATE']
+MATCH_FIELDS = ['MATCH_STRATEGY', 'STATUS', 'RESPONSE_MESSAGE', 'VENDOR_RESPONSE_MESSAGE', 'COMPANY_TX_ID']
+# Match keys sliced once; strategies take the rows the claim bitmap still has open
+claim_keys = results[CLAIM_MATCH_COLUMNS]
+# A company row may explain several claims, so only the claim side is tracked
+claim_state = MatchState(results['CLAIM_ROW'])
+
+
+def matched_rows(claims, company, positions, strategy):
+    """Claim rows with a company match (position >= 0) and the fields copied from it"""
+    hit = positions >= 0
+    picked = company.iloc[positions[hit]]
+    if not isinstance(strategy, str):
+        strategy = np.asarray(strategy, dtype=object)[hit]
+    return pd.DataFrame({
+        'CLAIM_ROW': claims['CLAIM_ROW'].to_numpy()[hit],
+        'MATCH_STRATEGY': strategy,
+        'STATUS': picked['STATUS'].to_numpy(),
+        'RESPONSE_MESSAGE': picked['RESPONSE_MESSAGE'].to_numpy(),
+        'VENDOR_RESPONSE_MESSAGE': picked['VENDOR_RESPONSE_MESSAGE'].to_numpy(),
+        'COMPANY_TX_ID': picked['TRANSACTION_ID'].to_numpy(),
+    }, columns=['CLAIM_ROW'] + MATCH_FIELDS)
+
+
+def tx_id_match(claims, company):
+    positions = first_match(claims['TX_ID_CLEAN'], company['TX_ID_CLEAN'])
+    return matched_rows(claims, company, positions, 'TX_ID')
+
+
+def phone_amount_date_match(claims, company):
+    positions = first_match(claims[['PHONE_CLEAN', 'AMOUNT_CENTS', 'DATE']],
+                            company[['PHONE_CLEAN', 'AMOUNT_CENTS', 'DAY']])
+    return matched_rows(claims, company, positions, 'PHONE_AMOUNT_DATE')
+
+
+def phone_amount_window_match(claims, company):
+    positions, days = first_match_within_days(
+        claims[['PHONE_CLEAN', 'AMOUNT_CENTS']], claims['DATE'],
+        company[['PHONE_CLEAN', 'AMOUNT_CENTS']], company['DAY'], max_days=3
+    )
+    return matched_rows(claims, company, positions, [f'PHONE_AMOUNT_±{d}d' for d in days])
+
+
+def phone_amount_band_match(claims, company):
+    positions, adjustment = first_match_amount_band(
+        claims[['PHONE_CLEAN', 'DATE']], claims['AMOUNT_CENTS'],
+        company[['PHONE_CLEAN', 'DAY']], company['AMOUNT_CENTS'], AMOUNT_BANDS
+    )
+    names = [name for name, _, _ in AMOUNT_BANDS]
+    return matched_rows(claims, company, positions, [f'PHONE_DATE_AMOUNT_{names[a]}' if a >= 0 else None
+                                                     for a in adjustment])
+
+
+def run_strategy(match_fn, key):
+    """Run one strategy over the still-unmatched claims (partition by partition if enabled)"""
+    pending = claim_keys.take(claim_state.pending_left())
+    company_side = company_sides[key]
+    if MATCH_PARTITIONS > 0:
+        claim_side = SpillPartitions(match_spill_dir, f'claims_{match_fn.__name__}', MATCH_PARTITIONS)
+        claim_side.append(pending, pending[key])
+        found = match_partitions(claim_side, company_side, match_fn, sort_by='CLAIM_ROW')
+    else:
+        found = match_fn(pending, company_side)
+
+    rows = found['CLAIM_ROW'].to_numpy(dtype=np.int64)
+    for col in MATCH_FIELDS:
+        results.loc[rows, col] = found[col].to_numpy()
+    return claim_state.mark(rows)
+
+
+try:
+    # Strategy 1: Match by Transaction ID
+    print("\n   Strategy 1: Transaction ID matching...")
+    matched_count = run_strategy(tx_id_match, 'TX_ID_CLEAN')
+    print(f"      ✅ Matched: {matched_count:,} transactions")
+
+    # Strategy 2: Match by Phone + Amount + Date (for unmatched)
+    print("\n   Strategy 2: Phone + Amount + Date matching...")
+    matched_count = run_strategy(phone_amount_date_match, 'PHONE_CLEAN')
+    print(f"      ✅ Matched: {matched_count:,} transactions")
+
+    # Strategy 3: Match by Phone + Amount (within 3 days, for unmatched)
+    print("\n   Strategy 3: Phone + Amount (±3 days) matching...")
+    matched_count = run_strategy(phone_amount_window_match, 'PHONE_CLEAN')
+    print(f"      ✅ Matched: {matched_count:,} transactions")
+
+    # Strategy 4: Match by Phone + Date + adjusted Amount (all factors in one join, for unmatched)
+    print(f"\n   Strategy 4: Phone + Date + adjusted Amount ({', '.join(name for name, _, _ in AMOUNT_BANDS)})...")
+    matched_count = run_strategy(phone_amount_band_match, 'PHONE_CLEAN')
+    print(f"      ✅ Matched: {matched_count:,} transactions")
+finally:
+    if MATCH_PARTITIONS > 0:
+        remove_spill_dir(match_spill_dir)
+
+results = results.drop(columns=['CLAIM_ROW'])
 
 # ============================================
 # STEP 5: Categorize Results
 # ============================================
 print("\n📊 Categorizing results...")
 
-matched = results[results['MATCH_STRATEGY'].notna()]
-not_found = results[results['MATCH_STRATEGY'].isna()]
-
-successful = matched[matched['STATUS'] == 'Success']
-failed = matched[matched['STATUS'] == 'Fail']
+# Every claim gets its category in one pass; the frames come from one groupby
+dispute_rules = RuleTable(DISPUTE_RULES, default='MATCHED_OTHER')
+dispute_category = dispute_rules.assign(results)
+categories = dispute_rules.split(results, dispute_category)
+successful, failed, not_found = categories['SUCCESSFUL'], categories['FAILED'], categories['NOT_FOUND']
+matched = results[dispute_category != 'NOT_FOUND']
 
 # ============================================
 # STEP 6: Enhanced Report
@@ -233,11 +303,11 @@ print("=" * 80)
 
 print(f"\n🔢 OPERATOR CLAIMS:")
 print(f"   Total transactions: {len(operator_claims):,}")
-print(f"   Total USD claimed: ${operator_claims['AMOUNT'].sum():,.2f}")
+print(f"   Total USD claimed: ${format_usd(total_cents(operator_claims['AMOUNT_CENTS']))}")
 
 print(f"\n✅ TOTAL MATCHED IN YOUR RECORDS:")
 print(f"   Transactions: {len(matched):,}")
-print(f"   Total USD: ${matched['AMOUNT'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(total_cents(matched['AMOUNT_CENTS']))}")
 
 print(f"\n   Breakdown by matching strategy:")
 for strategy in matched['MATCH_STRATEGY'].value_counts().head(10).items():
@@ -245,11 +315,11 @@ for strategy in matched['MATCH_STRATEGY'].value_counts().head(10).items():
 
 print(f"\n✅ VERIFIED SUCCESSFUL (You likely owe these):")
 print(f"   Transactions: {len(successful):,}")
-print(f"   Total USD: ${successful['AMOUNT'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(total_cents(successful['AMOUNT_CENTS']))}")
 
 print(f"\n❌ DISPUTED - FAILED IN YOUR RECORDS (You DON'T owe these):")
 print(f"   Transactions: {len(failed):,}")
-print(f"   Total USD: ${failed['AMOUNT'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(total_cents(failed['AMOUNT_CENTS']))}")
 
 if len(failed) > 0:
     print(f"\n   Top failure reasons:")
@@ -258,23 +328,23 @@ if len(failed) > 0:
 
 print(f"\n⚠️  STILL NOT FOUND IN YOUR RECORDS:")
 print(f"   Transactions: {len(not_found):,}")
-print(f"   Total USD: ${not_found['AMOUNT'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(total_cents(not_found['AMOUNT_CENTS']))}")
 
-# Calculate final numbers
-legit_amount = successful['AMOUNT'].sum()
-disputed_failed = failed['AMOUNT'].sum()
-disputed_not_found = not_found['AMOUNT'].sum()
+# Calculate final numbers (exact, in cents)
+legit_amount = total_cents(successful['AMOUNT_CENTS'])
+disputed_failed = total_cents(failed['AMOUNT_CENTS'])
+disputed_not_found = total_cents(not_found['AMOUNT_CENTS'])
 total_disputed = disputed_failed + disputed_not_found
 
 print(f"\n💰 BOTTOM LINE:")
-print(f"   Operator claims:        ${operator_claims['AMOUNT'].sum():,.2f}")
-print(f"   Verified successful:    ${legit_amount:,.2f}")
-print(f"   Disputed (Failed):      ${disputed_failed:,.2f}")
-print(f"   Disputed (Not Found):   ${disputed_not_found:,.2f}")
-print(f"   Total Disputed:         ${total_disputed:,.2f}")
+print(f"   Operator claims:        ${format_usd(total_cents(operator_claims['AMOUNT_CENTS']))}")
+print(f"   Verified successful:    ${format_usd(legit_amount)}")
+print(f"   Disputed (Failed):      ${format_usd(disputed_failed)}")
+print(f"   Disputed (Not Found):   ${format_usd(disputed_not_found)}")
+print(f"   Total Disputed:         ${format_usd(total_disputed)}")
 print(f"   ───────────────────────────────────────")
-print(f"   YOU LIKELY OWE:         ${legit_amount:,.2f}")
-print(f"   SAVINGS FROM DISPUTE:   ${total_disputed:,.2f}")
+print(f"   YOU LIKELY OWE:         ${format_usd(legit_amount)}")
+print(f"   SAVINGS FROM DISPUTE:   ${format_usd(total_disputed)}")
 
 # ============================================
 # STEP 7: Save Enhanced Reports
@@ -287,28 +357,28 @@ timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
 # Save all results
 results_file = f"{output_dir}/ENHANCED_ALL_RESULTS_{timestamp}.csv"
-results[['VENDOR_TRANSACTION_ID', 'MSISDN', 'PHONE_CLEAN', 'AMOUNT', 'DATE',
-         'MATCH_STRATEGY', 'STATUS', 'RESPONSE_MESSAGE', 'VENDOR_RESPONSE_MESSAGE',
-         'COMPANY_TX_ID']].to_csv(results_file, index=False)
-print(f"   ✅ All results: {results_file}")
+saved = write_artifact(results[['VENDOR_TRANSACTION_ID', 'MSISDN', 'PHONE_CLEAN', 'AMOUNT', 'DATE',
+                                'MATCH_STRATEGY', 'STATUS', 'RESPONSE_MESSAGE', 'VENDOR_RESPONSE_MESSAGE',
+                                'COMPANY_TX_ID']], results_file, OUTPUT_FORMAT)
+print(f"   ✅ All results: {', '.join(saved)}")
 
 # Save successful
 if len(successful) > 0:
     success_file = f"{output_dir}/ENHANCED_SUCCESSFUL_{timestamp}.csv"
-    successful.to_csv(success_file, index=False)
-    print(f"   ✅ Successful: {success_file}")
+    saved = write_artifact(successful, success_file, OUTPUT_FORMAT)
+    print(f"   ✅ Successful: {', '.join(saved)}")
 
 # Save failed
 if len(failed) > 0:
     failed_file = f"{output_dir}/ENHANCED_FAILED_{timestamp}.csv"
-    failed.to_csv(failed_file, index=False)
-    print(f"   ✅ Failed: {failed_file}")
+    saved = write_artifact(failed, failed_file, OUTPUT_FORMAT)
+    print(f"   ✅ Failed: {', '.join(saved)}")
 
 # Save not found
 if len(not_found) > 0:
     not_found_file = f"{output_dir}/ENHANCED_NOT_FOUND_{timestamp}.csv"
-    not_found.to_csv(not_found_file, index=False)
-    print(f"   ✅ Not Found: {not_found_file}")
+    saved = write_artifact(not_found, not_found_file, OUTPUT_FORMAT)
+    print(f"   ✅ Not Found: {', '.join(saved)}")
 
 # Summary
 summary_file = f"{output_dir}/ENHANCED_SUMMARY_{timestamp}.txt"
@@ -317,15 +387,15 @@ with open(summary_file, 'w') as f:
     f.write("=" * 80 + "\n\n")
     f.write(f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     f.write(f"Period: September 2023 - December 2024\n\n")
-    f.write(f"OPERATOR CLAIMS: ${operator_claims['AMOUNT'].sum():,.2f} ({len(operator_claims):,} txs)\n\n")
+    f.write(f"OPERATOR CLAIMS: ${format_usd(total_cents(operator_claims['AMOUNT_CENTS']))} ({len(operator_claims):,} txs)\n\n")
     f.write(f"MATCHED IN YOUR RECORDS: {len(matched):,} transactions\n")
-    f.write(f"  - Successful: {len(successful):,} (${successful['AMOUNT'].sum():,.2f})\n")
-    f.write(f"  - Failed: {len(failed):,} (${failed['AMOUNT'].sum():,.2f})\n\n")
-    f.write(f"NOT FOUND: {len(not_found):,} transactions (${not_found['AMOUNT'].sum():,.2f})\n\n")
+    f.write(f"  - Successful: {len(successful):,} (${format_usd(total_cents(successful['AMOUNT_CENTS']))})\n")
+    f.write(f"  - Failed: {len(failed):,} (${format_usd(total_cents(failed['AMOUNT_CENTS']))})\n\n")
+    f.write(f"NOT FOUND: {len(not_found):,} transactions (${format_usd(total_cents(not_found['AMOUNT_CENTS']))})\n\n")
     f.write(f"BOTTOM LINE:\n")
-    f.write(f"  You likely owe: ${legit_amount:,.2f}\n")
-    f.write(f"  Total disputed: ${total_disputed:,.2f}\n")
-    f.write(f"  Potential savings: ${total_disputed:,.2f}\n")
+    f.write(f"  You likely owe: ${format_usd(legit_amount)}\n")
+    f.write(f"  Total disputed: ${format_usd(total_disputed)}\n")
+    f.write(f"  Potential savings: ${format_usd(total_disputed)}\n")
 
 print(f"   ✅ Summary: {summary_file}")
 
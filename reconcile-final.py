@@ -9,6 +9,10 @@ import os
 from datetime import datetime
 import glob
 
+from reconciliation.catalog import DatasetCatalog
+from reconciliation.dates import parse_dates
+from reconciliation.money import cents_to_usd, format_usd, to_cents, total_cents
+
 print("=" * 80)
 print("🔍 FINAL OPERATOR TRANSACTION RECONCILIATION")
 print("=" * 80)
@@ -28,7 +32,7 @@ op1.rename(columns={'TransactionID': 'VENDOR_TRANSACTION_ID',
                     'FECHA': 'DATE_RAW'}, inplace=True)
 
 # Parse date format 1: YYYYMMDD (numeric)
-op1['DATE'] = pd.to_datetime(op1['DATE_RAW'], format='%Y%m%d', errors='coerce')
+op1['DATE'] = parse_dates(op1['DATE_RAW'], formats=['%Y%m%d'], infer=False)
 
 # Standardize file 2
 op2.rename(columns={'SEC_ACTUACION': 'VENDOR_TRANSACTION_ID',
@@ -37,13 +41,16 @@ op2.rename(columns={'SEC_ACTUACION': 'VENDOR_TRANSACTION_ID',
                     'FECHA': 'DATE_RAW'}, inplace=True)
 
 # Parse date format 2: DD/MM/YYYY (text)
-op2['DATE'] = pd.to_datetime(op2['DATE_RAW'], format='%d/%m/%Y', errors='coerce')
+op2['DATE'] = parse_dates(op2['DATE_RAW'], formats=['%d/%m/%Y'], infer=False)
 
 # Combine
 operator_claims = pd.concat([op1, op2], ignore_index=True)
+# Claimed amounts as integer cents; every USD total below is an exact sum of these
+operator_claims['CENTS'] = to_cents(operator_claims['AMOUNT'])
+claimed_cents = total_cents(operator_claims['CENTS'])
 
 print(f"   ✅ Total claims: {len(operator_claims):,} transactions")
-print(f"   Total USD: ${operator_claims['AMOUNT'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(claimed_cents)}")
 print(f"   Dates parsed: {operator_claims['DATE'].notna().sum():,}")
 print(f"   Missing dates: {operator_claims['DATE'].isna().sum():,}")
 
@@ -57,30 +64,28 @@ operator_claims['YEAR_MONTH'] = operator_claims['DATE'].dt.to_period('M')
 # ============================================
 print("\n📂 Loading company records...")
 
-all_records = []
-for file in glob.glob(f"{os.path.expanduser('~')}/Downloads/Excel Workings/2023/*.xlsx"):
-    if '~$' not in file:
-        all_records.append(pd.read_excel(file))
-
-for file in glob.glob(f"{os.path.expanduser('~')}/Downloads/Excel Workings/2024/*.xlsx"):
-    if '~$' not in file:
-        all_records.append(pd.read_excel(file))
+# Dispute period (whole days): files outside it are skipped by the catalog and
+# rows outside it are dropped while each file is read
+start_date = pd.to_datetime('2023-09-01')
+end_date = pd.to_datetime('2024-12-31')  # inclusive: read_period keeps all of Dec 31
+catalog = DatasetCatalog()
+
+company_files = [
+    file
+    for year in ('2023', '2024')
+    for file in glob.glob(f"{os.path.expanduser('~')}/Downloads/Excel Workings/{year}/*.xlsx")
+    if '~$' not in file
+]
+company_files, skipped_files = catalog.select(company_files, start_date, end_date)
+if skipped_files:
+    print(f"   Skipped {len(skipped_files)} file(s) outside the dispute period")
+
+all_records = [catalog.read_period(file, 'DATETIME', start_date, end_date) for file in company_files]
+catalog.save()
 
 company_df = pd.concat(all_records, ignore_index=True)
-
-# Filter to dispute period
-company_df['DATETIME'] = pd.to_datetime(company_df['DATETIME'], errors='coerce', utc=True)
-company_df['DATETIME'] = company_df['DATETIME'].dt.tz_localize(None)
 company_df['DATE'] = company_df['DATETIME'].dt.date
 
-start_date = pd.to_datetime('2023-09-01').date()
-end_date = pd.to_datetime('2024-12-31').date()
-
-company_df = company_df[
-    (company_df['DATE'] >= start_date) &
-    (company_df['DATE'] <= end_date)
-].copy()
-
 print(f"   ✅ Loaded {len(company_df):,} records in dispute period")
 
 # ============================================
@@ -140,20 +145,20 @@ if len(not_found_with_dates) > 0:
 
     for year in sorted(not_found_with_dates['YEAR'].dropna().unique()):
         count = len(not_found_with_dates[not_found_with_dates['YEAR'] == year])
-        total = not_found_with_dates[not_found_with_dates['YEAR'] == year]['AMOUNT_OPERATOR'].sum()
+        total = total_cents(not_found_with_dates[not_found_with_dates['YEAR'] == year]['CENTS'])
         pct = (count / len(not_found_with_dates)) * 100
-        print(f"   {int(year)}: {count:>10,} transactions (${total:>12,.2f}) - {pct:>5.1f}%")
+        print(f"   {int(year)}: {count:>10,} transactions (${format_usd(total):>12}) - {pct:>5.1f}%")
 
     print("\n📊 TOP 10 MONTHS:")
     month_breakdown = not_found_with_dates.groupby('YEAR_MONTH').agg({
-        'AMOUNT_OPERATOR': ['count', 'sum']
+        'AMOUNT_OPERATOR': ['count'], 'CENTS': ['sum']
     }).sort_values(by=('AMOUNT_OPERATOR', 'count'), ascending=False)
 
     for idx, (period, data) in enumerate(month_breakdown.head(10).iterrows(), 1):
         count = int(data[('AMOUNT_OPERATOR', 'count')])
-        total = data[('AMOUNT_OPERATOR', 'sum')]
+        total = data[('CENTS', 'sum')]
         pct = (count / len(not_found_with_dates)) * 100
-        print(f"   {idx:2}. {str(period)}: {count:>8,} transactions (${total:>12,.2f}) - {pct:>5.1f}%")
+        print(f"   {idx:2}. {str(period)}: {count:>8,} transactions (${format_usd(total):>12}) - {pct:>5.1f}%")
 
 # ============================================
 # FINAL REPORT
@@ -162,17 +167,21 @@ print("\n" + "=" * 80)
 print("📋 FINAL RECONCILIATION REPORT")
 print("=" * 80)
 
+successful_cents = total_cents(successful['CENTS'])
+failed_cents = total_cents(failed['CENTS'])
+not_found_cents = total_cents(not_found['CENTS'])
+
 print(f"\n🔢 OPERATOR CLAIMS:")
 print(f"   Total transactions: {len(operator_claims):,}")
-print(f"   Total USD: ${operator_claims['AMOUNT'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(claimed_cents)}")
 
 print(f"\n✅ VERIFIED SUCCESSFUL (You likely owe):")
 print(f"   Transactions: {len(successful):,}")
-print(f"   Total USD: ${successful['AMOUNT_OPERATOR'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(successful_cents)}")
 
 print(f"\n❌ DISPUTED - FAILED:")
 print(f"   Transactions: {len(failed):,}")
-print(f"   Total USD: ${failed['AMOUNT_OPERATOR'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(failed_cents)}")
 if len(failed) > 0:
     print(f"\n   Failure reasons:")
     for reason, count in failed['VENDOR_RESPONSE_MESSAGE'].value_counts().head(3).items():
@@ -180,7 +189,7 @@ if len(failed) > 0:
 
 print(f"\n⚠️  NOT FOUND:")
 print(f"   Transactions: {len(not_found):,}")
-print(f"   Total USD: ${not_found['AMOUNT_OPERATOR'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(not_found_cents)}")
 
 # Most problematic period
 if len(not_found_with_dates) > 0:
@@ -190,10 +199,10 @@ if len(not_found_with_dates) > 0:
     print(f"      {top_month_count:,} missing transactions ({top_month_count/len(not_found_with_dates)*100:.1f}%)")
 
 print(f"\n💰 BOTTOM LINE:")
-print(f"   Operator claims:     ${operator_claims['AMOUNT'].sum():,.2f}")
-print(f"   You likely owe:      ${successful['AMOUNT_OPERATOR'].sum():,.2f}")
-print(f"   Total disputed:      ${failed['AMOUNT_OPERATOR'].sum() + not_found['AMOUNT_OPERATOR'].sum():,.2f}")
-print(f"   Potential savings:   ${failed['AMOUNT_OPERATOR'].sum() + not_found['AMOUNT_OPERATOR'].sum():,.2f}")
+print(f"   Operator claims:     ${format_usd(claimed_cents)}")
+print(f"   You likely owe:      ${format_usd(successful_cents)}")
+print(f"   Total disputed:      ${format_usd(failed_cents + not_found_cents)}")
+print(f"   Potential savings:   ${format_usd(failed_cents + not_found_cents)}")
 
 # ============================================
 # Save Reports
@@ -209,6 +218,7 @@ if len(not_found_with_dates) > 0:
         'AMOUNT_OPERATOR': ['count', 'sum', 'mean', 'min', 'max']
     }).round(2)
     temporal_summary.columns = ['COUNT', 'TOTAL_USD', 'AVG_USD', 'MIN_USD', 'MAX_USD']
+    temporal_summary['TOTAL_USD'] = cents_to_usd(not_found_with_dates.groupby('YEAR_MONTH')['CENTS'].sum())
     temporal_summary.to_csv(temporal_file)
     print(f"\n💾 Temporal analysis: {temporal_file}")
 
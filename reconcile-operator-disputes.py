@@ -10,6 +10,12 @@ import os
 from datetime import datetime
 import glob
 
+from reconciliation.artifacts import output_format, write_artifact
+from reconciliation.catalog import DatasetCatalog
+from reconciliation.money import format_usd, to_cents, total_cents
+from reconciliation.progress import Progress
+from reconciliation.rules import RuleTable
+
 print("=" * 80)
 print("🔍 OPERATOR TRANSACTION RECONCILIATION")
 print("=" * 80)
@@ -18,6 +24,13 @@ print("=" * 80)
 OPERATOR_FILE_1 = "/Users/richardmas/Desktop/Operator_Transactions202309_202312.csv"
 OPERATOR_FILE_2 = "/Users/richardmas/Desktop/Operator_Transactions_NoSoporteActual_202309_202412.csv"
 COMPANY_RECORDS_DIR = "/Users/richardmas/Downloads/Excel Workings"
+OUTPUT_FORMAT = output_format()  # csv | parquet | both (RECON_OUTPUT_FORMAT)
+# Company STATUS after the ID join -> category (first match wins; other statuses -> OTHER)
+DISPUTE_RULES = (
+    ('SUCCESSFUL', {'STATUS': 'Success'}),  # you owe these
+    ('FAILED', {'STATUS': 'Fail'}),  # failed in your records
+    ('NOT_FOUND', {'STATUS': None}),  # not in your records
+)
 
 # ============================================
 # STEP 1: Load Operator Claims
@@ -57,67 +70,53 @@ print(f"\n📊 Total operator claims: {len(operator_claims):,} transactions")
 # ============================================
 print("\n📂 Loading company transaction records...")
 
+# Dispute period: files the catalog places outside it are never opened, and
+# rows outside it are dropped while each file is read
+start_date = pd.to_datetime('2023-09-01')
+end_date = pd.to_datetime('2024-12-31')  # inclusive: read_period keeps all of Dec 31
+catalog = DatasetCatalog()
+
 all_company_records = []
 
+
+def load_company_files(pattern):
+    files = [file for file in glob.glob(pattern) if '~$' not in file]  # Skip temp files
+    files, skipped = catalog.select(files, start_date, end_date)
+    for file in skipped:
+        print(f"      Skipping {os.path.basename(file)} (outside dispute period)")
+    with Progress('Company files', total=len(files), unit='files', indent='      ') as progress:
+        for file in files:
+            try:
+                print(f"      Loading {os.path.basename(file)}...", end=' ')
+                df = catalog.read_period(file, 'DATETIME', start_date, end_date)
+                all_company_records.append(df)
+                print(f"✅ {len(df):,} rows in period")
+                progress.update(rows=len(df))
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                progress.update(errors=1)
+
+
 # Load 2023 Excel files
 print("\n   2023 Records (Excel):")
-for file in glob.glob(f"{COMPANY_RECORDS_DIR}/2023/*.xlsx"):
-    if '~$' in file:  # Skip temp files
-        continue
-    try:
-        print(f"      Loading {os.path.basename(file)}...", end=' ')
-        df = pd.read_excel(file)
-        all_company_records.append(df)
-        print(f"✅ {len(df):,} rows")
-    except Exception as e:
-        print(f"❌ Error: {e}")
+load_company_files(f"{COMPANY_RECORDS_DIR}/2023/*.xlsx")
 
 # Load 2024 Excel files
 print("\n   2024 Records (Excel):")
-for file in glob.glob(f"{COMPANY_RECORDS_DIR}/2024/*.xlsx"):
-    if '~$' in file:
-        continue
-    try:
-        print(f"      Loading {os.path.basename(file)}...", end=' ')
-        df = pd.read_excel(file)
-        all_company_records.append(df)
-        print(f"✅ {len(df):,} rows")
-    except Exception as e:
-        print(f"❌ Error: {e}")
-
-# Load 2025 CSV files (for completeness, though dispute is Sept 2023 - Dec 2024)
+load_company_files(f"{COMPANY_RECORDS_DIR}/2024/*.xlsx")
+
+# 2025 CSV files (for completeness; the catalog skips them unless they hold dispute-period rows)
 print("\n   2025 Records (CSV):")
-for file in glob.glob(f"{COMPANY_RECORDS_DIR}/2025/*.csv"):
-    try:
-        print(f"      Loading {os.path.basename(file)}...", end=' ')
-        df = pd.read_csv(file)
-        all_company_records.append(df)
-        print(f"✅ {len(df):,} rows")
-    except Exception as e:
-        print(f"❌ Error: {e}")
-
-# Combine all company records
-print("\n   Combining all records...")
-company_df = pd.concat(all_company_records, ignore_index=True)
-print(f"   ✅ Total company records: {len(company_df):,} transactions")
+load_company_files(f"{COMPANY_RECORDS_DIR}/2025/*.csv")
+catalog.save()
 
 # ============================================
-# STEP 3: Filter to Dispute Period (Sep 2023 - Dec 2024)
+# STEP 3: Combine records in the dispute period (Sep 2023 - Dec 2024)
 # ============================================
-print("\n📅 Filtering to dispute period (Sept 2023 - Dec 2024)...")
+print("\n📅 Combining records in dispute period (Sept 2023 - Dec 2024)...")
 
-# Convert dates (make timezone-naive for comparison)
-company_df['DATETIME'] = pd.to_datetime(company_df['DATETIME'], errors='coerce', utc=True)
-company_df['DATETIME'] = company_df['DATETIME'].dt.tz_localize(None)
-
-# Filter date range
-start_date = pd.to_datetime('2023-09-01')
-end_date = pd.to_datetime('2024-12-31')
-
-company_df_filtered = company_df[
-    (company_df['DATETIME'] >= start_date) &
-    (company_df['DATETIME'] <= end_date)
-]
+# DATETIME was parsed (timezone-naive) and filtered while reading
+company_df_filtered = pd.concat(all_company_records, ignore_index=True)
 
 print(f"   ✅ Filtered to {len(company_df_filtered):,} transactions in dispute period")
 
@@ -152,23 +151,20 @@ matched_by_id = operator_claims.merge(
     how='left',
     suffixes=('_OPERATOR', '_COMPANY')
 )
+# Totals are summed as integer cents, so the report figures are exact
+matched_by_id['CENTS_OPERATOR'] = to_cents(matched_by_id['AMOUNT_OPERATOR'])
+matched_by_id['CENTS_COMPANY'] = to_cents(matched_by_id['AMOUNT_COMPANY'])
 
 # ============================================
 # STEP 5: Categorize Results
 # ============================================
 print("\n📊 Categorizing results...")
 
-# Found in records
-matched = matched_by_id[matched_by_id['STATUS'].notna()]
-
-# Successful in company records
-successful = matched[matched['STATUS'] == 'Success']
-
-# Failed in company records
-failed = matched[matched['STATUS'] == 'Fail']
-
-# Not found in company records
-not_found = matched_by_id[matched_by_id['STATUS'].isna()]
+# Every row gets its category in one pass; the frames come from one groupby
+dispute_rules = RuleTable(DISPUTE_RULES, default='OTHER')
+dispute_category = dispute_rules.assign(matched_by_id)
+categories = dispute_rules.split(matched_by_id, dispute_category)
+successful, failed, not_found = categories['SUCCESSFUL'], categories['FAILED'], categories['NOT_FOUND']
 
 # ============================================
 # STEP 6: Generate Report
@@ -177,31 +173,35 @@ print("\n" + "=" * 80)
 print("📋 RECONCILIATION REPORT")
 print("=" * 80)
 
+claimed_cents = total_cents(to_cents(operator_claims['AMOUNT']))
+legit_cents = total_cents(successful['CENTS_COMPANY'])
+failed_cents = total_cents(failed['CENTS_COMPANY'])
+not_found_cents = total_cents(not_found['CENTS_OPERATOR'])
+
 print(f"\n🔢 OPERATOR CLAIMS:")
 print(f"   Total claimed successful: {len(operator_claims):,} transactions")
-print(f"   Total USD claimed: ${operator_claims['AMOUNT'].sum():,.2f}")
+print(f"   Total USD claimed: ${format_usd(claimed_cents)}")
 
 print(f"\n✅ VERIFIED SUCCESSFUL (You owe these):")
 print(f"   Transactions: {len(successful):,}")
-print(f"   Total USD: ${successful['AMOUNT_COMPANY'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(legit_cents)}")
 
 print(f"\n❌ DISPUTED - FAILED IN YOUR RECORDS (You DON'T owe these):")
 print(f"   Transactions: {len(failed):,}")
-print(f"   Total USD: ${failed['AMOUNT_COMPANY'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(failed_cents)}")
 
 print(f"\n⚠️  NOT FOUND IN YOUR RECORDS:")
 print(f"   Transactions: {len(not_found):,}")
-print(f"   Total USD: ${not_found['AMOUNT_OPERATOR'].sum():,.2f}")
+print(f"   Total USD: ${format_usd(not_found_cents)}")
 
 # Calculate disputed amount
-legit_amount = successful['AMOUNT_COMPANY'].sum()
-disputed_amount = failed['AMOUNT_COMPANY'].sum() + not_found['AMOUNT_OPERATOR'].sum()
+disputed_cents = failed_cents + not_found_cents
 
 print(f"\n💰 FINANCIAL SUMMARY:")
-print(f"   Operator claims: ${operator_claims['AMOUNT'].sum():,.2f}")
-print(f"   Verified legit:  ${legit_amount:,.2f}")
-print(f"   Disputed:        ${disputed_amount:,.2f}")
-print(f"   Difference:      ${operator_claims['AMOUNT'].sum() - legit_amount:,.2f}")
+print(f"   Operator claims: ${format_usd(claimed_cents)}")
+print(f"   Verified legit:  ${format_usd(legit_cents)}")
+print(f"   Disputed:        ${format_usd(disputed_cents)}")
+print(f"   Difference:      ${format_usd(claimed_cents - legit_cents)}")
 
 # ============================================
 # STEP 7: Save Detailed Reports
@@ -216,21 +216,21 @@ timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 # Save verified successful transactions
 if len(successful) > 0:
     successful_file = f"{output_dir}/VERIFIED_SUCCESSFUL_{timestamp}.csv"
-    successful.to_csv(successful_file, index=False)
-    print(f"   ✅ Saved: {successful_file}")
+    saved = write_artifact(successful, successful_file, OUTPUT_FORMAT)
+    print(f"   ✅ Saved: {', '.join(saved)}")
 
 # Save failed transactions with error messages
 if len(failed) > 0:
     failed_file = f"{output_dir}/DISPUTED_FAILED_{timestamp}.csv"
-    failed[['VENDOR_TRANSACTION_ID', 'MSISDN_OPERATOR', 'AMOUNT_OPERATOR',
-            'STATUS', 'RESPONSE_MESSAGE', 'VENDOR_RESPONSE_MESSAGE']].to_csv(failed_file, index=False)
-    print(f"   ✅ Saved: {failed_file}")
+    saved = write_artifact(failed[['VENDOR_TRANSACTION_ID', 'MSISDN_OPERATOR', 'AMOUNT_OPERATOR',
+                                   'STATUS', 'RESPONSE_MESSAGE', 'VENDOR_RESPONSE_MESSAGE']], failed_file, OUTPUT_FORMAT)
+    print(f"   ✅ Saved: {', '.join(saved)}")
 
 # Save not found transactions
 if len(not_found) > 0:
     not_found_file = f"{output_dir}/DISPUTED_NOT_FOUND_{timestamp}.csv"
-    not_found.to_csv(not_found_file, index=False)
-    print(f"   ✅ Saved: {not_found_file}")
+    saved = write_artifact(not_found, not_found_file, OUTPUT_FORMAT)
+    print(f"   ✅ Saved: {', '.join(saved)}")
 
 # Save summary
 summary_file = f"{output_dir}/SUMMARY_{timestamp}.txt"
@@ -241,21 +241,21 @@ with open(summary_file, 'w') as f:
     f.write(f"Period: September 2023 - December 2024\n\n")
     f.write(f"OPERATOR CLAIMS:\n")
     f.write(f"  Total transactions: {len(operator_claims):,}\n")
-    f.write(f"  Total USD claimed: ${operator_claims['AMOUNT'].sum():,.2f}\n\n")
+    f.write(f"  Total USD claimed: ${format_usd(claimed_cents)}\n\n")
     f.write(f"VERIFIED SUCCESSFUL (Amount you owe):\n")
     f.write(f"  Transactions: {len(successful):,}\n")
-    f.write(f"  Total USD: ${legit_amount:,.2f}\n\n")
+    f.write(f"  Total USD: ${format_usd(legit_cents)}\n\n")
     f.write(f"DISPUTED - FAILED:\n")
     f.write(f"  Transactions: {len(failed):,}\n")
-    f.write(f"  Total USD: ${failed['AMOUNT_COMPANY'].sum():,.2f}\n\n")
+    f.write(f"  Total USD: ${format_usd(failed_cents)}\n\n")
     f.write(f"DISPUTED - NOT FOUND:\n")
     f.write(f"  Transactions: {len(not_found):,}\n")
-    f.write(f"  Total USD: ${not_found['AMOUNT_OPERATOR'].sum():,.2f}\n\n")
+    f.write(f"  Total USD: ${format_usd(not_found_cents)}\n\n")
     f.write(f"BOTTOM LINE:\n")
-    f.write(f"  Operator claims: ${operator_claims['AMOUNT'].sum():,.2f}\n")
-    f.write(f"  You actually owe: ${legit_amount:,.2f}\n")
-    f.write(f"  Disputed amount: ${disputed_amount:,.2f}\n")
-    f.write(f"  Savings: ${disputed_amount:,.2f}\n")
+    f.write(f"  Operator claims: ${format_usd(claimed_cents)}\n")
+    f.write(f"  You actually owe: ${format_usd(legit_cents)}\n")
+    f.write(f"  Disputed amount: ${format_usd(disputed_cents)}\n")
+    f.write(f"  Savings: ${format_usd(disputed_cents)}\n")
 
 print(f"   ✅ Saved: {summary_file}")
 
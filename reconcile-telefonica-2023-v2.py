@@ -14,6 +14,8 @@ import numpy as np
 from datetime import datetime
 import os
 
+from reconciliation.ids import ID_DTYPES, align_ids, id_set, transaction_ids
+
 # File paths
 TEMM_FILE = '/Users/richardmas/Downloads/Latcom/Ajustados 2023 Latcom /Registros_TEMM_NoSoporteActual_202309_202412.csv'
 OCT_FILE = '/Users/richardmas/Downloads/Latcom/Ajustados 2023 Latcom /FINAL OCTUBRE 20231.xlsx'
@@ -28,7 +30,7 @@ print('=' * 120)
 
 # Step 1: Read TEMM file
 print('\n📦 Reading Telefonica TEMM file...')
-df_temm = pd.read_csv(TEMM_FILE)
+df_temm = pd.read_csv(TEMM_FILE, dtype=ID_DTYPES)
 df_temm['FECHA'] = pd.to_datetime(df_temm['FECHA'], format='%d/%m/%Y')
 df_temm['Year'] = df_temm['FECHA'].dt.year
 df_temm['Month'] = df_temm['FECHA'].dt.month
@@ -55,8 +57,8 @@ files_data = {
 
 latcom_data = {}
 for month, info in files_data.items():
-    df_adj = pd.read_excel(info['file'], sheet_name='ADJUSTED')
-    df_real = pd.read_excel(info['file'], sheet_name=list(pd.read_excel(info['file'], sheet_name=None).keys())[2])  # Third sheet
+    df_adj = pd.read_excel(info['file'], sheet_name='ADJUSTED', dtype=ID_DTYPES)
+    df_real = pd.read_excel(info['file'], sheet_name=list(pd.read_excel(info['file'], sheet_name=None).keys())[2], dtype=ID_DTYPES)  # Third sheet
 
     latcom_data[month] = {
         'adjusted': df_adj,
@@ -85,15 +87,19 @@ for month in [10, 12]:
     df_latcom_adj = latcom_data[month]['adjusted'].copy()
     df_latcom_real = latcom_data[month]['real'].copy()
 
-    # Clean IDs for matching
-    df_temm_month['SEC_ACT_STR'] = df_temm_month['SEC_ACTUACION'].astype(str).str.strip()
-    df_latcom_adj['VEND_TX_STR'] = df_latcom_adj['VENDOR_TRANSACTION_ID'].astype(str).str.split('.').str[0].str.strip()
-    df_latcom_real['VEND_TX_STR'] = df_latcom_real['VENDOR_TRANSACTION_ID'].astype(str).str.split('.').str[0].str.strip()
+    # Typed IDs for matching (int64, or text if a file has non-numeric IDs)
+    df_temm_month['SEC_ACT_ID'], invalid_temm = transaction_ids(df_temm_month['SEC_ACTUACION'])
+    df_latcom_adj['VEND_TX_ID'], invalid_adj = transaction_ids(df_latcom_adj['VENDOR_TRANSACTION_ID'])
+    df_latcom_real['VEND_TX_ID'], invalid_real = transaction_ids(df_latcom_real['VENDOR_TRANSACTION_ID'])
+    if invalid_temm.any() or invalid_adj.any() or invalid_real.any():
+        print(f'   ⚠️  Malformed IDs: {invalid_temm.sum():,} TEMM, {invalid_adj.sum():,} adjusted, {invalid_real.sum():,} real')
+    df_temm_month['SEC_ACT_ID'], df_latcom_adj['VEND_TX_ID'], df_latcom_real['VEND_TX_ID'] = align_ids(
+        df_temm_month['SEC_ACT_ID'], df_latcom_adj['VEND_TX_ID'], df_latcom_real['VEND_TX_ID'])
 
     # Create sets
-    temm_ids = set(df_temm_month['SEC_ACT_STR'])
-    latcom_adj_ids = set(df_latcom_adj['VEND_TX_STR'])
-    latcom_real_ids = set(df_latcom_real['VEND_TX_STR'])
+    temm_ids = id_set(df_temm_month['SEC_ACT_ID'])
+    latcom_adj_ids = id_set(df_latcom_adj['VEND_TX_ID'])
+    latcom_real_ids = id_set(df_latcom_real['VEND_TX_ID'])
 
     # Find matches
     matched_adj = temm_ids & latcom_adj_ids  # In both TEMM and Adjusted
@@ -104,9 +110,9 @@ for month in [10, 12]:
     only_latcom_real = latcom_real_ids - temm_ids  # In our real but not in TEMM
 
     # Get dataframes
-    df_matched_temm = df_temm_month[df_temm_month['SEC_ACT_STR'].isin(matched_adj)]
-    df_matched_latcom = df_latcom_adj[df_latcom_adj['VEND_TX_STR'].isin(matched_adj)]
-    df_failed_temm = df_temm_month[df_temm_month['SEC_ACT_STR'].isin(only_temm)]
+    df_matched_temm = df_temm_month[df_temm_month['SEC_ACT_ID'].isin(matched_adj)]
+    df_matched_latcom = df_latcom_adj[df_latcom_adj['VEND_TX_ID'].isin(matched_adj)]
+    df_failed_temm = df_temm_month[df_temm_month['SEC_ACT_ID'].isin(only_temm)]
 
     # Print results
     print(f'\n1️⃣  TELEFONICA CLAIMS:')
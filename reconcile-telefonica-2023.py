@@ -14,6 +14,9 @@ import numpy as np
 from datetime import datetime
 import os
 
+from reconciliation.dates import parse_dates
+from reconciliation.ids import ID_DTYPES, align_ids, id_set, transaction_ids
+
 # File paths
 TEMM_FILE = '/Users/richardmas/Downloads/Latcom/Ajustados 2023 Latcom /Registros_TEMM_NoSoporteActual_202309_202412.csv'
 OCT_FILE = '/Users/richardmas/Downloads/Latcom/Ajustados 2023 Latcom /FINAL OCTUBRE 20231.xlsx'
@@ -27,19 +30,11 @@ print('=' * 100)
 
 # Step 1: Read TEMM file (Telefonica data)
 print('\n📦 Step 1: Reading Telefonica TEMM file...')
-df_temm = pd.read_csv(TEMM_FILE)
+df_temm = pd.read_csv(TEMM_FILE, dtype=ID_DTYPES)
 print(f'   Total TEMM records: {len(df_temm):,}')
 
-# Parse dates - try multiple formats
-def parse_date(date_str):
-    for fmt in ['%d/%m/%Y', '%Y-%m-%d', '%m/%d/%Y']:
-        try:
-            return pd.to_datetime(date_str, format=fmt)
-        except:
-            continue
-    return pd.to_datetime(date_str)
-
-df_temm['FECHA'] = df_temm['FECHA'].apply(parse_date)
+# Parse dates - format detected from a sample, each distinct date parsed once
+df_temm['FECHA'] = parse_dates(df_temm['FECHA'], errors='raise')
 df_temm['Year'] = df_temm['FECHA'].dt.year
 df_temm['Month'] = df_temm['FECHA'].dt.month
 
@@ -51,14 +46,14 @@ print(f'   2023 TEMM records: {len(df_temm_2023):,}')
 print('\n📦 Step 2: Reading Latcom adjusted files...')
 
 # October 2023
-df_oct = pd.read_excel(OCT_FILE, sheet_name='ADJUSTED')
-df_oct_real = pd.read_excel(OCT_FILE, sheet_name='PAQUETES OCTUBRE23')
+df_oct = pd.read_excel(OCT_FILE, sheet_name='ADJUSTED', dtype=ID_DTYPES)
+df_oct_real = pd.read_excel(OCT_FILE, sheet_name='PAQUETES OCTUBRE23', dtype=ID_DTYPES)
 print(f'   October Adjusted: {len(df_oct):,} transactions')
 print(f'   October Real: {len(df_oct_real):,} transactions')
 
 # December 2023 (assuming September and November are in this file or similar structure)
-df_dec = pd.read_excel(DEC_FILE, sheet_name='ADJUSTED')
-df_dec_real = pd.read_excel(DEC_FILE, sheet_name='PAQUETES DICIEMBRE23')
+df_dec = pd.read_excel(DEC_FILE, sheet_name='ADJUSTED', dtype=ID_DTYPES)
+df_dec_real = pd.read_excel(DEC_FILE, sheet_name='PAQUETES DICIEMBRE23', dtype=ID_DTYPES)
 print(f'   December Adjusted: {len(df_dec):,} transactions')
 print(f'   December Real: {len(df_dec_real):,} transactions')
 
@@ -100,13 +95,17 @@ for month_num in [10, 12]:
         # TEMM: SEC_ACTUACION = Latcom: VENDOR_TRANSACTION_ID
         # Per meeting: "el vendor Transaction ID, porque Luis dice que este es el identificador que le sirve a Telefónica"
 
-        # Clean VENDOR_TRANSACTION_ID values
-        df_temm_month['SEC_ACTUACION_clean'] = df_temm_month['SEC_ACTUACION'].astype(str).str.strip()
-        df_latcom_adjusted['VENDOR_TRANSACTION_ID_clean'] = df_latcom_adjusted['VENDOR_TRANSACTION_ID'].astype(str).str.replace('.0', '').str.strip()
+        # Typed VENDOR_TRANSACTION_ID values (int64, or text if non-numeric IDs appear)
+        df_temm_month['SEC_ACTUACION_clean'], invalid_temm = transaction_ids(df_temm_month['SEC_ACTUACION'])
+        df_latcom_adjusted['VENDOR_TRANSACTION_ID_clean'], invalid_latcom = transaction_ids(df_latcom_adjusted['VENDOR_TRANSACTION_ID'])
+        if invalid_temm.any() or invalid_latcom.any():
+            print(f'   ⚠️  Malformed IDs: {invalid_temm.sum():,} TEMM, {invalid_latcom.sum():,} Latcom')
+        df_temm_month['SEC_ACTUACION_clean'], df_latcom_adjusted['VENDOR_TRANSACTION_ID_clean'] = align_ids(
+            df_temm_month['SEC_ACTUACION_clean'], df_latcom_adjusted['VENDOR_TRANSACTION_ID_clean'])
 
         # Find matches
-        latcom_keys = set(df_latcom_adjusted['VENDOR_TRANSACTION_ID_clean'])
-        temm_keys = set(df_temm_month['SEC_ACTUACION_clean'])
+        latcom_keys = id_set(df_latcom_adjusted['VENDOR_TRANSACTION_ID_clean'])
+        temm_keys = id_set(df_temm_month['SEC_ACTUACION_clean'])
 
         matched_keys = latcom_keys & temm_keys
         latcom_only = latcom_keys - temm_keys
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the Telefónica / Latcom reconciliation scripts
+
+The scripts in the repository root stay runnable on their own; anything
+two or more of them need lives here so it is written once.
+"""
@@ -0,0 +1,90 @@
+"""
+Reading and writing reconciliation artifacts (CSV / Parquet)
+
+Scripts keep naming their outputs '....csv'; write_artifact() decides what
+actually lands on disk from the output format:
+
+    csv      - CSV only (default, what the operator receives)
+    parquet  - compressed, typed Parquet next to where the CSV would be
+    both     - Parquet for our own re-reads plus the CSV for the operator
+
+The format comes from the RECON_OUTPUT_FORMAT environment variable unless
+passed explicitly. read_artifact() takes the '.csv' name and prefers the
+Parquet sibling when it exists, so downstream scripts need no changes
+when the upstream run switches format.
+"""
+
+import os
+
+import pandas as pd
+
+OUTPUT_FORMATS = ('csv', 'parquet', 'both')
+PARQUET_COMPRESSION = 'zstd'
+
+
+def output_format(fmt=None):
+    """Resolve the output format (argument > RECON_OUTPUT_FORMAT > 'csv')"""
+    fmt = (fmt or os.environ.get('RECON_OUTPUT_FORMAT') or 'csv').lower()
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}' (expected one of {', '.join(OUTPUT_FORMATS)})")
+    return fmt
+
+
+def parquet_path(path):
+    """'x/REPORT.csv' -> 'x/REPORT.parquet'"""
+    root, _ = os.path.splitext(path)
+    return f'{root}.parquet'
+
+
+def _typed_for_parquet(df):
+    """
+    Make object columns Arrow-friendly
+
+    Excel/CSV loads often leave columns holding a mix of str, int and
+    float (e.g. IDs read as 102326429639 next to 'LT178061'). Parquet
+    needs one type per column, so mixed columns are stored as strings;
+    nulls stay null.
+    """
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        kind = pd.api.types.infer_dtype(df[col], skipna=True)
+        if kind in ('string', 'empty', 'boolean', 'integer', 'floating', 'datetime', 'date', 'bytes'):
+            continue
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def write_artifact(df, path, fmt=None, index=False):
+    """
+    Write df as CSV and/or Parquet according to the output format
+
+    Returns the list of files written, Parquet first.
+    """
+    fmt = output_format(fmt)
+    written = []
+
+    if fmt in ('parquet', 'both'):
+        target = parquet_path(path)
+        _typed_for_parquet(df).to_parquet(target, index=index, compression=PARQUET_COMPRESSION)
+        written.append(target)
+
+    if fmt in ('csv', 'both'):
+        df.to_csv(path, index=index)
+        written.append(path)
+
+    return written
+
+
+def read_artifact(path, columns=None, **csv_kwargs):
+    """
+    Read an artifact written by write_artifact()
+
+    Accepts either name; the Parquet file wins when both exist.
+    """
+    target = parquet_path(path)
+    if os.path.exists(target):
+        return pd.read_parquet(target, columns=columns)
+    return pd.read_csv(path, usecols=columns, **csv_kwargs)
@@ -0,0 +1,363 @@
+"""
+Dataset catalog: the date span each source file covers
+
+The operator-dispute loaders read every workbook and CSV under Excel
+Workings (2023, 2024 and 2025), concatenated them, parsed every DATETIME
+and only then dropped the rows outside Sept 2023 - Dec 2024. The catalog
+knows a file's span without opening it, either from its name (Spanish month
++ year, a YYYYMM_YYYYMM range, a year, or a year folder) or from the
+min/max recorded the last time the file was actually read. Loaders skip
+whole files outside the period and filter the rest while reading:
+
+    catalog = DatasetCatalog()
+    files, skipped = catalog.select(files, start, end)
+    for path in files:
+        df = catalog.read_period(path, 'DATETIME', start, end)
+    catalog.save()
+
+Entries live in a JSON manifest (RECON_CATALOG, default
+reconciliation_reports/dataset_catalog.json) keyed by absolute path; an
+entry is only trusted while the file's size and mtime are unchanged.
+
+refresh() fills in the rest of an entry for coverage questions: content
+hash, sheet names with row counts (read from the xlsx zip index, no cells
+parsed), header layout signature, the month the file covers and, for
+CSVs with a known date column, rows per month. Unchanged files cost one
+os.stat() per run. covered_months() only counts months a file is known to
+hold (rows per month, scanned dates or a month in its name); a file named
+or filed by year alone is listed by unverified() instead.
+"""
+
+import hashlib
+import json
+import os
+import re
+import zipfile
+from datetime import date, timedelta
+
+import pandas as pd
+
+from reconciliation.readers import sniff_format, read_table
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'reconciliation_reports', 'dataset_catalog.json')
+
+MONTH_NAMES = {
+    'ENERO': 1, 'FEBRERO': 2, 'MARZO': 3, 'ABRIL': 4, 'MAYO': 5, 'JUNIO': 6,
+    'JULIO': 7, 'AGOSTO': 8, 'SEPTIEMBRE': 9, 'OCTUBRE': 10, 'NOVIEMBRE': 11, 'DICIEMBRE': 12,
+}
+
+MONTH_RANGE = re.compile(r'(20\d{2})(0[1-9]|1[0-2])_(20\d{2})(0[1-9]|1[0-2])')
+YEAR_MONTH = re.compile(r'(?<!\d)(20\d{2})[-_]?(0[1-9]|1[0-2])(?!\d)')
+YEAR = re.compile(r'20\d{2}')
+YEAR_ONLY = re.compile(r'^20\d{2}$')
+
+# Filename spans are widened by this much when pruning: rows are compared after
+# conversion to UTC, so a month-named file can hold the first hours of the next month
+FILENAME_MARGIN = timedelta(days=1)
+
+# CSV rows per chunk when filtering while reading
+CSV_CHUNK_ROWS = 250_000
+HASH_BLOCK_BYTES = 1 << 20
+
+# xlsx internals: sheet list, sheet -> part mapping, used range of a sheet
+XLSX_SHEET = re.compile(rb'<sheet\b[^>]*?name="([^"]*)"[^>]*?r:id="([^"]*)"')
+XLSX_REL = re.compile(rb'<Relationship\b[^>]*?Id="([^"]*)"[^>]*?Target="([^"]*)"')
+XLSX_DIMENSION = re.compile(rb'<dimension\s+ref="(?:[A-Z]+\d+:)?[A-Z]+(\d+)"')
+
+
+def month_span(year, month):
+    """(first day, last day) of a calendar month"""
+    period = pd.Period(year=int(year), month=int(month), freq='M')
+    return period.start_time.date(), period.end_time.date()
+
+
+def year_span(year):
+    return date(int(year), 1, 1), date(int(year), 12, 31)
+
+
+def month_span_from_filename(path):
+    """(first day, last day) when the name gives months (Spanish month + year, YYYYMM, YYYYMM_YYYYMM), else None"""
+    name = os.path.basename(path).upper()
+
+    ranged = MONTH_RANGE.search(name)
+    if ranged:
+        return month_span(ranged.group(1), ranged.group(2))[0], month_span(ranged.group(3), ranged.group(4))[1]
+
+    year = YEAR.search(name)
+    if year:
+        for month_name, month in MONTH_NAMES.items():
+            if month_name in name:
+                return month_span(year.group(), month)
+        compact = YEAR_MONTH.search(name)
+        if compact:
+            return month_span(compact.group(1), compact.group(2))
+    return None
+
+
+def span_from_filename(path):
+    """
+    (first day, last day) a file covers according to its name or year folder, or None
+
+    A year alone (in the name or the folder) gives the whole year: good
+    enough to skip files outside a period, not proof of any month.
+    """
+    span = month_span_from_filename(path)
+    if span:
+        return span
+
+    year = YEAR.search(os.path.basename(path))
+    if year:
+        return year_span(year.group())
+    folder = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    if YEAR_ONLY.match(folder):
+        return year_span(folder)
+    return None
+
+
+def file_hash(path):
+    """sha256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def layout_signature(columns):
+    """Short hash of the normalized header, equal for files with the same layout"""
+    header = '|'.join(str(col).strip().upper() for col in columns)
+    return hashlib.sha1(header.encode('utf-8')).hexdigest()[:12]
+
+
+def xlsx_sheet_rows(path):
+    """[(sheet name, data rows)] from the workbook index and each sheet's <dimension>"""
+    with zipfile.ZipFile(path) as zf:
+        workbook = zf.read('xl/workbook.xml')
+        rels = dict(XLSX_REL.findall(zf.read('xl/_rels/workbook.xml.rels')))
+        sheets = []
+        for name, rel_id in XLSX_SHEET.findall(workbook):
+            target = rels.get(rel_id, b'').decode()
+            part = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+            rows = None
+            if part in zf.namelist():
+                with zf.open(part) as f:
+                    found = XLSX_DIMENSION.search(f.read(4096))
+                if found:
+                    rows = max(int(found.group(1)) - 1, 0)
+            sheets.append((name.decode('utf-8'), rows))
+    return sheets
+
+
+def csv_profile(path, encoding, date_column=None, date_format=None):
+    """Header, row count and (with a date column) rows per month of a CSV"""
+    columns = list(pd.read_csv(path, encoding=encoding, nrows=0).columns)
+    if date_column in columns:
+        dates = pd.to_datetime(pd.read_csv(path, encoding=encoding, usecols=[date_column])[date_column],
+                               format=date_format, errors='coerce')
+        months = dates.dt.to_period('M').value_counts().sort_index()
+        return columns, len(dates), {str(month): int(count) for month, count in months.items()}, dates
+
+    with open(path, 'rb') as f:
+        lines = sum(block.count(b'\n') for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''))
+    return columns, max(lines - 1, 0), None, None
+
+
+def naive_datetimes(values):
+    """Parse timestamps as UTC and drop the timezone (how the dispute scripts compare dates)"""
+    return pd.to_datetime(values, errors='coerce', utc=True).dt.tz_localize(None)
+
+
+def _as_date(value):
+    return pd.Timestamp(value).date()
+
+
+def period_bounds(start, end):
+    """Days start..end, both inclusive -> (first instant, first instant after the period)"""
+    return pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+
+
+class DatasetCatalog:
+    """JSON manifest of source files, refreshed per file by size/mtime"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('RECON_CATALOG') or DEFAULT_CATALOG
+        self.files = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.files = json.load(f).get('files', {})
+        self.changed = False
+
+    def entry(self, path):
+        """The manifest entry for path if it is still current, else None"""
+        entry = self.files.get(os.path.abspath(path))
+        if entry is None:
+            return None
+        stat = os.stat(path)
+        if entry.get('size') != stat.st_size or entry.get('mtime') != stat.st_mtime:
+            return None
+        return entry
+
+    def update(self, path, **fields):
+        """Merge fields into path's entry (dropped first if the file changed)"""
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self.entry(path) or {'size': stat.st_size, 'mtime': stat.st_mtime}
+        entry.update(fields)
+        self.files[key] = entry
+        self.changed = True
+        return entry
+
+    def date_span(self, path):
+        """(min, max) date of path: scanned span if known, else from the filename, else None"""
+        entry = self.entry(path)
+        if entry and entry.get('min_date'):
+            return date.fromisoformat(entry['min_date']), date.fromisoformat(entry['max_date'])
+        return span_from_filename(path)
+
+    def record_span(self, path, dates):
+        """Remember the min/max of dates seen in path (any full read is a free scan)"""
+        dates = pd.Series(dates).dropna()
+        if dates.empty:
+            return
+        self.update(path, min_date=dates.min().date().isoformat(), max_date=dates.max().date().isoformat(),
+                    date_source='scan')
+
+    def in_period(self, path, start, end):
+        """False only when path's span (scanned, else filename +- FILENAME_MARGIN) misses the days start..end"""
+        span = self.date_span(path)
+        if span is None:
+            return True
+        low, high = span
+        entry = self.entry(path)
+        if not (entry and entry.get('date_source') == 'scan'):
+            low, high = low - FILENAME_MARGIN, high + FILENAME_MARGIN
+        return low <= _as_date(end) and high >= _as_date(start)
+
+    def select(self, paths, start, end):
+        """Split paths into (files that may have rows on the days start..end, files that cannot)"""
+        selected, skipped = [], []
+        for path in paths:
+            (selected if self.in_period(path, start, end) else skipped).append(path)
+        return selected, skipped
+
+    def read_period(self, path, date_column, start, end, parse=naive_datetimes, **kwargs):
+        """
+        Read path keeping only rows whose date_column falls on the days start..end
+
+        Both ends are whole days (period_bounds): end='2024-12-31' keeps
+        every row of Dec 31. date_column is replaced by its parsed values.
+        CSVs are read and filtered chunk by chunk; the file's full min/max
+        date is recorded either way, so the next run can skip it without
+        reading.
+        """
+        start, stop = period_bounds(start, end)
+        kept, lows, highs = [], [], []
+
+        def keep(df):
+            df[date_column] = parse(df[date_column])
+            lows.append(df[date_column].min())
+            highs.append(df[date_column].max())
+            return df[(df[date_column] >= start) & (df[date_column] < stop)]
+
+        fmt = sniff_format(path)
+        if fmt.kind == 'csv':
+            try:
+                for chunk in pd.read_csv(path, encoding=fmt.encoding, chunksize=CSV_CHUNK_ROWS, **kwargs):
+                    kept.append(keep(chunk))
+            except UnicodeDecodeError:
+                kept, lows, highs = [], [], []
+                for chunk in pd.read_csv(path, encoding='latin1', chunksize=CSV_CHUNK_ROWS, **kwargs):
+                    kept.append(keep(chunk))
+        else:
+            kept.append(keep(read_table(path, **kwargs)))
+
+        self.record_span(path, lows + highs)
+        if not kept:
+            return pd.DataFrame()
+        return pd.concat(kept, ignore_index=True) if len(kept) > 1 else kept[0].reset_index(drop=True)
+
+    def refresh(self, path, source=None, date_column=None, date_format=None):
+        """
+        Profile path unless its entry is current; returns the entry
+
+        Adds source, kind, hash, sheets [{name, rows, columns, layout}],
+        rows, layout (first sheet), month (when the span is one month) and,
+        for CSVs with date_column, months {YYYY-MM: rows} plus min/max date.
+        """
+        entry = self.entry(path)
+        if entry and 'hash' in entry:
+            if source and entry.get('source') != source:
+                entry = self.update(path, source=source)
+            return entry
+
+        fmt = sniff_format(path)
+        fields = {'source': source, 'kind': fmt.kind, 'hash': file_hash(path)}
+        if fmt.kind == 'csv':
+            columns, rows, months, dates = csv_profile(path, fmt.encoding, date_column, date_format)
+            sheets = [{'name': None, 'rows': rows, 'columns': columns, 'layout': layout_signature(columns)}]
+            if months is not None:
+                fields['months'] = months
+                self.record_span(path, dates)
+        else:
+            headers = read_table(path, sheet_name=None, nrows=0)
+            rows = dict(xlsx_sheet_rows(path)) if fmt.kind == 'xlsx' else {}
+            sheets = [{'name': name, 'rows': rows.get(name), 'columns': [str(col) for col in header.columns],
+                       'layout': layout_signature(header.columns)}
+                      for name, header in headers.items()]
+
+        fields['sheets'] = sheets
+        fields['rows'] = sum(sheet['rows'] or 0 for sheet in sheets)
+        fields['layout'] = sheets[0]['layout'] if sheets else None
+
+        span = self.date_span(path)
+        if span and not (self.entry(path) or {}).get('min_date'):
+            fields.update(min_date=span[0].isoformat(), max_date=span[1].isoformat(), date_source='filename')
+        if span and (span[0].year, span[0].month) == (span[1].year, span[1].month):
+            fields['month'] = f'{span[0].year}-{span[0].month:02d}'
+        return self.update(path, **fields)
+
+    def _current(self, source):
+        """(path, entry) for the current entries of a source"""
+        for path, entry in self.files.items():
+            if entry.get('source') == source and os.path.exists(path) and self.entry(path) is not None:
+                yield path, entry
+
+    @staticmethod
+    def verified_months(path, entry):
+        """
+        Months a file is known to hold: its rows per month, else the span of
+        its scanned dates, else a month-precise filename; [] for year-only
+        names and folders, which are not evidence of any month
+        """
+        if entry.get('months'):
+            return list(entry['months'])
+        if entry.get('date_source') == 'scan' and entry.get('min_date'):
+            span = entry['min_date'], entry['max_date']
+        else:
+            span = month_span_from_filename(path)
+        if span is None:
+            return []
+        return [str(m) for m in pd.period_range(span[0], span[1], freq='M')]
+
+    def covered_months(self, source):
+        """{YYYY-MM: [paths]} for current entries of a source, from verified_months()"""
+        covered = {}
+        for path, entry in self._current(source):
+            for month in self.verified_months(path, entry):
+                covered.setdefault(month, []).append(path)
+        return covered
+
+    def unverified(self, source):
+        """Current files of a source that verify no month (year-only or undated), sorted"""
+        return sorted(path for path, entry in self._current(source) if not self.verified_months(path, entry))
+
+    def save(self):
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'files': self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.changed = False
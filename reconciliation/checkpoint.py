@@ -0,0 +1,160 @@
+"""
+Stage checkpoints for the long reconciliation scripts
+
+reconciliation_analysis.py spends most of its hour loading the CDR history
+and matching; a failure in the report step used to throw all of it away.
+Each stage now saves its outputs (frames as Parquet, small values as JSON)
+under a fingerprint, and a run started with --resume restores every stage
+whose fingerprint is unchanged instead of recomputing it:
+
+    checkpoints = StageCheckpoints(input_files, resume=True)
+    stage = checkpoints.stage('load', prefilter=True)
+    saved = stage.restore()
+    if saved is None:
+        ...compute telefonica_df, latcom_df, file_issues...
+        stage.save({'telefonica': telefonica_df, 'latcom': latcom_df}, {'file_issues': file_issues})
+
+A stage's fingerprint covers the input files (path, size, mtime - the same
+trust rule as the dataset catalog), the stage's own settings and the
+fingerprint of the stage before it, so changing an input or a setting
+re-runs that stage and everything after it. The code belongs in the
+settings too: code_fingerprint() hashes the source of the functions,
+classes and modules a stage runs, so editing e.g. the categorization
+rules re-runs categorize on a plain --resume:
+
+    stage = checkpoints.stage('categorize', code=code_fingerprint(categorize, MatchPositions))
+
+resume='match' restores stages up to and including 'match' and recomputes
+the rest regardless.
+
+Checkpoints live in RECON_CHECKPOINT_DIR (default
+reconciliation_reports/checkpoints), one directory per stage.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from reconciliation.artifacts import PARQUET_COMPRESSION, _typed_for_parquet
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                      'reconciliation_reports', 'checkpoints')
+MANIFEST = 'manifest.json'
+
+
+def resume_option(argv):
+    """--resume -> True, --resume=STAGE -> 'STAGE', absent -> False"""
+    for arg in argv:
+        if arg == '--resume':
+            return True
+        if arg.startswith('--resume='):
+            return arg.split('=', 1)[1]
+    return False
+
+
+def inputs_fingerprint(paths):
+    """Hash of (path, size, mtime) for every input file; missing files count as missing"""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        try:
+            stat = os.stat(path)
+            digest.update(f'{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode())
+        except OSError:
+            digest.update(f'{os.path.abspath(path)}\0missing\n'.encode())
+    return digest.hexdigest()
+
+
+def code_fingerprint(*objects):
+    """Hash of the source of functions, classes or modules (the code a stage runs)"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class StageCheckpoints:
+    """Ordered stages of one script, chained by fingerprint"""
+
+    def __init__(self, input_files, root=None, resume=False):
+        self.root = root or os.environ.get('RECON_CHECKPOINT_DIR') or DEFAULT_CHECKPOINT_DIR
+        self.resume = resume
+        self._fingerprint = inputs_fingerprint(input_files)
+        self._resuming = bool(resume)
+
+    def stage(self, name, **settings):
+        """The next stage; settings are anything besides the inputs that changes its output"""
+        payload = json.dumps({'previous': self._fingerprint, 'stage': name, 'settings': settings},
+                             sort_keys=True, default=str)
+        self._fingerprint = hashlib.sha256(payload.encode()).hexdigest()
+        stage = Stage(os.path.join(self.root, name), name, self._fingerprint, self._resuming)
+        # resume='match' restores up to 'match'; everything after it is recomputed
+        if self.resume is not True and self.resume == name:
+            self._resuming = False
+        return stage
+
+
+class Stage:
+    """One stage's checkpoint directory"""
+
+    def __init__(self, path, name, fingerprint, resume):
+        self.path = path
+        self.name = name
+        self.fingerprint = fingerprint
+        self.resume = resume
+        self.restored = False
+
+    def _manifest(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def restore(self):
+        """
+        Saved frames and values as one dict, or None when the stage must run
+
+        None when not resuming, when nothing was saved or when the saved
+        fingerprint differs from this run's.
+        """
+        if not self.resume:
+            return None
+        manifest = self._manifest()
+        if manifest is None or manifest.get('fingerprint') != self.fingerprint:
+            return None
+        saved = dict(manifest['values'])
+        for name, (kind, series_name) in manifest['frames'].items():
+            frame = pd.read_parquet(os.path.join(self.path, f'{name}.parquet'))
+            saved[name] = frame.iloc[:, 0].rename(series_name) if kind == 'series' else frame
+        self.restored = True
+        return saved
+
+    def save(self, frames, values=None):
+        """
+        Persist the stage's frames (DataFrame or Series, Parquet) and values (JSON)
+
+        Written to a scratch directory and swapped in, so an interrupted
+        save never leaves a half-written stage that looks complete.
+        """
+        scratch = f'{self.path}.partial'
+        shutil.rmtree(scratch, ignore_errors=True)
+        os.makedirs(scratch)
+        kinds = {}
+        for name, frame in frames.items():
+            if isinstance(frame, pd.Series):
+                kinds[name] = ('series', frame.name)
+                frame = frame.to_frame(name='VALUE')
+            else:
+                kinds[name] = ('frame', None)
+            _typed_for_parquet(frame).to_parquet(os.path.join(scratch, f'{name}.parquet'),
+                                                 compression=PARQUET_COMPRESSION)
+        with open(os.path.join(scratch, MANIFEST), 'w') as f:
+            json.dump({'stage': self.name, 'fingerprint': self.fingerprint, 'frames': kinds,
+                       'values': values or {}}, f, indent=1, default=str)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(scratch, self.path)
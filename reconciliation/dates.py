@@ -0,0 +1,99 @@
+"""
+Date normalization for operator claim files and Latcom CDRs
+
+Claim files come with FECHA as DD/MM/YYYY text, YYYYMMDD numbers or ISO
+dates depending on who exported them. Instead of trying every format on
+every row, parse_dates() parses each distinct value once, one vectorized
+pass per format: a year of claims has a few hundred distinct dates across
+millions of rows.
+
+Formats are tried per value in priority order, exactly like the old
+row-wise strptime cascade, so an ambiguous value such as 01/02/2023 is
+still 1 Feb (DD/MM first) even in a file where 01/13/2023 shows the
+other rows are MM/DD. detect_date_format() only reports a file's format.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Formats tried, in priority order, when a file's format is not known
+DATE_FORMATS = ['%d/%m/%Y', '%Y-%m-%d', '%m/%d/%Y']
+
+
+def _as_text(values):
+    """Stringify values so numeric dates (20230901 / 20230901.0) parse with a format"""
+    def text(value):
+        if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+            if pd.notna(value) and float(value).is_integer():
+                return str(int(value))
+        return value
+    return pd.Series([text(value) for value in values], dtype=object)
+
+
+def detect_date_format(values, formats=None, sample_size=500):
+    """
+    Return the first format in `formats` that parses every sampled value
+
+    The sample is drawn from the distinct non-null values, so a column
+    dominated by one date still exercises the rarer ones. Returns None
+    when no single format fits the sample.
+    """
+    formats = DATE_FORMATS if formats is None else formats
+    uniques = pd.unique(pd.Series(values).dropna())
+    if len(uniques) == 0:
+        return None
+    sample = _as_text(uniques[:sample_size])
+
+    for fmt in formats:
+        if pd.to_datetime(sample, format=fmt, errors='coerce').notna().all():
+            return fmt
+    return None
+
+
+def parse_dates(values, formats=None, errors='coerce', infer=True):
+    """
+    Parse a date column once per distinct value
+
+    formats:
+        list of strptime formats (default DATE_FORMATS). Each value gets
+        the first format, in list order, that parses it; values none of
+        them parse go to pandas' own inference. Pass [] to go straight
+        to inference (e.g. CDR timestamps).
+    errors:
+        'coerce' leaves unparseable values as NaT, 'raise' raises like
+        pd.to_datetime does.
+    infer:
+        set False for a strict fixed-format parse (pd.to_datetime with
+        format= and errors='coerce'): values no format fits become NaT.
+
+    Already-datetime columns are returned unchanged.
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    formats = DATE_FORMATS if formats is None else list(formats)
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    text = _as_text(uniques)
+
+    # Priority order, as the row-wise cascade: a later format only sees values the earlier ones rejected
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        pending = parsed.isna()
+        if not pending.any():
+            break
+        parsed = parsed.fillna(pd.to_datetime(text.where(pending), format=fmt, errors='coerce'))
+
+    # Whatever no format could parse goes through pandas inference
+    pending = parsed.isna() if infer else pd.Series(False, index=parsed.index)
+    if pending.all():
+        parsed = pd.to_datetime(uniques, errors=errors)
+    elif pending.any():
+        inferred = pd.to_datetime(uniques[pending], errors=errors)
+        if inferred.dt.tz is not None:
+            inferred = inferred.dt.tz_convert(None)
+        parsed = parsed.fillna(inferred)
+
+    result = pd.DatetimeIndex(parsed).take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(result, index=series.index, name=series.name)
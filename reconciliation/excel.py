@@ -0,0 +1,44 @@
+"""
+Streaming Excel output (xlsxwriter constant_memory mode)
+
+pd.ExcelWriter keeps every sheet in memory until the workbook closes, and
+DataFrame.to_excel writes column by column, so a report can only be
+written once all of its data is loaded. With xlsxwriter's constant_memory
+option each row is flushed to disk as soon as the next one starts; the
+price is that rows must be written top to bottom, which write_rows() does.
+
+    writer = streaming_writer(path)
+    summary = writer.book.add_worksheet('SUMMARY')   # reserve first tab
+    for month in months:
+        write_rows(writer.book.add_worksheet(name), month_df, header_fmt)
+    write_rows(summary, summary_df, header_fmt)
+    writer.close()
+"""
+
+import pandas as pd
+
+# Same datetime rendering as DataFrame.to_excel
+DEFAULT_DATE_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+
+
+def streaming_writer(path):
+    """pd.ExcelWriter on xlsxwriter with constant_memory enabled"""
+    return pd.ExcelWriter(path, engine='xlsxwriter', engine_kwargs={'options': {
+        'constant_memory': True,
+        'default_date_format': DEFAULT_DATE_FORMAT,
+    }})
+
+
+def write_rows(worksheet, df, header_format=None, column_width=None):
+    """
+    Write df (header + rows, no index) to an xlsxwriter worksheet, row by row
+
+    Nulls become empty cells, like to_excel's default na_rep.
+    """
+    worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+    if column_width:
+        worksheet.set_column(0, max(len(df.columns) - 1, 0), column_width)
+
+    values = df.astype(object).where(df.notna(), None)
+    for row_num, row in enumerate(values.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row_num, 0, row)
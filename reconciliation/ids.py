@@ -0,0 +1,79 @@
+"""
+Transaction IDs as native int64
+
+SEC_ACTUACION and VENDOR_TRANSACTION_ID are numeric, but pandas reads a
+column with any blank cell as float64, so the scripts repaired the IDs with
+astype(str).str.split('.').str[0].str.strip() - three string passes per
+column per month - and IDs above 2**53 had already lost digits on the way
+in. Loaders now read these columns as text (ID_DTYPES) and
+transaction_ids() parses them once: Int64 when every value is a whole
+number, otherwise Arrow large_string. Values that do not look like an ID
+are flagged instead of quietly becoming a different key.
+
+    df = read_table(path, dtype=ID_DTYPES)
+    df['SEC_ACT_ID'], invalid = transaction_ids(df['SEC_ACTUACION'])
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+TRANSACTION_ID_COLUMNS = ['SEC_ACTUACION', 'VENDOR_TRANSACTION_ID']
+
+# read_csv / read_excel dtype= argument: keep ID digits exactly as written
+ID_DTYPES = {col: str for col in TRANSACTION_ID_COLUMNS}
+
+STRING_IDS = pd.ArrowDtype(pa.large_string())
+
+# Whole numbers of up to 19 digits (range-checked against int64 below); a
+# trailing '.0' comes from float round trips
+NUMERIC_ID = r'\d{1,19}'
+MAX_INT64_TEXT = str(np.iinfo(np.int64).max)
+FLOAT_SUFFIX = r'\.0+$'
+MAX_EXACT_FLOAT = 2 ** 53
+
+
+def transaction_ids(values):
+    """
+    Parse an ID column -> (ids, invalid)
+
+    ids is Int64 when every non-blank value is a whole number, otherwise
+    large_string of the stripped text. invalid marks the non-blank values
+    that are not whole numbers (including floats beyond 2**53, whose digits
+    are already gone); blanks are <NA> and not flagged.
+    """
+    values = pd.Series(values)
+
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.astype('Int64'), pd.Series(False, index=values.index)
+
+    if pd.api.types.is_float_dtype(values.dtype):
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            whole = (numbers == np.floor(numbers)) & (np.abs(numbers) <= MAX_EXACT_FLOAT)
+        invalid = pd.Series(~whole & ~np.isnan(numbers), index=values.index)
+        ids = pd.Series(np.where(whole, numbers, np.nan), index=values.index, name=values.name)
+        return ids.astype('Int64'), invalid
+
+    text = values.astype('string').str.strip().str.replace(FLOAT_SUFFIX, '', regex=True)
+    text = text.mask(text == '')
+    numeric = text.str.fullmatch(NUMERIC_ID).fillna(False).astype(bool)
+    # 19-digit values above the int64 maximum (same width, so text order is numeric order)
+    too_big = (text.str.len() == len(MAX_INT64_TEXT)).fillna(False).astype(bool) & (text > MAX_INT64_TEXT).fillna(False).astype(bool)
+    numeric &= ~too_big
+    invalid = (text.notna() & ~numeric).astype(bool)
+    if invalid.any():
+        return text.astype(STRING_IDS), invalid
+    return text.astype('Int64'), invalid
+
+
+def align_ids(*ids):
+    """Give ID columns from different files one type: Int64 unless any of them is text"""
+    if all(pd.api.types.is_integer_dtype(col.dtype) for col in ids):
+        return ids
+    return tuple(col.astype(STRING_IDS) for col in ids)
+
+
+def id_set(ids):
+    """Distinct non-blank IDs, for the three-way set comparisons"""
+    return set(ids.dropna().unique())
@@ -0,0 +1,76 @@
+"""
+Compact row lineage for loaded CDR rows
+
+Every CDR row used to carry its file name (SOURCE_FILE) and 'TOPUP' /
+'BUNDLES' (TRANSACTION_TYPE) as Python strings - tens of bytes per row,
+gigabytes over the full history. Rows now carry three small integers:
+
+    FILE_ID           int16   index into the run's file dictionary
+    ROW_IN_FILE       int32   0-based data row in that file (before screening)
+    TRANSACTION_TYPE  category over TRANSACTION_TYPES (int8 codes)
+
+and names are resolved only when a report is written:
+
+    lineage = FileLineage()
+    file_id = lineage.add(path)
+    lineage.stamp(df, file_id, 'TOPUP')
+    ...
+    report = lineage.resolve(category_a)   # adds SOURCE_FILE
+
+The file dictionary is a plain list, so it travels in a checkpoint
+manifest (to_list / from_list).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+TRANSACTION_TYPES = ('TOPUP', 'BUNDLES')
+
+
+def transaction_types(value, rows):
+    """A TRANSACTION_TYPE column of `rows` copies of value (int8 category codes)"""
+    codes = np.full(rows, TRANSACTION_TYPES.index(value), dtype=np.int8)
+    return pd.Categorical.from_codes(codes, categories=list(TRANSACTION_TYPES))
+
+
+class FileLineage:
+    """File dictionary of one run: FILE_ID -> file name"""
+
+    def __init__(self, files=None):
+        self.files = list(files or [])
+
+    def add(self, path):
+        """Register a file and return its FILE_ID"""
+        if len(self.files) > np.iinfo(np.int16).max:
+            raise ValueError(f'More than {np.iinfo(np.int16).max + 1} source files in one run')
+        self.files.append(os.path.basename(path))
+        return len(self.files) - 1
+
+    def stamp(self, df, file_id, transaction_type):
+        """Add FILE_ID, ROW_IN_FILE and TRANSACTION_TYPE to the rows of one file, in place"""
+        df['FILE_ID'] = np.full(len(df), file_id, dtype=np.int16)
+        df['ROW_IN_FILE'] = np.arange(len(df), dtype=np.int32)
+        df['TRANSACTION_TYPE'] = transaction_types(transaction_type, len(df))
+        return df
+
+    def names(self, file_ids):
+        """FILE_ID column -> categorical of file names (nulls where the ID is null)"""
+        codes = pd.Series(file_ids).fillna(-1).to_numpy(dtype=np.int64)
+        return pd.Categorical.from_codes(codes, categories=self.files)
+
+    def resolve(self, df, column='SOURCE_FILE'):
+        """Copy of df with the file name inserted before FILE_ID (for reports)"""
+        if 'FILE_ID' not in df.columns:
+            return df
+        df = df.copy()
+        df.insert(df.columns.get_loc('FILE_ID'), column, self.names(df['FILE_ID']))
+        return df
+
+    def to_list(self):
+        return list(self.files)
+
+    @classmethod
+    def from_list(cls, files):
+        return cls(files)
@@ -0,0 +1,460 @@
+"""
+Match strategies shared by the reconciliation scripts
+
+Each strategy takes the two sides as DataFrames (or key arrays) and returns
+positions into the right-hand side, so the same code runs on full frames
+in memory or partition by partition (see reconciliation/partition.py).
+"""
+
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86400 * 10**9
+
+
+def clean_phone(phone):
+    """Strip +52/52 prefixes, spaces and dashes; keep the last 10 digits"""
+    if pd.isna(phone):
+        return ''
+    phone_str = str(phone).strip()
+    phone_str = phone_str.replace('+52', '').replace('52', '', 1)
+    phone_str = phone_str.replace(' ', '').replace('-', '').replace('+', '')
+    return phone_str[-10:] if len(phone_str) >= 10 else phone_str
+
+
+def normalize_phones(phones):
+    """clean_phone() over a column, evaluated once per distinct value"""
+    phones = pd.Series(phones)
+    codes, uniques = pd.factorize(phones)
+    cleaned = np.array([clean_phone(value) for value in uniques] + [''], dtype=object)
+    # code -1 (null) picks the trailing '' entry
+    return pd.Series(cleaned[codes], index=phones.index, name=phones.name)
+
+
+def _datetime_ns(values):
+    """datetime-like column -> int64 nanoseconds (UTC for tz-aware), NaT -> min int"""
+    values = pd.Series(values)
+    if getattr(values.dt, 'tz', None) is not None:
+        values = values.dt.tz_convert(None)
+    return values.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+
+def _key_frame(keys):
+    """Series or DataFrame of key columns -> DataFrame with positional names K0..Kn"""
+    frame = keys.to_frame() if isinstance(keys, pd.Series) else pd.DataFrame(keys)
+    frame = frame.reset_index(drop=True)
+    frame.columns = [f'K{i}' for i in range(frame.shape[1])]
+    return frame
+
+
+def first_match(left_keys, right_keys):
+    """
+    Position of the first right row with the same key, or -1
+
+    Keys are a Series or a DataFrame of key columns (matched by position,
+    e.g. phone + amount cents + day), so composite keys join on the
+    columns themselves instead of concatenated strings. Same result as
+    `right[right[key] == k].iloc[0]` per left row, without the per-row scan.
+    """
+    left = _key_frame(left_keys)
+    right = _key_frame(right_keys)
+    right['RIGHT_POS'] = np.arange(len(right))
+    right = right.drop_duplicates(subset=list(left.columns), keep='first')
+
+    positions = left.merge(right, on=list(left.columns), how='left')['RIGHT_POS']
+    return positions.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def first_match_within_days(left_keys, left_dates, right_keys, right_dates, max_days):
+    """
+    First right row (in right order) with the same key and |date diff| <= max_days
+
+    Keys as in first_match(). Dates are whole days (claims have no time
+    of day), so the returned day difference is an integer. Returns
+    (positions, day_diffs) with -1 where nothing matched.
+    """
+    left = _key_frame(left_keys)
+    key_columns = list(left.columns)
+    left['LEFT_POS'] = np.arange(len(left))
+    left['LEFT_NS'] = _datetime_ns(left_dates)
+    left['LEFT_OK'] = pd.Series(left_dates).notna().to_numpy()
+
+    right = _key_frame(right_keys)
+    right['RIGHT_POS'] = np.arange(len(right))
+    right['RIGHT_NS'] = _datetime_ns(right_dates)
+    right['RIGHT_OK'] = pd.Series(right_dates).notna().to_numpy()
+
+    pairs = left[left['LEFT_OK']].merge(right[right['RIGHT_OK']], on=key_columns, how='inner')
+    # Timedelta.days floors, so -1.5 days counts as 2 days apart
+    diff_days = np.abs(np.floor_divide(pairs['LEFT_NS'].to_numpy() - pairs['RIGHT_NS'].to_numpy(), NS_PER_DAY))
+    pairs['DAYS'] = diff_days
+    pairs = pairs[pairs['DAYS'] <= max_days]
+    pairs = pairs.sort_values(['LEFT_POS', 'RIGHT_POS']).drop_duplicates('LEFT_POS', keep='first')
+
+    positions = np.full(len(left), -1, dtype=np.int64)
+    day_diffs = np.full(len(left), -1, dtype=np.int64)
+    positions[pairs['LEFT_POS'].to_numpy()] = pairs['RIGHT_POS'].to_numpy()
+    day_diffs[pairs['LEFT_POS'].to_numpy()] = pairs['DAYS'].to_numpy()
+    return positions, day_diffs
+
+
+# (name, factor, tolerance_cents): the right amount is the left amount x factor,
+# ± tolerance. Claims carry the face value; company records the amount sent,
+# which for open-range products is face / 1.16 (see test-vat-adjustment.js)
+AMOUNT_ADJUSTMENTS = (
+    ('VAT_16_REMOVED', 1 / 1.16, 1),
+    ('VAT_16_ADDED', 1.16, 1),
+)
+
+
+def _shared_codes(left, right):
+    """Integer code per key tuple, the same code for equal keys on either side"""
+    both = pd.concat([left, right], ignore_index=True)
+    codes = both.groupby(list(both.columns), sort=False, dropna=False).ngroup().to_numpy(dtype=np.int64)
+    return codes[:len(left)], codes[len(left):]
+
+
+# (code, cents) pairs pack into one int64 as code << 40 | cents + offset while
+# codes stay below PACKED_CODE_LIMIT; beyond that the shift would overflow
+PACKED_CODE_LIMIT = 1 << 23
+CENTS_OFFSET = 1 << 39
+
+
+def _pair_searchsorted(codes, cents, query_codes, query_cents, side):
+    """np.searchsorted over (code, cents) pairs sorted lexicographically"""
+    n = len(codes)
+    # Ties: a 'left' query goes before equal pairs, a 'right' query after them
+    query_tie, pair_tie = (0, 1) if side == 'left' else (1, 0)
+    tie = np.concatenate([np.full(n, pair_tie, dtype=np.int8), np.full(len(query_codes), query_tie, dtype=np.int8)])
+    order = np.lexsort((tie, np.concatenate([cents, query_cents]), np.concatenate([codes, query_codes])))
+    is_query = order >= n
+    pairs_ahead = np.cumsum(~is_query)
+    positions = np.empty(len(query_codes), dtype=np.int64)
+    positions[order[is_query] - n] = pairs_ahead[is_query]
+    return positions
+
+
+def _band_ranges(codes, cents, query_codes, low, high):
+    """
+    Rows with the same code and cents in [low, high], per query
+
+    Returns (order, starts, ends): order sorts the rows by (code, cents) and
+    query i owns order[starts[i]:ends[i]]. The pair is packed into one int64
+    key for a plain searchsorted when it fits, else both sides go through a
+    two-key lexsort (_pair_searchsorted), so millions of distinct phones
+    cannot overflow the key.
+    """
+    codes, cents = np.asarray(codes, dtype=np.int64), np.asarray(cents, dtype=np.int64)
+    query_codes = np.asarray(query_codes, dtype=np.int64)
+    low, high = np.asarray(low, dtype=np.int64), np.asarray(high, dtype=np.int64)
+    bounds = [values for values in (cents, low, high) if len(values)]
+    packable = (max((int(values.max()) for values in (codes, query_codes) if len(values)), default=0) < PACKED_CODE_LIMIT
+                and all(int(np.abs(values).max()) < CENTS_OFFSET for values in bounds))
+    if packable:
+        offset = np.int64(CENTS_OFFSET)
+        keys = (codes << 40) | (cents + offset)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.searchsorted(keys, (query_codes << 40) | (low + offset), side='left')
+        ends = np.searchsorted(keys, (query_codes << 40) | (high + offset), side='right')
+        return order, starts, ends
+    order = np.lexsort((cents, codes))
+    starts = _pair_searchsorted(codes[order], cents[order], query_codes, low, 'left')
+    ends = _pair_searchsorted(codes[order], cents[order], query_codes, high, 'right')
+    return order, starts, ends
+
+
+def first_match_amount_band(left_keys, left_cents, right_keys, right_cents, adjustments=AMOUNT_ADJUSTMENTS):
+    """
+    First right row with the same key and an amount explained by an adjustment
+
+    Keys as in first_match(); amounts are integer cents. Every left row
+    gets one interval per adjustment, [cents x factor ± tolerance], and
+    all of them are looked up in a single sorted pass over the right side
+    (_band_ranges on key code + cents), so adding factors adds intervals,
+    not passes. Adjustments are tried in list order, then
+    right order. Returns (positions, adjustment_index) with -1 where
+    nothing matched.
+    """
+    left = _key_frame(left_keys)
+    right = _key_frame(right_keys)
+    left_codes, right_codes = _shared_codes(left, right)
+    factors = np.array([factor for _, factor, _ in adjustments], dtype=float)
+    tolerances = np.array([tolerance for _, _, tolerance in adjustments], dtype=np.int64)
+
+    right_cents = pd.Series(right_cents).to_numpy(dtype=float, na_value=np.nan)
+    right_ok = np.flatnonzero(~np.isnan(right_cents))
+
+    left_cents = pd.Series(left_cents).to_numpy(dtype=float, na_value=np.nan)
+    left_ok = np.flatnonzero(~np.isnan(left_cents))
+    targets = np.rint(left_cents[left_ok, None] * factors[None, :]).astype(np.int64)
+    query_codes = np.repeat(left_codes[left_ok], len(adjustments))
+    order, starts, ends = _band_ranges(
+        right_codes[right_ok], right_cents[right_ok].astype(np.int64), query_codes,
+        (targets - tolerances).ravel(), (targets + tolerances).ravel()
+    )
+
+    interval, found = _expand_ranges(starts, ends)
+    left_pos = left_ok[interval // len(adjustments)]
+    adjustment = interval % len(adjustments)
+    right_pos = right_ok[order[found]]
+    best = np.lexsort((right_pos, adjustment, left_pos))
+    first = best[np.unique(left_pos[best], return_index=True)[1]]
+
+    positions = np.full(len(left), -1, dtype=np.int64)
+    adjustment_index = np.full(len(left), -1, dtype=np.int64)
+    positions[left_pos[first]] = right_pos[first]
+    adjustment_index[left_pos[first]] = adjustment[first]
+    return positions, adjustment_index
+
+
+MATCH_COLUMNS = ['TELEFONICA_INDEX', 'LATCOM_INDEX', 'MATCH_METHOD', 'DATE_DIFF_DAYS', 'DURATION_SECONDS']
+
+
+def match_phone_product_window(telefonica, latcom, window_days=7, method='PHONE_PRODUCT_DATE_WINDOW'):
+    """
+    Greedy phone+product+date-window matching (reconciliation_analysis step 5)
+
+    telefonica: TELEFONICA_INDEX, PHONE_PRODUCT, FECHA
+    latcom:     LATCOM_INDEX, PHONE_PRODUCT, DATE_PARSED, DURATION_SECONDS
+
+    Telefónica rows are taken in order; each one claims the closest
+    not-yet-matched Latcom row with the same key within ±window_days
+    (first one in Latcom order on ties). Latcom rows are sorted by key, each
+    claim's key becomes a searchsorted range, the ranges are expanded into
+    candidate pairs (_expand_ranges) and the pairs inside the window are
+    assigned as in _assign_closest().
+    """
+    telefonica = telefonica.dropna(subset=['FECHA'])
+    latcom = latcom.dropna(subset=['DATE_PARSED'])
+    if telefonica.empty or latcom.empty:
+        return pd.DataFrame(columns=MATCH_COLUMNS)
+
+    lc_keys = latcom['PHONE_PRODUCT'].to_numpy()
+    order = np.argsort(lc_keys, kind='stable')
+    tf_keys = telefonica['PHONE_PRODUCT'].to_numpy()
+    starts = np.searchsorted(lc_keys[order], tf_keys, side='left')
+    ends = np.searchsorted(lc_keys[order], tf_keys, side='right')
+    tf_rows, lc_rows = _expand_ranges(starts, ends)
+    lc_rows = order[lc_rows]
+
+    diffs = np.abs(_datetime_ns(telefonica['FECHA'])[tf_rows] - _datetime_ns(latcom['DATE_PARSED'])[lc_rows])
+    in_window = diffs <= window_days * NS_PER_DAY
+    return _assign_closest(telefonica, latcom, tf_rows[in_window], lc_rows[in_window], diffs[in_window], method)
+
+
+def _greedy_winners(tf_rows, lc_rows, diffs, n_latcom):
+    """
+    Positions of the pairs kept by the claim-order greedy: claims in order,
+    each taking its closest-dated CDR row (then CDR order) not already taken
+
+    Pairs are sorted once by (claim, diff, CDR row). A claim whose first
+    choice no other claim wants takes it without affecting anyone, so only
+    claims whose first choice is contended go through the sequential pass.
+    """
+    order = np.lexsort((lc_rows, diffs, tf_rows))
+    tf_sorted, lc_sorted = tf_rows[order], lc_rows[order]
+    first = np.unique(tf_sorted, return_index=True)[1]
+    wanted = np.bincount(lc_sorted, minlength=n_latcom)
+    free = wanted[lc_sorted[first]] == 1
+    winners = [first[free]]
+
+    contended = ~np.isin(tf_sorted, tf_sorted[first[free]])
+    used = np.zeros(n_latcom, dtype=bool)
+    picked, last_claim = [], None
+    positions = np.flatnonzero(contended)
+    for pos, claim, row in zip(positions.tolist(), tf_sorted[positions].tolist(), lc_sorted[positions].tolist()):
+        if claim == last_claim or used[row]:
+            continue
+        used[row] = True
+        last_claim = claim
+        picked.append(pos)
+    winners.append(np.array(picked, dtype=np.int64))
+    return order[np.concatenate(winners)]
+
+
+def _assign_closest(telefonica, latcom, tf_rows, lc_rows, diffs, method):
+    """
+    Candidate pairs (row positions + |date diff| in ns) -> one-to-one matches
+
+    Same assignment as looping over the claims in order and giving each
+    the closest-dated CDR row still free (first in CDR order on ties), see
+    _greedy_winners().
+    """
+    if len(tf_rows) == 0:
+        return pd.DataFrame(columns=MATCH_COLUMNS)
+    winners = _greedy_winners(tf_rows, lc_rows, diffs, len(latcom))
+    tf_rows, lc_rows, diffs = tf_rows[winners], lc_rows[winners], diffs[winners]
+    order = np.argsort(tf_rows, kind='stable')
+    tf_rows, lc_rows, diffs = tf_rows[order], lc_rows[order], diffs[order]
+
+    duration = latcom['DURATION_SECONDS'].to_numpy(dtype=float) if 'DURATION_SECONDS' in latcom else np.full(len(latcom), np.nan)
+    matches = pd.DataFrame({
+        'TELEFONICA_INDEX': telefonica['TELEFONICA_INDEX'].to_numpy()[tf_rows],
+        'LATCOM_INDEX': latcom['LATCOM_INDEX'].to_numpy()[lc_rows],
+        'MATCH_METHOD': method,
+        'DATE_DIFF_DAYS': diffs / 1e9 / 86400,
+        'DURATION_SECONDS': duration[lc_rows],
+    })
+    return matches[MATCH_COLUMNS]
+
+
+def _expand_ranges(starts, ends):
+    """Left position and right position for every right row in [starts[i], ends[i])"""
+    counts = np.maximum(ends - starts, 0)
+    left = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return left, np.repeat(starts, counts) + offsets
+
+
+def match_phone_amount_window(telefonica, latcom, window_days=7, tolerance_cents=1,
+                              method='TOPUP_PHONE_AMOUNT_DATE_WINDOW'):
+    """
+    TOPUP matching on phone + amount band + date window (reconciliation_analysis step 5)
+
+    telefonica: TELEFONICA_INDEX, PHONE_NORMALIZED, AMOUNT_CENTS, FECHA
+    latcom:     LATCOM_INDEX, PHONE_NORMALIZED, AMOUNT_CENTS, DATE_PARSED, DURATION_SECONDS
+
+    TOPUP CDRs carry no product, so the key is the phone plus the amount
+    within ±tolerance_cents. CDR rows are sorted on (phone code, cents),
+    each claim's amount band becomes a searchsorted range (_band_ranges), and the candidates in range within
+    ±window_days are assigned as in _assign_closest().
+    """
+    telefonica = telefonica.dropna(subset=['FECHA', 'AMOUNT_CENTS'])
+    latcom = latcom.dropna(subset=['DATE_PARSED', 'AMOUNT_CENTS'])
+    if telefonica.empty or latcom.empty:
+        return pd.DataFrame(columns=MATCH_COLUMNS)
+
+    # Phone codes shared by both sides
+    codes, _ = pd.factorize(pd.concat([telefonica['PHONE_NORMALIZED'], latcom['PHONE_NORMALIZED']], ignore_index=True)
+                            .astype(str).str.strip())
+    tf_codes, lc_codes = codes[:len(telefonica)].astype(np.int64), codes[len(telefonica):].astype(np.int64)
+    tf_cents = telefonica['AMOUNT_CENTS'].to_numpy(dtype=np.int64)
+
+    order, starts, ends = _band_ranges(lc_codes, latcom['AMOUNT_CENTS'].to_numpy(dtype=np.int64), tf_codes,
+                                       tf_cents - tolerance_cents, tf_cents + tolerance_cents)
+    tf_rows, lc_rows = _expand_ranges(starts, ends)
+    lc_rows = order[lc_rows]
+
+    tf_ns = _datetime_ns(telefonica['FECHA'])
+    lc_ns = _datetime_ns(latcom['DATE_PARSED'])
+    diffs = np.abs(tf_ns[tf_rows] - lc_ns[lc_rows])
+    in_window = diffs <= window_days * NS_PER_DAY
+    return _assign_closest(telefonica, latcom, tf_rows[in_window], lc_rows[in_window], diffs[in_window], method)
+
+
+def deletion_variants(phones):
+    """
+    (row, key) pairs: each phone itself plus the phone with one character deleted
+
+    Two phones within one substitution, insertion, deletion or adjacent
+    transposition always share at least one key (symmetric deletion), so
+    joining on these keys finds every fuzzy candidate without comparing
+    all pairs. Blank phones get no keys.
+    """
+    text = pd.Series(phones).reset_index(drop=True).astype(str).str.strip()
+    text = text[text.ne('') & text.ne('nan')]
+    lengths = text.str.len().to_numpy()
+
+    rows = [text.index.to_numpy()]
+    keys = [text.to_numpy(dtype=object)]
+    for i in range(int(lengths.max()) if len(lengths) else 0):
+        part = text[lengths > i]
+        rows.append(part.index.to_numpy())
+        keys.append((part.str[:i] + part.str[i + 1:]).to_numpy(dtype=object))
+
+    variants = pd.DataFrame({'ROW': np.concatenate(rows), 'KEY': np.concatenate(keys)})
+    return variants.drop_duplicates(ignore_index=True)
+
+
+def _code_points(values, width):
+    """Strings -> (n, width) uint32 code points, zero padded"""
+    return np.asarray(values, dtype=f'U{width}').view(np.uint32).reshape(len(values), width)
+
+
+def within_one_edit(left, right):
+    """
+    True where two strings differ by exactly one substitution, insertion,
+    deletion or adjacent transposition (equal strings are False)
+
+    Vectorized over aligned arrays of candidate pairs: both sides become
+    zero-padded code-point matrices and each kind of edit is a row-wise
+    comparison.
+    """
+    left = np.asarray(left, dtype=str)
+    right = np.asarray(right, dtype=str)
+    n = len(left)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    len_l = np.char.str_len(left)
+    len_r = np.char.str_len(right)
+    width = int(max(len_l.max(), len_r.max())) + 1
+    a = _code_points(left, width)
+    b = _code_points(right, width)
+    rows = np.arange(n)
+
+    # Same length: one substitution, or two adjacent positions swapped
+    diff = a != b
+    n_diff = diff.sum(axis=1)
+    first = diff.argmax(axis=1)
+    second = np.minimum(first + 1, width - 1)
+    same_length = len_l == len_r
+    substitution = same_length & (n_diff == 1)
+    transposition = (same_length & (n_diff == 2) & diff[rows, second]
+                     & (a[rows, first] == b[rows, second]) & (a[rows, second] == b[rows, first]))
+
+    # Lengths differ by one: after the first mismatch the shorter string
+    # must equal the longer one shifted left by one
+    longer = (len_l > len_r)[:, None]
+    long_side = np.where(longer, a, b)
+    short_side = np.where(longer, b, a)
+    shifted = np.concatenate([long_side[:, 1:], np.zeros((n, 1), dtype=np.uint32)], axis=1)
+    tail_equal = np.flip(np.cumprod(np.flip(short_side == shifted, axis=1), axis=1), axis=1).astype(bool)
+    mismatch = (long_side != short_side).argmax(axis=1)
+    indel = (np.abs(len_l - len_r) == 1) & tail_equal[rows, mismatch]
+
+    return substitution | transposition | indel
+
+
+def match_fuzzy_phone(telefonica, latcom, block_columns=('PRODUCT', 'AMOUNT_CENTS'), bucket_days=1,
+                      method='FUZZY_PHONE'):
+    """
+    Match claims to CDR rows whose phone is equal or one edit away (reconciliation_analysis step 5)
+
+    telefonica: TELEFONICA_INDEX, PHONE_NORMALIZED, FECHA, *block_columns
+    latcom:     LATCOM_INDEX, PHONE_NORMALIZED, DATE_PARSED, DURATION_SECONDS, *block_columns
+
+    Meant for rows the exact strategies left unmatched, with phones passed
+    through normalize_phones() so leftover 52 prefixes compare equal.
+    Candidates must share a date bucket (bucket_days wide), every block
+    column and a phone deletion variant; within_one_edit() then keeps the
+    real ones, which are assigned as in _assign_closest().
+    """
+    block_columns = list(block_columns)
+    telefonica = telefonica.dropna(subset=['FECHA'] + block_columns)
+    latcom = latcom.dropna(subset=['DATE_PARSED'] + block_columns)
+    if telefonica.empty or latcom.empty:
+        return pd.DataFrame(columns=MATCH_COLUMNS)
+
+    bucket_ns = bucket_days * NS_PER_DAY
+    tf_ns = _datetime_ns(telefonica['FECHA'])
+    lc_ns = _datetime_ns(latcom['DATE_PARSED'])
+
+    def blocked(side, ns):
+        variants = deletion_variants(side['PHONE_NORMALIZED'])
+        blocks = side[block_columns].reset_index(drop=True).assign(BUCKET=np.floor_divide(ns, bucket_ns))
+        return pd.concat([variants, blocks.take(variants['ROW'].to_numpy()).reset_index(drop=True)], axis=1)
+
+    keys = ['KEY', 'BUCKET'] + block_columns
+    pairs = (blocked(telefonica, tf_ns).merge(blocked(latcom, lc_ns), on=keys, suffixes=('_TF', '_LC'))
+             [['ROW_TF', 'ROW_LC']].drop_duplicates())
+    tf_rows = pairs['ROW_TF'].to_numpy()
+    lc_rows = pairs['ROW_LC'].to_numpy()
+
+    tf_phones = telefonica['PHONE_NORMALIZED'].astype(str).str.strip().to_numpy()[tf_rows]
+    lc_phones = latcom['PHONE_NORMALIZED'].astype(str).str.strip().to_numpy()[lc_rows]
+    fuzzy = (tf_phones == lc_phones) | within_one_edit(tf_phones, lc_phones)
+    tf_rows, lc_rows = tf_rows[fuzzy], lc_rows[fuzzy]
+    diffs = np.abs(tf_ns[tf_rows] - lc_ns[lc_rows])
+
+    return _assign_closest(telefonica, latcom, tf_rows, lc_rows, diffs, method)
@@ -0,0 +1,38 @@
+"""
+USD amounts as int64 cents
+
+ImpUSD / AMOUNT / TransactionAmountUSD arrive as floats. Summing a few
+million of them in float64 drifts by cents, and keys built from
+AMOUNT.round(2).astype(str) depend on float formatting ('10.0' vs
+'10.00'). Amounts are converted to whole cents once at ingestion; sums and
+join keys use the integers, and dollars only reappear for display.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def to_cents(values):
+    """Amounts (numbers or numeric text) -> nullable Int64 cents, half-cents rounded to even"""
+    values = pd.Series(values)
+    amounts = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+    return pd.Series(np.rint(amounts * 100), index=values.index, name=values.name).astype('Int64')
+
+
+def total_cents(cents):
+    """Exact sum of a cents column as a Python int (nulls count as 0)"""
+    return int(pd.Series(cents, dtype='Int64').sum())
+
+
+def cents_to_usd(cents):
+    """Cents -> dollars (float) for report cells; scalars or Series"""
+    if isinstance(cents, pd.Series):
+        return cents.astype('Float64') / 100
+    return int(cents) / 100
+
+
+def format_usd(cents):
+    """1234567 -> '12,345.67', formatted from the integer so it is exact"""
+    cents = int(cents)
+    dollars, rest = divmod(abs(cents), 100)
+    return f"{'-' if cents < 0 else ''}{dollars:,}.{rest:02d}"
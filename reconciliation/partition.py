@@ -0,0 +1,241 @@
+"""
+Hash-partitioned spill files for out-of-core matching
+
+Matching only ever compares rows that share a phone number, so both sides
+can be split by a hash of the normalized MSISDN into N partitions and
+matched one partition at a time. Rows are spilled to Parquet as they are
+produced (file by file, chunk by chunk) and read back per partition, so
+the matcher only holds ~1/N of each side at once.
+
+    left = SpillPartitions(spill_dir, 'telefonica', 16)
+    left.append(claims, claims['PHONE_NORMALIZED'])
+    ...
+    matches = match_partitions(left, right, match_phone_product_window, sort_by='TELEFONICA_INDEX')
+
+Chunks keep their append order inside each partition, so "first row wins"
+strategies give the same answer as on the full frame.
+
+Partitions are independent, so they can also be matched in parallel on
+a spawned process pool: match_partitions(..., workers=N) hands each worker
+a partition number plus the two SpillPartitions handles (directory paths)
+and the worker reads its rows from the Parquet chunks; match_sharded()
+spills in-memory frames into phone-hash shards first. Results are merged
+in a fixed order, so the output does not depend on the number of workers.
+Spawned workers re-import the calling script, so a script that matches in
+parallel keeps its body under `if __name__ == '__main__':`.
+"""
+
+import contextlib
+import glob
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from reconciliation.artifacts import PARQUET_COMPRESSION, _typed_for_parquet
+
+
+# Shards for a serial in-memory match that reports progress (one update per shard)
+SERIAL_SHARDS = 32
+
+
+def partition_count(default=0):
+    """Number of match partitions from RECON_MATCH_PARTITIONS (0 = in memory)"""
+    value = os.environ.get('RECON_MATCH_PARTITIONS', '')
+    return int(value) if value.strip() else default
+
+
+def worker_count(default=1, env='RECON_MATCH_WORKERS'):
+    """Number of processes from RECON_MATCH_WORKERS or another env variable (default: 1, serial)"""
+    value = os.environ.get(env, '')
+    return int(value) if value.strip() else default
+
+
+def partition_of(keys, n_partitions):
+    """
+    Partition number for each key
+
+    pandas' hash_array uses a fixed hash key, so the assignment is the
+    same across runs and processes (unlike Python's salted hash()).
+    """
+    keys = pd.Series(keys).astype(str).to_numpy(dtype=object)
+    return (pd.util.hash_array(keys) % np.uint64(n_partitions)).astype(np.int64)
+
+
+class SpillPartitions:
+    """One side of a match, hash-partitioned into Parquet chunk files"""
+
+    def __init__(self, spill_dir, side, n_partitions):
+        self.root = os.path.join(spill_dir, side)
+        self.n_partitions = n_partitions
+        self.rows = 0
+        self.partition_rows = np.zeros(n_partitions, dtype=np.int64)
+        self.columns = None
+        self._chunks = 0
+        for partition in range(n_partitions):
+            os.makedirs(self._partition_dir(partition), exist_ok=True)
+
+    def _partition_dir(self, partition):
+        return os.path.join(self.root, f'part-{partition:03d}')
+
+    def append(self, df, keys):
+        """Spill df, routing each row by the hash of its key"""
+        if df.empty:
+            return
+        parts = partition_of(keys, self.n_partitions)
+        df = _typed_for_parquet(df.reset_index(drop=True))
+        self.columns = self.columns or list(df.columns)
+        for partition in np.unique(parts):
+            chunk = df[parts == partition]
+            path = os.path.join(self._partition_dir(partition), f'chunk-{self._chunks:06d}.parquet')
+            chunk.to_parquet(path, index=False, compression=PARQUET_COMPRESSION)
+        self._chunks += 1
+        self.rows += len(df)
+        self.partition_rows += np.bincount(parts, minlength=self.n_partitions)
+
+    def read(self, partition, columns=None):
+        """All rows of one partition, in append order (empty frame if none)"""
+        files = sorted(glob.glob(os.path.join(self._partition_dir(partition), 'chunk-*.parquet')))
+        if not files:
+            return pd.DataFrame(columns=columns or self.columns or [])
+        return pd.concat([pd.read_parquet(path, columns=columns) for path in files], ignore_index=True)
+
+
+def spill_dir(base=None):
+    """Create a scratch directory for spill files (RECON_SPILL_DIR or system temp)"""
+    base = base or os.environ.get('RECON_SPILL_DIR') or None
+    if base:
+        os.makedirs(base, exist_ok=True)
+    return tempfile.mkdtemp(prefix='recon_spill_', dir=base)
+
+
+def remove_spill_dir(path):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def process_pool(workers):
+    """
+    Spawned process pool, or None to run serially
+
+    Spawn starts clean interpreters, which works on every platform
+    (forking a process that has loaded numpy / Accelerate is not safe on
+    macOS). Tasks must therefore be module-level functions whose arguments
+    pickle cheaply: paths and SpillPartitions handles, not frames.
+    """
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _run(task, shards, workers, progress=None, shard_rows=None):
+    """task(shard) for every shard, in shard order, on a pool when workers > 1"""
+    if progress is not None and progress.total is None:
+        progress.total = len(shards)
+    pool = process_pool(min(workers, len(shards)))
+    results = []
+    with pool if pool is not None else contextlib.nullcontext():
+        found_iter = pool.map(task, shards) if pool is not None else map(task, shards)
+        for shard, found in zip(shards, found_iter):
+            results.append(found)
+            if progress is not None:
+                progress.update(1, rows=shard_rows[shard] if shard_rows is not None else None, matches=len(found))
+    return results
+
+
+def _merge(results, empty, sort_by):
+    """Concatenate per-partition results in partition order, then stable-sort"""
+    results = [found for found in results if not found.empty]
+    if not results:
+        return empty()
+    merged = pd.concat(results, ignore_index=True)
+    if sort_by:
+        merged = merged.sort_values(sort_by, kind='stable').reset_index(drop=True)
+    return merged
+
+
+def _match_partition(left, right, match_fn, left_columns, right_columns, partition):
+    """One partition's matches; runs in a worker, reading its rows from the spill files"""
+    left_part = left.read(partition, left_columns)
+    if left_part.empty:
+        return left_part.iloc[0:0]
+    right_part = right.read(partition, right_columns)
+    if right_part.empty:
+        return right_part.iloc[0:0]
+    return match_fn(left_part, right_part)
+
+
+def match_partitions(left, right, match_fn, sort_by=None, left_columns=None, right_columns=None, workers=1,
+                     progress=None):
+    """
+    Run match_fn(left_part, right_part) on every partition and merge the results
+
+    match_fn returns a DataFrame of matches for one partition and must
+    accept empty frames; with workers > 1 it must also pickle (a
+    module-level function or a functools.partial of one). Partitions with
+    no rows on either side are skipped. Results are concatenated in
+    partition order and, with sort_by, stably sorted so the merged output
+    is identical to a single in-memory run, whatever the number of
+    workers. A Progress, if given, is advanced once per partition with its
+    row and match counts.
+    """
+    task = partial(_match_partition, left, right, match_fn, left_columns, right_columns)
+    results = _run(task, range(left.n_partitions), workers, progress, left.partition_rows)
+
+    def empty():
+        return match_fn(left.read(0, left_columns).iloc[0:0], right.read(0, right_columns).iloc[0:0])
+    return _merge(results, empty, sort_by)
+
+
+def _shard_positions(keys, n_shards):
+    """Row positions of each shard (by key hash), in row order"""
+    shards = partition_of(keys, n_shards)
+    order = np.argsort(shards, kind='stable')
+    bounds = np.searchsorted(shards[order], np.arange(n_shards + 1))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(n_shards)]
+
+
+def match_sharded(left, right, left_keys, right_keys, match_fn, sort_by=None, workers=1, n_shards=None,
+                  progress=None):
+    """
+    In-memory counterpart of match_partitions()
+
+    Rows are split into n_shards (default: 4 per worker, for load
+    balance) by the hash of their keys, spilled to a scratch directory
+    (spill_dir()) and matched with match_partitions() on `workers`
+    processes. Keys must keep every pair that can match in the same shard
+    (e.g. the normalized phone for phone+product matching).
+
+    With one worker and a Progress the frames are still split, into
+    SERIAL_SHARDS in-memory shards matched one after the other, so a long
+    serial match reports its rate, ETA and memory once per shard.
+    """
+    if left.empty or right.empty or (workers <= 1 and progress is None):
+        found = match_fn(left, right)
+        if progress is not None:
+            progress.update(1, rows=len(left), matches=len(found))
+        return found
+
+    if workers <= 1:
+        n_shards = n_shards or SERIAL_SHARDS
+        left_positions = _shard_positions(left_keys, n_shards)
+        right_positions = _shard_positions(right_keys, n_shards)
+        results = _run(lambda shard: match_fn(left.take(left_positions[shard]), right.take(right_positions[shard])),
+                       range(n_shards), 1, progress, [len(positions) for positions in left_positions])
+        return _merge(results, lambda: match_fn(left.iloc[0:0], right.iloc[0:0]), sort_by)
+
+    n_shards = n_shards or workers * 4
+    shard_dir = spill_dir()
+    try:
+        left_shards = SpillPartitions(shard_dir, 'left', n_shards)
+        right_shards = SpillPartitions(shard_dir, 'right', n_shards)
+        left_shards.append(left, left_keys)
+        right_shards.append(right, right_keys)
+        return match_partitions(left_shards, right_shards, match_fn, sort_by=sort_by, workers=workers,
+                                progress=progress)
+    finally:
+        remove_spill_dir(shard_dir)
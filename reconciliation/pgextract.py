@@ -0,0 +1,166 @@
+"""
+Bulk extract of the Node service's `transactions` table into Parquet
+
+The operator reconciliations read company records from hand-exported Excel
+workbooks under "Excel Workings", although the API already stores every
+transaction in Postgres (init-database-railway.js). extract_transactions()
+splits a date range into slices and streams each one with
+`COPY (SELECT ...) TO STDOUT (FORMAT csv)` on its own pooled connection,
+so several slices download in parallel and no row goes through a Python
+cursor. Each slice lands as one Parquet file in the company-record layout
+the scripts already read (DATETIME, MSISDN, AMOUNT, STATUS,
+TRANSACTION_ID, VENDOR_TRANSACTION_ID):
+
+    paths = extract_transactions(dsn, '2023-09-01', '2025-01-01', 'reconciliation_reports/company_db')
+    company = read_extracted('reconciliation_reports/company_db')
+
+Slices are written to a temporary name and renamed when complete, and a
+slice whose file already exists is skipped unless overwrite=True, so an
+interrupted extract resumes where it stopped. Only closed slices (ending
+at or before now) are skipped: the slice still receiving transactions is
+copied again on every run.
+
+Needs psycopg2 (pip install psycopg2-binary); the DSN defaults to
+DATABASE_PUBLIC_URL / DATABASE_URL like database-config.js.
+"""
+
+import glob
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from reconciliation.artifacts import PARQUET_COMPRESSION
+
+# transactions column -> company-record column
+COMPANY_COLUMNS = {
+    'created_at': 'DATETIME',
+    'phone': 'MSISDN',
+    'amount': 'AMOUNT',
+    'status': 'STATUS',
+    'transaction_id': 'TRANSACTION_ID',
+    'operator_transaction_id': 'VENDOR_TRANSACTION_ID',
+    'customer_id': 'CUSTOMER_ID',
+    'reference': 'REFERENCE',
+}
+
+# API statuses -> the spelling used in the exported workbooks
+COMPANY_STATUS = {'SUCCESS': 'Success', 'FAILED': 'Fail', 'PENDING': 'Pending'}
+
+COPY_SQL = (
+    "COPY (SELECT {columns} FROM transactions "
+    "WHERE created_at >= {start} AND created_at < {end} ORDER BY id) "
+    "TO STDOUT WITH (FORMAT csv, HEADER true)"
+)
+
+
+def database_url(dsn=None):
+    """DSN argument > DATABASE_PUBLIC_URL > DATABASE_URL"""
+    dsn = dsn or os.environ.get('DATABASE_PUBLIC_URL') or os.environ.get('DATABASE_URL')
+    if not dsn:
+        raise ValueError('No database URL: pass one or set DATABASE_PUBLIC_URL / DATABASE_URL')
+    return dsn
+
+
+def date_slices(start, end, slice_days=7):
+    """[start, end) as consecutive (slice_start, slice_end) Timestamps of slice_days"""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    bounds = list(pd.date_range(start, end, freq=f'{slice_days}D'))
+    if not bounds or bounds[-1] < end:
+        bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def slice_path(out_dir, slice_start, slice_end):
+    return os.path.join(out_dir, f"transactions_{slice_start:%Y%m%d}_{slice_end:%Y%m%d}.parquet")
+
+
+def _slice_done(out_dir, slice_start, slice_end, now=None):
+    """True when the slice is on disk and closed, i.e. no new rows can land in it"""
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    return slice_end <= now and os.path.exists(slice_path(out_dir, slice_start, slice_end))
+
+
+def _company_frame(raw):
+    """COPY csv of one slice -> company-record columns with typed values"""
+    frame = raw.rename(columns=COMPANY_COLUMNS)
+    frame['DATETIME'] = pd.to_datetime(frame['DATETIME'], errors='coerce')
+    frame['AMOUNT'] = pd.to_numeric(frame['AMOUNT'], errors='coerce')
+    frame['STATUS'] = frame['STATUS'].map(lambda status: COMPANY_STATUS.get(status, status))
+    return frame
+
+
+def _copy_slice(pool, out_dir, slice_start, slice_end):
+    """Stream one slice to Parquet; returns (path, rows)"""
+    from psycopg2 import sql
+
+    target = slice_path(out_dir, slice_start, slice_end)
+    query = sql.SQL(COPY_SQL).format(
+        columns=sql.SQL(', ').join(sql.Identifier(col) for col in COMPANY_COLUMNS),
+        start=sql.Literal(slice_start.to_pydatetime()),
+        end=sql.Literal(slice_end.to_pydatetime()),
+    )
+    conn = pool.getconn()
+    try:
+        with tempfile.TemporaryFile(mode='w+', newline='') as buffer:
+            with conn.cursor() as cur:
+                cur.copy_expert(query.as_string(conn), buffer)
+            conn.rollback()
+            buffer.seek(0)
+            raw = pd.read_csv(buffer, dtype={'phone': str, 'transaction_id': str,
+                                             'operator_transaction_id': str, 'customer_id': str,
+                                             'reference': str, 'status': str})
+    finally:
+        pool.putconn(conn)
+
+    frame = _company_frame(raw)
+    partial = f'{target}.partial'
+    frame.to_parquet(partial, index=False, compression=PARQUET_COMPRESSION)
+    os.replace(partial, target)
+    return target, len(frame)
+
+
+def extract_transactions(dsn, start, end, out_dir, slice_days=7, workers=4, overwrite=False, progress=None):
+    """
+    Copy transactions created in [start, end) into one Parquet file per slice
+
+    Slices run on `workers` threads sharing a connection pool of the same
+    size (COPY waits on the network, not on the GIL). Returns the slice
+    paths in date order, including slices already on disk (a slice ending
+    after now is always re-copied, its file may be short). A Progress,
+    if given, is advanced once per slice with its row count.
+    """
+    try:
+        from psycopg2.pool import ThreadedConnectionPool
+    except ImportError as e:
+        raise ImportError('extract_transactions needs psycopg2 (pip install psycopg2-binary)') from e
+
+    os.makedirs(out_dir, exist_ok=True)
+    slices = date_slices(start, end, slice_days)
+    todo = [(s, e) for s, e in slices if overwrite or not _slice_done(out_dir, s, e)]
+    if progress is not None and len(todo) < len(slices):
+        progress.update(len(slices) - len(todo), skipped=len(slices) - len(todo))
+    if todo:
+        pool = ThreadedConnectionPool(1, max(min(workers, len(todo)), 1), database_url(dsn))
+        try:
+            with ThreadPoolExecutor(max_workers=max(min(workers, len(todo)), 1)) as executor:
+                for _, rows in executor.map(lambda bounds: _copy_slice(pool, out_dir, *bounds), todo):
+                    if progress is not None:
+                        progress.update(1, rows=rows)
+        finally:
+            pool.closeall()
+    return [slice_path(out_dir, s, e) for s, e in slices]
+
+
+def extracted_files(out_dir):
+    """Slice files written by extract_transactions(), in date order"""
+    return sorted(glob.glob(os.path.join(out_dir, 'transactions_*_*.parquet')))
+
+
+def read_extracted(out_dir, columns=None):
+    """All extracted slices as one company-record frame"""
+    files = extracted_files(out_dir)
+    if not files:
+        return pd.DataFrame(columns=columns or list(COMPANY_COLUMNS.values()))
+    return pd.concat([pd.read_parquet(path, columns=columns) for path in files], ignore_index=True)
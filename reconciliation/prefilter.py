@@ -0,0 +1,123 @@
+"""
+Bloom-filter prefilter on claim keys
+
+Most rows of the Latcom CDR history never match a Telefónica claim, yet
+every one used to be parsed, normalized and kept in memory until the
+categorization step. ClaimKeyFilter holds two Bloom filters built from the
+claim side (normalized NUM_TELEFONO and SEC_ACTUACION); each CDR file is
+screened against them as it is loaded and only rows that might share a
+key with a claim are kept for exact matching. A Bloom filter has no false
+negatives, so no possible match is dropped; the few false positives are
+simply left unmatched by the exact matcher.
+
+With near_phones=True a third filter holds the deletion variants of the
+cleaned claim phones, so CDR rows whose phone is one edit away from a
+claim phone are kept for the fuzzy stage (match_fuzzy_phone) as well.
+
+    claim_filter = ClaimKeyFilter(tf['PHONE_NORMALIZED'], tf['SEC_ACTUACION'])
+    keep = claim_filter.candidates(cdr['PHONE_NORMALIZED'], cdr['VENDOR_TRANSACTION_ID'])
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from reconciliation.matching import deletion_variants, normalize_phones
+
+# Rows hashed per block when adding / probing (bounds the rows x hashes position array)
+BLOCK_ROWS = 1 << 18
+
+
+def key_hashes(values):
+    """
+    uint64 hash per non-null key, of its decimal / text form
+
+    Every value is hashed on its own, so a key hashes the same whatever
+    else is in the batch (a long or non-ASCII value elsewhere in a CDR file
+    changes nothing), and the Int64 ID 1000000001 hashes like the string
+    '1000000001' from a file whose IDs came back as text.
+    """
+    values = pd.Series(values).dropna()
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+class BloomFilter:
+    """Packed bit array sized for `capacity` keys at `error_rate` false positives"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.n_bits = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 64)
+        self.n_hashes = max(int(round(self.n_bits / capacity * math.log(2))), 1)
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+
+    @classmethod
+    def from_keys(cls, values, error_rate=0.001):
+        hashes = pd.unique(key_hashes(values))
+        bloom = cls(len(hashes), error_rate)
+        bloom.add_hashes(hashes)
+        return bloom
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def _positions(self, hashes):
+        # Double hashing: bit i of a key is (h1 + i * h2) mod n_bits, from the two 32-bit halves
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.n_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.n_bits)
+
+    def add_hashes(self, hashes):
+        # Set bits in an unpacked scratch array, then OR it in packed (bit p = byte p // 8, bit p % 8)
+        scratch = np.zeros(len(self.bits) * 8, dtype=bool)
+        for start in range(0, len(hashes), BLOCK_ROWS):
+            scratch[self._positions(hashes[start:start + BLOCK_ROWS]).ravel()] = True
+        self.bits |= np.packbits(scratch, bitorder='little')
+
+    def contains_hashes(self, hashes):
+        found = np.empty(len(hashes), dtype=bool)
+        for start in range(0, len(hashes), BLOCK_ROWS):
+            positions = self._positions(hashes[start:start + BLOCK_ROWS])
+            bit_set = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+            found[start:start + BLOCK_ROWS] = bit_set.all(axis=1)
+        return found
+
+    def might_contain(self, values):
+        """Boolean array aligned with values; nulls are never contained"""
+        values = pd.Series(values)
+        found = np.zeros(len(values), dtype=bool)
+        present = values.notna().to_numpy()
+        found[present] = self.contains_hashes(key_hashes(values[present]))
+        return found
+
+
+class ClaimKeyFilter:
+    """Bloom filters over the claim phones and transaction IDs (and near-miss phones)"""
+
+    def __init__(self, phones, transaction_ids=None, error_rate=0.001, near_phones=False):
+        self.phones = BloomFilter.from_keys(phones, error_rate)
+        self.ids = None
+        if transaction_ids is not None:
+            self.ids = BloomFilter.from_keys(transaction_ids, error_rate)
+        self.near_phones = None
+        if near_phones:
+            self.near_phones = BloomFilter.from_keys(deletion_variants(normalize_phones(phones))['KEY'], error_rate)
+
+    @property
+    def nbytes(self):
+        return sum(bloom.nbytes for bloom in (self.phones, self.ids, self.near_phones) if bloom is not None)
+
+    def candidates(self, phones, transaction_ids=None):
+        """Rows whose phone or transaction ID may appear in the claims"""
+        keep = self.phones.might_contain(phones)
+        if self.ids is not None and transaction_ids is not None:
+            keep |= self.ids.might_contain(transaction_ids)
+        if self.near_phones is not None and not keep.all():
+            # Only rows not already kept need the (one probe per deleted digit) near-miss check
+            rest = np.flatnonzero(~keep)
+            variants = deletion_variants(normalize_phones(pd.Series(phones).iloc[rest]))
+            hits = variants.loc[self.near_phones.might_contain(variants['KEY']), 'ROW'].to_numpy()
+            keep[rest[hits]] = True
+        return keep
@@ -0,0 +1,94 @@
+"""
+Product code handling for Latcom BUNDLES / Telefónica claims
+
+Latcom workbooks carry the product under different headers depending on
+the month ('Product', 'Product MobiFin', 'Product MoviStar', ...). These
+helpers coalesce them into a single categorical PRODUCT_NORMALIZED column
+and build integer phone+product keys for matching.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Map Telefónica product codes to Latcom product codes
+PRODUCT_MAPPING = {
+    'BFRECINT': 'TEMXN_BFRECINT_30_DAYS',
+    'BFSPRINT': 'TEMXN_BFSPRINT_UNLIMITED_30_DAYS',
+    'BFRIQUIN': 'TEMXN_BFRIQUIN_28_DAYS',
+    'BFRISEM': 'TEMXN_BFRISEM_7_DAYS',
+    'BFRIMEN': 'TEMXN_BFRIMEN_15_DAYS',
+    'PQRI412D': 'TEM_4GB_12_DAYS',
+    'PQRI3G9D': 'TEM_3GB_9_DAYS',
+    'PQRI2G7D': 'TEM_2GB_7_DAYS',
+    'PQRI1G4D': 'TEM_1GB_3_DAYS',  # Found this in bundles!
+    'PQRI6M2D': 'TEM_600MB_2_DAYS',
+}
+
+# Product column names seen across the monthly workbooks, in priority order
+PRODUCT_COLUMNS = ['Product', 'Product MobiFin', 'Product MoviStar', 'Product Sagar', 'Product ']
+
+# Values that mean "no product" once stringified
+EMPTY_PRODUCT_VALUES = {'', 'nan', 'None'}
+
+
+def product_columns_in(df, columns=None):
+    """Return the product columns present in df, in priority order"""
+    return [col for col in (columns or PRODUCT_COLUMNS) if col in df.columns]
+
+
+def normalize_products(df, columns=None):
+    """
+    Coalesce the product columns into one categorical Series
+
+    The first non-null, non-empty value across the product columns wins
+    (same precedence as the old masked .loc loop). Stringifying, stripping
+    and blanking 'nan'/'None' is done once per distinct product instead of
+    once per row. Rows without a product get the '' category.
+    """
+    columns = product_columns_in(df, columns)
+    if not columns:
+        return pd.Series(pd.Categorical([''] * len(df)), index=df.index, name='PRODUCT_NORMALIZED')
+
+    values = df[columns].to_numpy(dtype=object)
+    present = pd.notna(values) & (values != '')
+
+    # First non-null column per row (argmax of a bool matrix = first True)
+    first = present.argmax(axis=1)
+    picked = values[np.arange(len(values)), first]
+    picked[~present.any(axis=1)] = ''
+
+    # Clean each distinct raw value once, then collapse duplicates that
+    # only differed before cleaning (e.g. 'X ' and 'X')
+    raw_codes, raw_uniques = pd.factorize(picked)
+    labels = [str(value).strip() for value in raw_uniques]
+    labels = ['' if label in EMPTY_PRODUCT_VALUES else label for label in labels]
+    label_codes, categories = pd.factorize(np.array(labels, dtype=object))
+
+    codes = label_codes[raw_codes] if len(raw_codes) else raw_codes
+    products = pd.Categorical.from_codes(codes, categories=categories)
+    return pd.Series(products, index=df.index, name='PRODUCT_NORMALIZED')
+
+
+def phone_product_keys(left_phone, left_product, right_phone, right_product):
+    """
+    Build integer phone+product keys for two sides of a match
+
+    Phones and products are encoded against categories shared by both
+    sides, so equal (phone, product) pairs get the same int64 key. This
+    replaces the concatenated 'phone|product' strings.
+    """
+    left_phone = pd.Series(left_phone).astype('category')
+    right_phone = pd.Series(right_phone).astype('category')
+    left_product = pd.Series(left_product).astype('category')
+    right_product = pd.Series(right_product).astype('category')
+
+    phones = left_phone.cat.categories.union(right_phone.cat.categories)
+    products = left_product.cat.categories.union(right_product.cat.categories)
+    n_products = max(len(products), 1)
+
+    def encode(phone, product):
+        phone_codes = pd.Categorical(phone, categories=phones).codes.astype(np.int64)
+        product_codes = pd.Categorical(product, categories=products).codes.astype(np.int64)
+        return phone_codes * n_products + product_codes
+
+    return encode(left_phone, left_product), encode(right_phone, right_product)
@@ -0,0 +1,159 @@
+"""
+Progress and telemetry for long pipeline stages
+
+Long steps used to print either nothing or a line every 5% of the rows,
+with no rate, no ETA and no sign of memory pressure, so an overnight audit
+could not be told apart from a stuck one. Progress reports on a clock
+instead (every RECON_PROGRESS_SECONDS, default 10):
+
+    ⏳ Loading CDR files: 12/32 files (37.5%) · 184,220 rows/s · ETA 0:00:41 · RSS 1,240 MB · kept 8,311
+
+and, with RECON_PROGRESS_LOG set, appends one JSON object per event
+(start / progress / end / error) to that file, so a run can be followed
+with tail -f and its slow stages found afterwards.
+
+    with Progress('Loading CDR files', total=len(paths), unit='files') as progress:
+        for path in paths:
+            ...
+            progress.update(rows=len(df), kept=len(kept))
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+PROGRESS_SECONDS = float(os.environ.get('RECON_PROGRESS_SECONDS', '10'))
+PROGRESS_LOG = os.environ.get('RECON_PROGRESS_LOG', '')
+
+# Ties together the events of one script run in a shared log file
+RUN_ID = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+
+def memory_mb():
+    """Current resident memory of this process in MB (None when it cannot be read)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        pass
+    # No /proc (macOS, BSD): ps reports the current RSS in KB. ru_maxrss is
+    # only the peak, which never goes down, so it is not used as a stand-in.
+    try:
+        out = subprocess.run(['ps', '-o', 'rss=', '-p', str(os.getpid())],
+                             capture_output=True, text=True, timeout=5).stdout
+        return int(out.split()[0]) / 1024
+    except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+        return None
+
+
+def log_event(event, stage, **fields):
+    """Append one JSON event to RECON_PROGRESS_LOG (no-op when unset)"""
+    if not PROGRESS_LOG:
+        return
+    record = {
+        'ts': datetime.now().isoformat(timespec='milliseconds'),
+        'run': RUN_ID,
+        'script': os.path.basename(sys.argv[0]),
+        'event': event,
+        'stage': stage,
+    }
+    record.update(fields)
+    with open(PROGRESS_LOG, 'a') as f:
+        f.write(json.dumps(record, default=str) + '\n')
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class Progress:
+    """
+    Counts work done in a stage and reports it at most every `every` seconds
+
+    update(n, rows=..., **counts) adds n units (files, shards, months...),
+    the rows they held and any named counters (matches, kept...). With
+    unit='rows' the units are the rows. finish() prints the closing line;
+    used as a context manager it is called on exit.
+    """
+
+    def __init__(self, stage, total=None, unit='rows', every=None, indent='    '):
+        self.stage = stage
+        self.total = total
+        self.unit = unit
+        self.every = PROGRESS_SECONDS if every is None else every
+        self.indent = indent
+        self.done = 0
+        self.rows = 0
+        self.counts = {}
+        self.finished = False
+        self.started = self.last = time.monotonic()
+        log_event('start', stage, total=total, unit=unit, rss_mb=memory_mb())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            log_event('error', self.stage, error=f"{exc_type.__name__}: {exc}", **self.snapshot())
+            self.finished = True
+        else:
+            self.finish()
+        return False
+
+    def update(self, n=1, rows=None, **counts):
+        self.done += n
+        self.rows += int(n if self.unit == 'rows' else (rows or 0))
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + int(value)
+
+        now = time.monotonic()
+        if now - self.last >= self.every:
+            self.last = now
+            self._report('progress', now)
+
+    def snapshot(self, now=None):
+        """Current figures as a dict (the payload of every logged event)"""
+        elapsed = (now or time.monotonic()) - self.started
+        rate = self.rows / elapsed if elapsed > 0 else None
+        eta = None
+        if self.total and self.done:
+            eta = elapsed / self.done * max(self.total - self.done, 0)
+        return {
+            'done': self.done, 'total': self.total, 'unit': self.unit, 'rows': self.rows,
+            'elapsed_s': round(elapsed, 3), 'rows_per_s': round(rate, 1) if rate is not None else None,
+            'eta_s': round(eta, 1) if eta is not None else None, 'rss_mb': memory_mb(),
+            'counts': dict(self.counts),
+        }
+
+    def _line(self, figures):
+        parts = [f"{figures['done']:,}" + (f"/{self.total:,}" if self.total else '') + f" {self.unit}"]
+        if self.total:
+            parts[0] += f" ({figures['done'] / self.total * 100:.1f}%)"
+        if self.rows and figures['rows_per_s'] is not None:
+            parts.append(f"{figures['rows_per_s']:,.0f} rows/s")
+        if figures['eta_s'] is not None and figures['done'] < (self.total or 0):
+            parts.append(f"ETA {format_duration(figures['eta_s'])}")
+        if figures['rss_mb'] is not None:
+            parts.append(f"RSS {figures['rss_mb']:,.0f} MB")
+        parts += [f"{name} {value:,}" for name, value in self.counts.items()]
+        return ' · '.join(parts)
+
+    def _report(self, event, now):
+        figures = self.snapshot(now)
+        print(f"{self.indent}⏳ {self.stage}: {self._line(figures)}", flush=True)
+        log_event(event, self.stage, **figures)
+
+    def finish(self, **counts):
+        if self.finished:
+            return
+        self.finished = True
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + int(value)
+        figures = self.snapshot()
+        print(f"{self.indent}⏱  {self.stage}: {self._line(figures)} in {format_duration(figures['elapsed_s'])}",
+              flush=True)
+        log_event('end', self.stage, **figures)
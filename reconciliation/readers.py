@@ -0,0 +1,152 @@
+"""
+Pick the right reader for a source file up front
+
+Operator and Latcom files arrive as .xlsx, legacy .xls or CSV in UTF-8
+(with or without BOM) or Latin-1, and the extension is not reliable. The
+old loaders tried read_csv, read_excel and read_csv(latin1) in turn, so a
+large file could be fully parsed two or three times before the right
+reader won. sniff_format() decides from the first bytes instead: zip
+magic means xlsx, OLE2 magic means xls, otherwise a text sample is decoded
+to choose the encoding. The result is cached per (path, size, mtime).
+
+Parsing a workbook is CPU-bound, so read_tables() parses many files on a
+spawned process pool: a job is only a path, so nothing has to be
+inherited from the caller, and spawn is safe on macOS. Each worker sends
+its frame back as an Arrow IPC stream, one contiguous buffer instead of a
+pickle of every cell, and the files come back in input order while the
+next ones are being parsed:
+
+    for path, df, error in read_tables(files, workers=4, dtype=ID_DTYPES):
+        ...
+"""
+
+import codecs
+import os
+from collections import deque, namedtuple
+
+import pandas as pd
+import pyarrow as pa
+
+from reconciliation.partition import process_pool
+
+FileFormat = namedtuple('FileFormat', ['kind', 'encoding'])
+
+XLSX_MAGIC = b'PK\x03\x04'                       # xlsx is a zip archive
+XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'   # OLE2 compound document
+SAMPLE_BYTES = 1 << 20
+
+# (abspath, size, mtime) -> FileFormat
+_FORMATS = {}
+
+
+def _cache_key(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime
+
+
+def _sniff(path):
+    with open(path, 'rb') as f:
+        sample = f.read(SAMPLE_BYTES)
+
+    if sample.startswith(XLSX_MAGIC):
+        return FileFormat('xlsx', None)
+    if sample.startswith(XLS_MAGIC):
+        return FileFormat('xls', None)
+
+    # utf-8-sig reads plain UTF-8 too; the incremental decoder tolerates a
+    # multi-byte character cut off at the end of the sample
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=len(sample) < SAMPLE_BYTES)
+        return FileFormat('csv', 'utf-8-sig')
+    except UnicodeDecodeError:
+        return FileFormat('csv', 'latin1')
+
+
+def sniff_format(path):
+    """FileFormat(kind='xlsx' | 'xls' | 'csv', encoding) for path, cached until the file changes"""
+    key = _cache_key(path)
+    if key not in _FORMATS:
+        _FORMATS[key] = _sniff(path)
+    return _FORMATS[key]
+
+
+def read_table(path, sheet_name=0, **kwargs):
+    """
+    Read a CSV / xlsx / xls file with the reader its content calls for
+
+    Extra keyword arguments go to the chosen pandas reader; sheet_name
+    only applies to workbooks.
+    """
+    fmt = sniff_format(path)
+    if fmt.kind == 'xlsx':
+        return pd.read_excel(path, sheet_name=sheet_name, engine='openpyxl', **kwargs)
+    if fmt.kind == 'xls':
+        return pd.read_excel(path, sheet_name=sheet_name, **kwargs)
+    try:
+        return pd.read_csv(path, encoding=fmt.encoding, **kwargs)
+    except UnicodeDecodeError:
+        # Non-UTF-8 bytes past the sniffed sample: remember Latin-1 for next time
+        _FORMATS[_cache_key(path)] = FileFormat('csv', 'latin1')
+        return pd.read_csv(path, encoding='latin1', **kwargs)
+
+
+def _to_ipc(df):
+    """Arrow IPC stream of df, or df itself when a column will not convert (mixed cell types)"""
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return df
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _from_ipc(data):
+    if isinstance(data, pd.DataFrame):
+        return data
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+def _read_job(job):
+    # Runs in a worker: errors travel back as text so any exception type is safe to return
+    path, kwargs = job
+    try:
+        return _to_ipc(read_table(path, **kwargs)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def read_tables(paths, workers=1, **kwargs):
+    """
+    Yield (path, df, error) for each path in order, read with read_table(path, **kwargs)
+
+    error is the message of a failed read (df is then None). With workers > 1
+    files are parsed on a spawned process pool (callers run under
+    `if __name__ == '__main__':`); at most 2 x workers parsed files
+    wait in memory, so a slow consumer does not hold every file at once.
+    """
+    paths = list(paths)
+    pool = process_pool(min(workers, len(paths)))
+    if pool is None:
+        for path in paths:
+            try:
+                yield path, read_table(path, **kwargs), None
+            except Exception as e:
+                yield path, None, str(e)
+        return
+
+    with pool:
+        jobs = iter([(path, kwargs) for path in paths])
+        pending = deque()
+        for job in jobs:
+            pending.append((job[0], pool.submit(_read_job, job)))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            path, future = pending.popleft()
+            job = next(jobs, None)
+            if job is not None:
+                pending.append((job[0], pool.submit(_read_job, job)))
+            data, error = future.result()
+            yield path, (_from_ipc(data) if error is None else None), error
@@ -0,0 +1,79 @@
+"""
+Category frames from match positions
+
+Category A used to be matches.merge(claims).merge(cdrs): two hash joins
+on index columns and a wide temporary frame with every column of both
+sides; C and D were isin() over Python sets. MatchPositions keeps the
+matches as two int32 position arrays into the claim and CDR frames plus
+one matched bitmap per side, so:
+
+    positions = MatchPositions(matches, claims['TELEFONICA_INDEX'], cdrs['LATCOM_INDEX'])
+    category_a = positions.matched(matches, claims, cdrs, right_columns=[...])   # take() per column
+    category_c = positions.unmatched_left(claims)                              # boolean mask
+    category_d = positions.unmatched_right(cdrs)
+
+Every step is a gather or a mask over the rows, O(n) with no join.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def index_positions(index_values, ids):
+    """
+    Row position of each id in an index column (ids must be present)
+
+    TELEFONICA_INDEX / LATCOM_INDEX are ascending row numbers (LATCOM_INDEX
+    has gaps where screening dropped rows), so this is a binary search.
+    """
+    index_values = pd.Series(index_values).to_numpy()
+    ids = pd.Series(ids).to_numpy(dtype=index_values.dtype)
+    if len(index_values) and not np.all(index_values[1:] >= index_values[:-1]):
+        return pd.Index(index_values).get_indexer(ids)
+    return np.searchsorted(index_values, ids)
+
+
+def _take(df, positions, columns):
+    columns = list(df.columns) if columns is None else [col for col in columns if col in df.columns]
+    # .array keeps nullable / categorical dtypes
+    return {col: df[col].take(positions).array for col in columns}
+
+
+class MatchPositions:
+    """One-to-one matches as int32 positions into the left (claims) and right (CDR) frames"""
+
+    def __init__(self, matches, left_index, right_index):
+        self.left = index_positions(left_index, matches['TELEFONICA_INDEX']).astype(np.int32)
+        self.right = index_positions(right_index, matches['LATCOM_INDEX']).astype(np.int32)
+        self.left_matched = np.zeros(len(left_index), dtype=bool)
+        self.left_matched[self.left] = True
+        self.right_matched = np.zeros(len(right_index), dtype=bool)
+        self.right_matched[self.right] = True
+
+    def matched(self, matches, left, right, left_columns=None, right_columns=None,
+                suffixes=('_TELEFONICA', '_LATCOM')):
+        """
+        One row per match: the match columns, then the chosen claim and CDR columns
+
+        Columns present on both sides get the suffixes (as the old merge did);
+        the index columns come from the match frame once.
+        """
+        match_part = {col: matches[col].to_numpy() for col in matches.columns}
+        left_part = _take(left, self.left, left_columns)
+        right_part = _take(right, self.right, right_columns)
+        data = dict(match_part)
+        for part, other, suffix in ((left_part, right_part, suffixes[0]), (right_part, left_part, suffixes[1])):
+            for col, values in part.items():
+                if col in match_part:
+                    continue
+                data[f'{col}{suffix}' if col in other else col] = values
+        return pd.DataFrame(data)
+
+    def unmatched_left(self, left, columns=None):
+        return left.loc[~self.left_matched, list(left.columns) if columns is None else columns]
+
+    def unmatched_right(self, right, columns=None):
+        return right.loc[~self.right_matched, list(right.columns) if columns is None else columns]
+
+    def matched_right(self, right, columns=None):
+        return right.loc[self.right_matched, list(right.columns) if columns is None else columns]
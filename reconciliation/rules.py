@@ -0,0 +1,88 @@
+"""
+Declarative categorization rules, applied in one vectorized pass
+
+The scripts sorted rows into categories with one boolean filter and
+.copy() per category (successful / failed / not found, SUCCESS-SUCCESS /
+FAIL-FAIL / ...), each a full scan of the frame. A category table is now
+plain data, checked in order, first match wins:
+
+    DISPUTE_RULES = (
+        ('SUCCESSFUL', {'STATUS': 'Success'}),
+        ('FAILED', {'STATUS': 'Fail'}),
+        ('NOT_FOUND', {'STATUS': None}),
+    )
+    rules = RuleTable(DISPUTE_RULES, default='OTHER')
+    category = rules.assign(df)            # one np.select over all rows
+    parts = rules.split(df, category)      # {name: rows}, one groupby
+
+A condition maps a column to a value (equality), None (null), a
+list / tuple / set (membership) or a callable taking the column and
+returning a mask; the conditions of one rule are ANDed. Categories come
+back as a Categorical with int8 codes in table order, so counts and
+amounts per category are a bincount / groupby on the codes.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _condition_mask(df, column, expected):
+    values = df[column]
+    if expected is None:
+        mask = values.isna()
+    elif callable(expected):
+        mask = expected(values)
+    elif isinstance(expected, (list, tuple, set, frozenset)):
+        mask = values.isin(list(expected))
+    else:
+        mask = values.eq(expected)
+    return np.asarray(mask, dtype=bool)
+
+
+class RuleTable:
+    """Ordered (name, {column: condition}) rules plus a default category"""
+
+    def __init__(self, rules, default='OTHER'):
+        self.rules = [(name, dict(conditions)) for name, conditions in rules]
+        self.default = default
+        self.names = [name for name, _ in self.rules] + [default]
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f'Duplicate category names in rule table: {self.names}')
+
+    def masks(self, df):
+        """One boolean mask per rule (conditions ANDed)"""
+        masks = []
+        for _, conditions in self.rules:
+            mask = np.ones(len(df), dtype=bool)
+            for column, expected in conditions.items():
+                mask &= _condition_mask(df, column, expected)
+            masks.append(mask)
+        return masks
+
+    def codes(self, df):
+        """int8 category code per row (rule position, default last)"""
+        codes = np.select(self.masks(df), np.arange(len(self.rules)), default=len(self.rules))
+        return codes.astype(np.int8)
+
+    def assign(self, df):
+        """Category of every row as a Categorical over self.names"""
+        return pd.Categorical.from_codes(self.codes(df), categories=self.names)
+
+    def counts(self, category):
+        """{name: rows} for every category, empty ones included"""
+        counts = np.bincount(pd.Categorical(category).codes, minlength=len(self.names))
+        return dict(zip(self.names, counts.tolist()))
+
+    def split(self, df, category, columns=None):
+        """
+        {name: rows of that category} for every category, empty ones included
+
+        One groupby over the codes gives each category's row positions
+        (original order kept); every frame is a single take() of them.
+        """
+        codes = pd.Categorical(category).codes
+        columns = list(df.columns) if columns is None else columns
+        positions = pd.Series(codes).groupby(codes, sort=False).indices
+        empty = np.array([], dtype=np.int64)
+        return {name: df[columns].take(positions.get(code, empty))
+                for code, name in enumerate(self.names)}
@@ -0,0 +1,67 @@
+"""
+Matched-row state shared by cascaded match strategies
+
+Scripts run several strategies in turn, each on the rows the earlier ones
+left unmatched. reconcile-enhanced.py found those rows by filtering the
+whole results frame on MATCH_STRATEGY.isna() before every strategy, and
+reconciliation_analysis.py kept the matched indices in Python sets.
+MatchState holds one NumPy bool bitmap per side instead:
+
+    state = MatchState(claims['TELEFONICA_INDEX'], cdrs['LATCOM_INDEX'])
+    found = strategy(claims.take(state.pending_left()), cdrs.take(state.pending_right()))
+    state.mark(found['TELEFONICA_INDEX'], found['LATCOM_INDEX'])
+
+pending_*() are position arrays of the rows still open, so each strategy
+only touches those rows. mark() checks the whole batch before setting any
+bit, so a strategy that would re-use a row fails without leaving the
+state half-updated. The right side is optional for strategies where one
+company row may explain several claims.
+"""
+
+import numpy as np
+
+from reconciliation.results import index_positions
+
+
+class MatchState:
+    """One matched bitmap per side, addressed by the sides' index columns"""
+
+    def __init__(self, left_ids, right_ids=None):
+        self.left_ids = np.asarray(left_ids)
+        self.right_ids = None if right_ids is None else np.asarray(right_ids)
+        self.left_matched = np.zeros(len(self.left_ids), dtype=bool)
+        self.right_matched = None if right_ids is None else np.zeros(len(self.right_ids), dtype=bool)
+
+    def pending_left(self):
+        """Positions of the left rows not matched yet"""
+        return np.flatnonzero(~self.left_matched)
+
+    def pending_right(self):
+        """Positions of the right rows not matched yet"""
+        return np.flatnonzero(~self.right_matched)
+
+    def mark(self, left_ids, right_ids=None):
+        """
+        Mark one strategy's winners as matched; returns the number of matches
+
+        Raises ValueError (and marks nothing) when a row is already
+        matched or appears twice in the batch.
+        """
+        left = index_positions(self.left_ids, left_ids)
+        batches = [(self.left_matched, left, 'left')]
+        if right_ids is not None and self.right_matched is not None:
+            batches.append((self.right_matched, index_positions(self.right_ids, right_ids), 'right'))
+        for bitmap, positions, side in batches:
+            if bitmap[positions].any() or len(np.unique(positions)) != len(positions):
+                raise ValueError(f'Strategy re-used a {side} row that is already matched')
+        for bitmap, positions, _ in batches:
+            bitmap[positions] = True
+        return len(left)
+
+    @property
+    def left_count(self):
+        return int(self.left_matched.sum())
+
+    @property
+    def right_count(self):
+        return int(self.right_matched.sum()) if self.right_matched is not None else 0
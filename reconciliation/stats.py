@@ -0,0 +1,187 @@
+"""
+One-pass column profiles collected while files stream in
+
+The scripts used to print date ranges, distinct phones, status counts and
+missing-value counts by scanning the loaded frames again, one full pass
+per figure and per side. ColumnProfiles is fed each chunk once, as it
+arrives, and keeps per column:
+
+    rows, nulls, empty ('' strings), min / max (dates and numbers),
+    approximate distinct count (HyperLogLog), top values (bounded counter)
+
+    profiles = ColumnProfiles(['DATE_PARSED', 'PHONE_NORMALIZED', 'STATUS'], top=['STATUS'])
+    for df in chunks:
+        profiles.update(df)
+    profiles['PHONE_NORMALIZED'].distinct
+
+Profiles serialize to plain JSON (to_dict / from_dict), so they travel in
+a checkpoint manifest and the printouts and quality sheet are served from
+there without touching the data again.
+"""
+
+import base64
+import math
+
+import numpy as np
+import pandas as pd
+
+from reconciliation.prefilter import key_hashes
+
+# HyperLogLog registers = 2**HLL_PRECISION (16 KB, ~0.8% standard error)
+HLL_PRECISION = 14
+# Values kept per top-k counter before the rarest are dropped
+TOP_CAPACITY = 1000
+
+
+def _bit_length(values):
+    """Exact bit length of each uint64 (0 -> 0)"""
+    values = values.copy()
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= (np.uint64(1) << np.uint64(shift))
+        lengths += shift * high
+        values = np.where(high, values >> np.uint64(shift), values)
+    return lengths + (values > 0)
+
+
+class HyperLogLog:
+    """Approximate distinct count over uint64 hashes"""
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return
+        tail_bits = 64 - self.precision
+        index = (hashes >> np.uint64(tail_bits)).astype(np.int64)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        rank = (tail_bits - _bit_length(tail) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': base64.b64encode(self.registers.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data):
+        registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        return cls(data['precision'], registers)
+
+
+class ColumnProfile:
+    """Running profile of one column"""
+
+    def __init__(self, name, top=False):
+        self.name = name
+        self.rows = 0
+        self.nulls = 0
+        self.empty = 0
+        self.min = None
+        self.max = None
+        self.hll = HyperLogLog()
+        self.top = {} if top else None
+
+    def update(self, values):
+        values = pd.Series(values)
+        present = values.dropna()
+        self.rows += len(values)
+        self.nulls += len(values) - len(present)
+        if present.empty:
+            return
+        if pd.api.types.is_datetime64_any_dtype(present.dtype) or (
+                pd.api.types.is_numeric_dtype(present.dtype) and not isinstance(present.dtype, pd.CategoricalDtype)):
+            low, high = present.min(), present.max()
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+        else:
+            # Text, mixed and categorical columns: '' counts as empty, not as a value
+            present = present.astype(str)
+            blank = present.eq('').to_numpy()
+            self.empty += int(blank.sum())
+            present = present[~blank]
+        if present.empty:
+            return
+        # key_hashes hashes each value on its own, so a value re-fed in another chunk lands in the same register
+        self.hll.add_hashes(key_hashes(present))
+        if self.top is not None:
+            for value, count in present.value_counts().items():
+                self.top[value] = self.top.get(value, 0) + int(count)
+            if len(self.top) > TOP_CAPACITY:
+                # Keep the most frequent values (counts of the dropped tail are lost)
+                self.top = dict(sorted(self.top.items(), key=lambda item: -item[1])[:TOP_CAPACITY])
+
+    @property
+    def distinct(self):
+        """Approximate number of distinct non-null, non-empty values"""
+        return self.hll.count()
+
+    @property
+    def filled(self):
+        """Rows with a non-null, non-empty value"""
+        return self.rows - self.nulls - self.empty
+
+    def top_values(self, k=None):
+        """{value: count}, most frequent first"""
+        ranked = sorted((self.top or {}).items(), key=lambda item: -item[1])
+        return dict(ranked[:k] if k else ranked)
+
+    def to_dict(self):
+        def scalar(value):
+            return None if value is None else (value.isoformat() if hasattr(value, 'isoformat') else float(value))
+        return {
+            'rows': self.rows, 'nulls': self.nulls, 'empty': self.empty,
+            'min': scalar(self.min), 'max': scalar(self.max),
+            'kind': 'datetime' if isinstance(self.min, pd.Timestamp) else 'number',
+            'hll': self.hll.to_dict(),
+            'top': None if self.top is None else [[str(value), count] for value, count in self.top.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, name, data):
+        profile = cls(name, top=data['top'] is not None)
+        profile.rows, profile.nulls, profile.empty = data['rows'], data['nulls'], data['empty']
+        convert = pd.Timestamp if data['kind'] == 'datetime' else float
+        profile.min = None if data['min'] is None else convert(data['min'])
+        profile.max = None if data['max'] is None else convert(data['max'])
+        profile.hll = HyperLogLog.from_dict(data['hll'])
+        if data['top'] is not None:
+            profile.top = {value: count for value, count in data['top']}
+        return profile
+
+
+class ColumnProfiles:
+    """ColumnProfile per named column, updated chunk by chunk"""
+
+    def __init__(self, columns, top=()):
+        self.profiles = {col: ColumnProfile(col, top=col in top) for col in columns}
+
+    def __getitem__(self, column):
+        return self.profiles[column]
+
+    def update(self, df):
+        for col, profile in self.profiles.items():
+            profile.update(df[col] if col in df.columns else pd.Series(np.nan, index=df.index))
+
+    def to_dict(self):
+        return {col: profile.to_dict() for col, profile in self.profiles.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        profiles = cls([])
+        profiles.profiles = {col: ColumnProfile.from_dict(col, item) for col, item in data.items()}
+        return profiles
@@ -0,0 +1,183 @@
+"""
+Indexed SQLite store over the normalized claims and CDR records
+
+The debug scripts used to reload the whole TEMM CSV and every BUNDLES
+workbook just to print the rows of one phone. The store loads each source
+file once into a single `records` table with indexes on phone, transaction
+IDs and date; later builds only reload files whose size or mtime changed.
+
+Every record keeps:
+
+    source         TEMM / BUNDLES / TOPUP
+    phone          last 10 digits of NUM_TELEFONO / TargetMSISDN
+    txn_id         SEC_ACTUACION / VENDOR_TRANSACTION_ID (the shared ID)
+    latcom_txn_id  Latcom's own TransactionID
+    event_date     ISO date (FECHA / TransactionDate)
+    product, amount_usd
+    data           the original row as JSON, for display
+"""
+
+import json
+import os
+import sqlite3
+
+import pandas as pd
+
+from reconciliation.dates import parse_dates
+from reconciliation.products import normalize_products
+
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'reconciliation_reports', 'reconciliation_store.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id   INTEGER PRIMARY KEY,
+    path      TEXT UNIQUE NOT NULL,
+    source    TEXT NOT NULL,
+    size      INTEGER,
+    mtime     REAL,
+    rows      INTEGER,
+    loaded_at TEXT
+);
+CREATE TABLE IF NOT EXISTS records (
+    file_id       INTEGER NOT NULL,
+    row_in_file   INTEGER NOT NULL,
+    source        TEXT NOT NULL,
+    phone         TEXT,
+    txn_id        TEXT,
+    latcom_txn_id TEXT,
+    event_date    TEXT,
+    product       TEXT,
+    amount_usd    REAL,
+    data          TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_records_phone ON records (phone);
+CREATE INDEX IF NOT EXISTS idx_records_txn_id ON records (txn_id);
+CREATE INDEX IF NOT EXISTS idx_records_latcom_txn_id ON records (latcom_txn_id);
+CREATE INDEX IF NOT EXISTS idx_records_date ON records (event_date);
+CREATE INDEX IF NOT EXISTS idx_records_file ON records (file_id);
+"""
+
+# Source columns per record field, first present wins
+CLAIM_COLUMNS = {'phone': ['NUM_TELEFONO'], 'txn_id': ['SEC_ACTUACION'], 'latcom_txn_id': [],
+                 'date': ['FECHA'], 'amount_usd': ['ImpUSD']}
+CDR_COLUMNS = {'phone': ['TargetMSISDN', 'MSISDN'], 'txn_id': ['VENDOR_TRANSACTION_ID'],
+               'latcom_txn_id': ['TransactionID', 'TRANSACTION_ID'],
+               'date': ['TransactionDate', 'DATETIME'], 'amount_usd': ['TransactionAmountUSD', 'AMOUNT']}
+
+
+def phone_key(values):
+    """Digits only, '.0' float suffix dropped, last 10 digits ('' when missing)"""
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    keys = (pd.Series(uniques, dtype=object).astype(str)
+            .str.replace(r'\.0$', '', regex=True)
+            .str.replace(r'\D', '', regex=True)
+            .str[-10:])
+    return pd.Series(list(keys) + [''], dtype=object).iloc[codes].set_axis(values.index)
+
+
+def id_key(values):
+    """Transaction IDs as stripped upper-case text without a '.0' suffix"""
+    values = pd.Series(values)
+    keys = values.astype(str).str.strip().str.replace(r'\.0$', '', regex=True).str.upper()
+    return keys.where(values.notna(), None)
+
+
+def connect(path=None):
+    path = path or os.environ.get('RECON_STORE') or DEFAULT_STORE
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _first_column(df, candidates):
+    for col in candidates:
+        if col in df.columns:
+            return df[col]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def normalize_records(df, source, columns):
+    """Map one source frame onto the records columns"""
+    dates = parse_dates(_first_column(df, columns['date']), formats=['%d/%m/%Y'] if source == 'TEMM' else [])
+    if source == 'TEMM':
+        product = df['COD_BONO'].astype(str).str.strip() if 'COD_BONO' in df.columns else ''
+    else:
+        product = normalize_products(df).astype(str)
+
+    return pd.DataFrame({
+        'row_in_file': range(len(df)),
+        'source': source,
+        'phone': phone_key(_first_column(df, columns['phone'])),
+        'txn_id': id_key(_first_column(df, columns['txn_id'])),
+        'latcom_txn_id': id_key(_first_column(df, columns['latcom_txn_id'])),
+        'event_date': dates.dt.strftime('%Y-%m-%d %H:%M:%S').where(dates.notna(), None),
+        'product': product,
+        'amount_usd': pd.to_numeric(_first_column(df, columns['amount_usd']), errors='coerce'),
+        'data': df.to_json(orient='records', lines=True, date_format='iso', force_ascii=False).splitlines(),
+    }, index=df.index)
+
+
+def _file_is_current(conn, path):
+    stat = os.stat(path)
+    row = conn.execute('SELECT size, mtime FROM files WHERE path = ?', (path,)).fetchone()
+    return row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime
+
+
+def load_file(conn, path, source, read):
+    """
+    (Re)load one source file unless it is unchanged since the last build
+
+    read(path) returns the raw DataFrame. Returns the number of rows
+    loaded, or None when the file was skipped.
+    """
+    if _file_is_current(conn, path):
+        return None
+
+    df = read(path)
+    records = normalize_records(df, source, CLAIM_COLUMNS if source == 'TEMM' else CDR_COLUMNS)
+    stat = os.stat(path)
+
+    with conn:
+        row = conn.execute('SELECT file_id FROM files WHERE path = ?', (path,)).fetchone()
+        if row:
+            file_id = row[0]
+            conn.execute('DELETE FROM records WHERE file_id = ?', (file_id,))
+            conn.execute('UPDATE files SET source = ?, size = ?, mtime = ?, rows = ?, loaded_at = datetime(\'now\') '
+                         'WHERE file_id = ?', (source, stat.st_size, stat.st_mtime, len(records), file_id))
+        else:
+            file_id = conn.execute('INSERT INTO files (path, source, size, mtime, rows, loaded_at) '
+                                   'VALUES (?, ?, ?, ?, ?, datetime(\'now\'))',
+                                   (path, source, stat.st_size, stat.st_mtime, len(records))).lastrowid
+
+        records.insert(0, 'file_id', file_id)
+        records = records.astype(object).where(records.notna(), None)
+        conn.executemany(
+            'INSERT INTO records (file_id, row_in_file, source, phone, txn_id, latcom_txn_id, '
+            'event_date, product, amount_usd, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            records.itertuples(index=False, name=None)
+        )
+    return len(records)
+
+
+def lookup(conn, value):
+    """
+    Every record whose phone or either transaction ID matches value
+
+    Returns a DataFrame ordered by source and date, with the source file
+    path and the original row (decoded from JSON) in 'data'.
+    """
+    phone = phone_key([value]).iloc[0]
+    txn = id_key([value]).iloc[0]
+    rows = pd.read_sql_query(
+        'SELECT r.source, f.path AS source_file, r.row_in_file, r.phone, r.txn_id, r.latcom_txn_id, '
+        'r.event_date, r.product, r.amount_usd, r.data '
+        'FROM records r JOIN files f ON f.file_id = r.file_id '
+        'WHERE r.phone = ? OR r.txn_id = ? OR r.latcom_txn_id = ? '
+        'ORDER BY r.source, r.event_date, f.path, r.row_in_file',
+        conn, params=(phone or None, txn, txn)
+    )
+    rows['data'] = [json.loads(data) for data in rows['data']]
+    return rows
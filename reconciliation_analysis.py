@@ -3,17 +3,46 @@
 Comprehensive Reconciliation Analysis: Latcom CDR vs Telefónica Disputed Transactions
 Author: Claude Code
 Date: 2025-10-11
+
+    python reconciliation_analysis.py                 # full run, checkpointing each stage
+    python reconciliation_analysis.py --resume        # reuse every stage whose inputs are unchanged
+    python reconciliation_analysis.py --resume=match  # reuse load + match, recompute categories
+
+A stage is also recomputed when the code behind it changes (see
+code_fingerprint in reconciliation/checkpoint.py).
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from functools import partial
 import os
+import sys
 from pathlib import Path
 import glob
 import warnings
 warnings.filterwarnings('ignore')
 
+from reconciliation.dates import parse_dates
+from reconciliation.ids import ID_DTYPES, transaction_ids
+from reconciliation.money import to_cents, total_cents, cents_to_usd, format_usd
+from reconciliation.readers import read_tables
+from reconciliation.products import PRODUCT_MAPPING, product_columns_in, normalize_products, phone_product_keys
+from reconciliation import matching, partition
+from reconciliation.matching import (
+    match_phone_product_window, match_phone_amount_window, match_fuzzy_phone, normalize_phones
+)
+from reconciliation.prefilter import ClaimKeyFilter
+from reconciliation.stats import ColumnProfiles
+from reconciliation.lineage import FileLineage
+from reconciliation.results import MatchPositions
+from reconciliation.state import MatchState
+from reconciliation.progress import Progress
+from reconciliation.checkpoint import StageCheckpoints, code_fingerprint, resume_option
+from reconciliation.partition import (
+    SpillPartitions, match_partitions, match_sharded, partition_count, worker_count, spill_dir, remove_spill_dir
+)
+
 # Configuration
 TELEFONICA_FILE = "/Users/richardmas/Downloads/Datos de TF auditoria/Registros_TEMM_NoSoporteActual_202309_202412.csv"
 OUTPUT_DIR = "/Users/richardmas/latcom-fix/reconciliation_reports"
@@ -33,518 +62,721 @@ LATCOM_BUNDLES_FILES = (
 
 ALL_LATCOM_FILES = LATCOM_TOPUP_FILES + LATCOM_BUNDLES_FILES
 
-print("="*80)
-print("TELEFONICA vs LATCOM RECONCILIATION ANALYSIS")
-print("="*80)
-print(f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-print(f"Output File: {OUTPUT_FILE}")
-print("="*80)
-
-# Step 1: Load Telefónica's disputed transactions
-print("\n[1/7] Loading Telefónica's disputed transactions file...")
-try:
-    telefonica_df = pd.read_csv(TELEFONICA_FILE, encoding='utf-8-sig')
-    print(f"  ✓ Loaded {len(telefonica_df):,} transactions from Telefónica")
-    print(f"  Columns: {list(telefonica_df.columns)}")
+# Phone-hash partitions for the matching step (RECON_MATCH_PARTITIONS, 0 = match in memory)
+MATCH_PARTITIONS = partition_count()
+# Processes for the matching step (RECON_MATCH_WORKERS, default 1 = serial)
+MATCH_WORKERS = worker_count()
+# Processes parsing the CDR workbooks (RECON_LOAD_WORKERS, default 1 = serial)
+LOAD_WORKERS = worker_count(env='RECON_LOAD_WORKERS')
+# Screen CDR rows against the claim keys while loading (RECON_PREFILTER=0 keeps every CDR row)
+PREFILTER = os.environ.get('RECON_PREFILTER', '1') != '0'
+# Retry unmatched claims on phones one edit away (RECON_FUZZY_PHONE=0 turns the stage off)
+FUZZY_PHONE = os.environ.get('RECON_FUZZY_PHONE', '1') != '0'
+
+# TOPUP matching: claim ImpUSD vs CDR amount within ±1 cent, dates within ±7 days
+TOPUP_TOLERANCE_CENTS = 1
+TOPUP_WINDOW_DAYS = 7
+
+# Stage checkpoints (RECON_CHECKPOINT_DIR); --resume[=STAGE] restores unchanged stages
+RESUME = resume_option(sys.argv[1:])
+
+# CDR columns carried into the Category A / D detail sheets (raw columns stay
+# reachable through FILE_ID + ROW_IN_FILE)
+LATCOM_REPORT_COLUMNS = [
+    'LATCOM_INDEX', 'PHONE_NORMALIZED', 'DATE_PARSED', 'YEAR_MONTH', 'STATUS', 'AMOUNT', 'AMOUNT_CENTS',
+    'TXN_ID', 'VENDOR_TRANSACTION_ID', 'DURATION_SECONDS', 'PRODUCT_NORMALIZED',
+    'TRANSACTION_TYPE', 'FILE_ID', 'ROW_IN_FILE',
+]
+
+# Keywords that identify each standard field among a CDR file's columns (first match wins)
+LATCOM_FIELD_KEYWORDS = {
+    'phone': ['PHONE', 'NUMERO', 'TEL', 'MSISDN', 'NUM'],
+    'date': ['DATE', 'FECHA', 'TIME', 'TIMESTAMP'],
+    'status': ['STATUS', 'ESTADO', 'RESULT', 'RESPONSE'],
+    'amount': ['AMOUNT', 'MONTO', 'PRICE', 'PRECIO', 'VALOR', 'IMP'],
+    'txn_id': ['ID', 'TRANSACTION', 'SEC_', 'CORRELAT'],
+    'duration': ['DURATION', 'TIME', 'DELAY', 'RESPONSE_TIME'],
+}
 
-    # Parse date - handle DD/MM/YYYY format
-    telefonica_df['FECHA'] = pd.to_datetime(telefonica_df['FECHA'], format='%d/%m/%Y', errors='coerce')
-    telefonica_df['YEAR_MONTH'] = telefonica_df['FECHA'].dt.to_period('M')
 
-    # Normalize phone number
-    telefonica_df['PHONE_NORMALIZED'] = telefonica_df['NUM_TELEFONO'].astype(str).str.strip()
+def normalize_latcom(df):
+    """
+    Standard fields for one CDR file: PHONE_NORMALIZED, DATE_PARSED, YEAR_MONTH,
+    STATUS, AMOUNT(_CENTS), TXN_ID, DURATION_SECONDS, PRODUCT_NORMALIZED
 
-    print(f"  Date range: {telefonica_df['FECHA'].min()} to {telefonica_df['FECHA'].max()}")
-    print(f"  Unique phone numbers: {telefonica_df['PHONE_NORMALIZED'].nunique():,}")
+    Returns (df, found): found maps each field to the source columns detected.
+    """
+    found = {field: [col for col in df.columns if any(keyword in col.upper() for keyword in keywords)]
+             for field, keywords in LATCOM_FIELD_KEYWORDS.items()}
 
-except Exception as e:
-    print(f"  ✗ ERROR loading Telefónica file: {e}")
-    exit(1)
+    if 'VENDOR_TRANSACTION_ID' in df.columns:
+        df['VENDOR_TRANSACTION_ID'] = transaction_ids(df['VENDOR_TRANSACTION_ID'])[0]
 
-# Step 2: Load and consolidate all Latcom CDR files
-print("\n[2/7] Loading and consolidating Latcom CDR files...")
-latcom_records = []
-file_issues = []
+    if found['phone']:
+        df['PHONE_NORMALIZED'] = df[found['phone'][0]].astype(str).str.strip()
+    else:
+        df['PHONE_NORMALIZED'] = ''
 
-for file_path in ALL_LATCOM_FILES:
-    try:
-        if not os.path.exists(file_path):
-            file_issues.append(f"File not found: {file_path}")
+    # First date column that parses (once per distinct value - CDR timestamps repeat heavily)
+    date_parsed = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    for date_col in found['date']:
+        try:
+            parsed = parse_dates(df[date_col], formats=[])
+            if parsed.notna().sum() > 0:
+                date_parsed = parsed
+                break
+        except:
             continue
+    df['DATE_PARSED'] = date_parsed
+    df['YEAR_MONTH'] = df['DATE_PARSED'].dt.to_period('M')
 
-        # Extract file type and period from filename
-        filename = os.path.basename(file_path)
-        file_type = "TOPUP" if "TOPUP" in filename.upper() else "BUNDLES"
+    if found['status']:
+        df['STATUS'] = df[found['status'][0]].astype(str).str.upper().str.strip()
+    else:
+        df['STATUS'] = 'UNKNOWN'
 
-        # Try to read Excel file
+    # Read the source column before assigning: it may itself be named AMOUNT
+    amount = 0
+    if found['amount']:
         try:
-            df = pd.read_excel(file_path, engine='openpyxl')
+            amount = pd.to_numeric(df[found['amount'][0]], errors='coerce')
         except:
-            df = pd.read_excel(file_path)
+            pass
+    df['AMOUNT'] = amount
+    df['AMOUNT_CENTS'] = to_cents(df['AMOUNT'])
 
-        if df.empty:
-            file_issues.append(f"Empty file: {filename}")
-            continue
+    df['TXN_ID'] = df[found['txn_id'][0]].astype(str).str.strip() if found['txn_id'] else ''
 
-        df['SOURCE_FILE'] = filename
-        df['TRANSACTION_TYPE'] = file_type
-        latcom_records.append(df)
-        print(f"  ✓ {filename}: {len(df):,} records")
-
-    except Exception as e:
-        file_issues.append(f"Error reading {os.path.basename(file_path)}: {str(e)}")
-        print(f"  ✗ {os.path.basename(file_path)}: {str(e)}")
-
-if not latcom_records:
-    print("  ✗ ERROR: No Latcom records loaded!")
-    exit(1)
-
-# Combine all Latcom records
-latcom_df = pd.concat(latcom_records, ignore_index=True)
-print(f"\n  ✓ Total Latcom records loaded: {len(latcom_df):,}")
-print(f"  Columns in Latcom data: {list(latcom_df.columns)}")
-
-# Step 3: Identify and normalize key fields in Latcom data
-print("\n[3/7] Identifying and normalizing Latcom data fields...")
-
-# Try to identify phone number column
-phone_columns = [col for col in latcom_df.columns if any(keyword in col.upper() for keyword in ['PHONE', 'NUMERO', 'TEL', 'MSISDN', 'NUM'])]
-date_columns = [col for col in latcom_df.columns if any(keyword in col.upper() for keyword in ['DATE', 'FECHA', 'TIME', 'TIMESTAMP'])]
-status_columns = [col for col in latcom_df.columns if any(keyword in col.upper() for keyword in ['STATUS', 'ESTADO', 'RESULT', 'RESPONSE'])]
-amount_columns = [col for col in latcom_df.columns if any(keyword in col.upper() for keyword in ['AMOUNT', 'MONTO', 'PRICE', 'PRECIO', 'VALOR', 'IMP'])]
-txn_id_columns = [col for col in latcom_df.columns if any(keyword in col.upper() for keyword in ['ID', 'TRANSACTION', 'SEC_', 'CORRELAT'])]
-duration_columns = [col for col in latcom_df.columns if any(keyword in col.upper() for keyword in ['DURATION', 'TIME', 'DELAY', 'RESPONSE_TIME'])]
-
-print(f"  Phone columns found: {phone_columns}")
-print(f"  Date columns found: {date_columns}")
-print(f"  Status columns found: {status_columns}")
-print(f"  Amount columns found: {amount_columns}")
-print(f"  Transaction ID columns found: {txn_id_columns}")
-print(f"  Duration columns found: {duration_columns}")
-
-# Standardize column names
-if phone_columns:
-    latcom_df['PHONE_NORMALIZED'] = latcom_df[phone_columns[0]].astype(str).str.strip()
-else:
-    print("  ✗ WARNING: No phone number column found in Latcom data!")
-    latcom_df['PHONE_NORMALIZED'] = ''
-
-if date_columns:
-    # Try to parse date
-    for date_col in date_columns:
+    duration = np.nan
+    if found['duration']:
         try:
-            latcom_df['DATE_PARSED'] = pd.to_datetime(latcom_df[date_col], errors='coerce')
-            if latcom_df['DATE_PARSED'].notna().sum() > 0:
-                latcom_df['YEAR_MONTH'] = latcom_df['DATE_PARSED'].dt.to_period('M')
-                break
+            duration = pd.to_numeric(df[found['duration'][0]], errors='coerce')
         except:
-            continue
-else:
-    print("  ✗ WARNING: No date column found in Latcom data!")
-    latcom_df['DATE_PARSED'] = pd.NaT
+            pass
+    df['DURATION_SECONDS'] = duration
+
+    # Different files have different product column names - coalesce them (first non-null wins)
+    found['product'] = product_columns_in(df)
+    df['PRODUCT_NORMALIZED'] = normalize_products(df, found['product'])
+
+    return df, found
+
+
+def match_by_phone(left, right, match_fn, left_columns, right_columns, label):
+    """
+    match_fn over two frames keyed by PHONE_NORMALIZED: spilled to phone-hash
+    partitions when MATCH_PARTITIONS > 0, else sharded over MATCH_WORKERS
+    """
+    progress = Progress(f'Matching {label}', unit='shards')
+    if MATCH_PARTITIONS > 0:
+        # Out-of-core: spill both sides by phone hash and match one partition at a time
+        print(f"    Matching in {MATCH_PARTITIONS} phone-hash partitions...")
+        match_spill_dir = spill_dir()
+        try:
+            left_parts = SpillPartitions(match_spill_dir, 'telefonica', MATCH_PARTITIONS)
+            right_parts = SpillPartitions(match_spill_dir, 'latcom', MATCH_PARTITIONS)
+            left_parts.append(left, left['PHONE_NORMALIZED'])
+            right_parts.append(right, right['PHONE_NORMALIZED'])
+            matches = match_partitions(
+                left_parts, right_parts, match_fn, sort_by='TELEFONICA_INDEX',
+                left_columns=left_columns, right_columns=right_columns,
+                workers=MATCH_WORKERS, progress=progress
+            )
+        finally:
+            remove_spill_dir(match_spill_dir)
+    else:
+        # Phone groups are independent: shard by phone hash across processes
+        print(f"    Matching with {MATCH_WORKERS} worker process(es)...")
+        matches = match_sharded(
+            left, right, left['PHONE_NORMALIZED'], right['PHONE_NORMALIZED'],
+            match_fn, sort_by='TELEFONICA_INDEX', workers=MATCH_WORKERS, progress=progress
+        )
+    progress.finish()
+    return matches
+
+
+def latcom_totals(df):
+    """Rows and cents per month and transaction type"""
+    return (df.assign(ROWS=1)
+              .groupby(['YEAR_MONTH', 'TRANSACTION_TYPE'], dropna=False, observed=True)[['ROWS', 'AMOUNT_CENTS']]
+              .sum())
+
+
+def categorize(telefonica_df, latcom_df, matches_df, latcom_totals_all):
+    """
+    Categories A, C and D from the matches (reconciliation step 6)
+
+    Returns (category_a, category_c, category_d, category_d_totals). The
+    categorize checkpoint is keyed on this function's source, so editing
+    the rules here re-runs the stage on --resume.
+    """
+    # IMPORTANT: All Latcom transactions are SUCCESSFUL (they're in CDR because they were processed)
+    # Category A: Matched & Successful - ALL MATCHED transactions (WE OWE THESE)
+    # Category B: Matched & Failed - N/A (no failed status in Latcom data)
+    # Category C: In Telefónica only (their claim, not in our logs - INVESTIGATION NEEDED)
+    # Category D: In Latcom only (not in their claim - extra transactions)
+
+    # Matches as positions into both frames; categories are gathers and masks, not joins
+    match_positions = MatchPositions(matches_df, telefonica_df['TELEFONICA_INDEX'], latcom_df['LATCOM_INDEX'])
+    latcom_report_columns = [col for col in LATCOM_REPORT_COLUMNS if col in latcom_df.columns]
+
+    # Category A: ALL Matched transactions (WE OWE)
+    if not matches_df.empty:
+        category_a = match_positions.matched(matches_df, telefonica_df, latcom_df,
+                                             right_columns=latcom_report_columns)
+    else:
+        category_a = pd.DataFrame()
+
+    # Category C: In Telefónica only (their claim, NOT in our logs)
+    category_c = match_positions.unmatched_left(telefonica_df)
+
+    # Category D: In Latcom only (not in their claim)
+    # Only claim-key candidates are in memory, so the full D figures are the
+    # per-month totals of every CDR row minus the matched rows
+    category_d = match_positions.unmatched_right(latcom_df, latcom_report_columns)
+    category_d_totals = latcom_totals_all.sub(
+        latcom_totals(match_positions.matched_right(latcom_df, ['YEAR_MONTH', 'TRANSACTION_TYPE', 'AMOUNT_CENTS'])),
+        fill_value=0
+    )
+    return category_a, category_c, category_d, category_d_totals
+
+
+# Workers are spawned and re-import this module, so the pipeline only runs as a script
+if __name__ == '__main__':
+    print("="*80)
+    print("TELEFONICA vs LATCOM RECONCILIATION ANALYSIS")
+    print("="*80)
+    print(f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Output File: {OUTPUT_FILE}")
+    print("="*80)
+
+    # Stages 1-3, 4-5 and 6 are checkpointed; the report steps always run
+    checkpoints = StageCheckpoints([TELEFONICA_FILE] + ALL_LATCOM_FILES, resume=RESUME)
+
+    load_stage = checkpoints.stage('load', prefilter=PREFILTER, fuzzy_phone=FUZZY_PHONE,
+                                   code=code_fingerprint(normalize_latcom, latcom_totals, ClaimKeyFilter))
+    saved = load_stage.restore()
+    if saved is not None:
+        print("\n[1/7]-[3/7] Loading Telefónica claims and Latcom CDR files... (restored from checkpoint)")
+        telefonica_df, latcom_df, latcom_totals_all = saved['telefonica'], saved['latcom'], saved['latcom_totals']
+        latcom_total_rows, file_issues = saved['latcom_total_rows'], saved['file_issues']
+        latcom_found = saved['latcom_found']
+        lineage = FileLineage.from_list(saved['lineage_files'])
+        telefonica_stats = ColumnProfiles.from_dict(saved['telefonica_stats'])
+        latcom_stats = ColumnProfiles.from_dict(saved['latcom_stats'])
+        print(f"  ✓ {len(telefonica_df):,} claims, {latcom_total_rows:,} Latcom records ({len(latcom_df):,} kept)")
+    else:
+        # Step 1: Load Telefónica's disputed transactions
+        print("\n[1/7] Loading Telefónica's disputed transactions file...")
+        try:
+            telefonica_df = pd.read_csv(TELEFONICA_FILE, encoding='utf-8-sig', dtype=ID_DTYPES)
+            print(f"  ✓ Loaded {len(telefonica_df):,} transactions from Telefónica")
+            print(f"  Columns: {list(telefonica_df.columns)}")
+
+            # Parse date - handle DD/MM/YYYY format
+            telefonica_df['FECHA'] = parse_dates(telefonica_df['FECHA'], formats=['%d/%m/%Y'], infer=False)
+            telefonica_df['YEAR_MONTH'] = telefonica_df['FECHA'].dt.to_period('M')
+
+            # Claimed amount in exact cents (all USD totals below are summed from this)
+            telefonica_df['ImpUSD_CENTS'] = to_cents(telefonica_df['ImpUSD'])
+
+            # Normalize phone number
+            telefonica_df['PHONE_NORMALIZED'] = telefonica_df['NUM_TELEFONO'].astype(str).str.strip()
+            if 'SEC_ACTUACION' in telefonica_df.columns:
+                telefonica_df['SEC_ACTUACION'] = transaction_ids(telefonica_df['SEC_ACTUACION'])[0]
+
+            # Profiled once; every later printout and the quality sheet read these
+            telefonica_stats = ColumnProfiles(['FECHA', 'PHONE_NORMALIZED'])
+            telefonica_stats.update(telefonica_df)
+            print(f"  Date range: {telefonica_stats['FECHA'].min} to {telefonica_stats['FECHA'].max}")
+            print(f"  Unique phone numbers: ~{telefonica_stats['PHONE_NORMALIZED'].distinct:,}")
+
+        except Exception as e:
+            print(f"  ✗ ERROR loading Telefónica file: {e}")
+            exit(1)
+
+        # Claim-side keys for screening the CDR history as it loads
+        claim_filter = None
+        if PREFILTER:
+            claim_filter = ClaimKeyFilter(telefonica_df['PHONE_NORMALIZED'], telefonica_df.get('SEC_ACTUACION'),
+                                          near_phones=FUZZY_PHONE)
+            print(f"  ✓ Claim-key prefilter built ({claim_filter.nbytes / 1024:,.0f} KB)")
+
+        # Step 2: Load, normalize and screen all Latcom CDR files
+        print("\n[2/7] Loading and consolidating Latcom CDR files...")
+        latcom_records = []
+        file_issues = []
+
+        # Every CDR row is counted here, kept in memory or not
+        latcom_total_rows = 0
+        latcom_columns = {}
+        latcom_found = {field: {} for field in list(LATCOM_FIELD_KEYWORDS) + ['product']}
+        latcom_totals_parts = []
+        latcom_stats = ColumnProfiles(['DATE_PARSED', 'PHONE_NORMALIZED', 'STATUS', 'PRODUCT_NORMALIZED'],
+                                      top=['STATUS', 'PRODUCT_NORMALIZED'])
+
+        lineage = FileLineage()
+        latcom_paths = []
+        for file_path in ALL_LATCOM_FILES:
+            if os.path.exists(file_path):
+                latcom_paths.append(file_path)
+            else:
+                file_issues.append(f"File not found: {file_path}")
+
+        # Workbooks are parsed on LOAD_WORKERS processes and arrive here in file order
+        load_progress = Progress('Loading CDR files', total=len(latcom_paths), unit='files', indent='  ')
+        for file_path, df, read_error in read_tables(latcom_paths, LOAD_WORKERS, dtype=ID_DTYPES):
+            try:
+                if read_error is not None:
+                    raise IOError(read_error)
+
+                # Extract file type and period from filename
+                filename = os.path.basename(file_path)
+                file_type = "TOPUP" if "TOPUP" in filename.upper() else "BUNDLES"
+
+                if df.empty:
+                    file_issues.append(f"Empty file: {filename}")
+                    continue
+
+                latcom_columns.update(dict.fromkeys(df.columns))
+                # FILE_ID / ROW_IN_FILE / TRANSACTION_TYPE as small integers; names resolved for reports
+                lineage.stamp(df, lineage.add(file_path), file_type)
+                df, found = normalize_latcom(df)
+                for field, cols in found.items():
+                    latcom_found[field].update(dict.fromkeys(cols))
+
+                # Global row number, the same whether or not the row survives screening
+                file_rows = len(df)
+                df['LATCOM_INDEX'] = np.arange(latcom_total_rows, latcom_total_rows + file_rows)
+                latcom_total_rows += file_rows
+
+                # Aggregates and column profiles over every row (Category D, monthly counts, data quality)
+                latcom_totals_parts.append(latcom_totals(df))
+                latcom_stats.update(df)
+
+                # Keep only rows that may share a phone or SEC_ACTUACION with a claim
+                if claim_filter is not None:
+                    df = df[claim_filter.candidates(df['PHONE_NORMALIZED'], df.get('VENDOR_TRANSACTION_ID'))]
+
+                latcom_records.append(df)
+                print(f"  ✓ {filename}: {file_rows:,} records ({len(df):,} kept)")
+                load_progress.update(rows=file_rows, kept=len(df))
+
+            except Exception as e:
+                file_issues.append(f"Error reading {os.path.basename(file_path)}: {str(e)}")
+                print(f"  ✗ {os.path.basename(file_path)}: {str(e)}")
+                load_progress.update(errors=1)
+
+        load_progress.finish()
+
+        if not latcom_records:
+            print("  ✗ ERROR: No Latcom records loaded!")
+            exit(1)
+
+        # Combine the kept Latcom records
+        latcom_df = pd.concat(latcom_records, ignore_index=True)
+        latcom_df['PRODUCT_NORMALIZED'] = latcom_df['PRODUCT_NORMALIZED'].astype('category')
+        latcom_totals_all = pd.concat(latcom_totals_parts).groupby(level=[0, 1], dropna=False).sum()
+        print(f"\n  ✓ Total Latcom records loaded: {latcom_total_rows:,}")
+        if claim_filter is not None:
+            print(f"  ✓ Kept for matching (claim-key candidates): {len(latcom_df):,} ({len(latcom_df)/latcom_total_rows*100:.1f}%)")
+        print(f"  Columns in Latcom data: {list(latcom_columns)}")
+
+        # Step 3: Identify and normalize key fields in Latcom data
+        print("\n[3/7] Identifying and normalizing Latcom data fields...")
+
+        print(f"  Phone columns found: {list(latcom_found['phone'])}")
+        print(f"  Date columns found: {list(latcom_found['date'])}")
+        print(f"  Status columns found: {list(latcom_found['status'])}")
+        print(f"  Amount columns found: {list(latcom_found['amount'])}")
+        print(f"  Transaction ID columns found: {list(latcom_found['txn_id'])}")
+        print(f"  Duration columns found: {list(latcom_found['duration'])}")
+        if not latcom_found['phone']:
+            print("  ✗ WARNING: No phone number column found in Latcom data!")
+        if not latcom_found['date']:
+            print("  ✗ WARNING: No date column found in Latcom data!")
+        if not latcom_found['status']:
+            print("  ✗ WARNING: No status column found in Latcom data!")
+
+        telefonica_df['TELEFONICA_INDEX'] = range(len(telefonica_df))
+
+        print(f"  ✓ Normalized {latcom_total_rows:,} Latcom records")
+        print(f"  Date range: {latcom_stats['DATE_PARSED'].min} to {latcom_stats['DATE_PARSED'].max}")
+        print(f"  Unique phone numbers: ~{latcom_stats['PHONE_NORMALIZED'].distinct:,}")
+        print(f"  Status values: {latcom_stats['STATUS'].top_values()}")
+
+        load_stage.save(
+            {'telefonica': telefonica_df, 'latcom': latcom_df, 'latcom_totals': latcom_totals_all},
+            {'latcom_total_rows': latcom_total_rows, 'file_issues': file_issues, 'lineage_files': lineage.to_list(),
+             'latcom_found': {field: list(cols) for field, cols in latcom_found.items()},
+             'telefonica_stats': telefonica_stats.to_dict(), 'latcom_stats': latcom_stats.to_dict()}
+        )
+
+    match_stage = checkpoints.stage('match', fuzzy_phone=FUZZY_PHONE, topup_tolerance_cents=TOPUP_TOLERANCE_CENTS,
+                                    topup_window_days=TOPUP_WINDOW_DAYS, product_mapping=PRODUCT_MAPPING,
+                                    code=code_fingerprint(match_by_phone, matching, partition, MatchState))
+    saved = match_stage.restore()
+    if saved is not None:
+        print("\n[4/7] Creating product code mapping... (restored from checkpoint)")
+        print("\n[5/7] Matching transactions between Telefónica and Latcom... (restored from checkpoint)")
+        telefonica_df, matches_df = saved['telefonica'], saved['matches']
+        print(f"  ✓ Total matches found: {len(matches_df):,}")
+    else:
+        # Step 4: Product code mapping
+        print("\n[4/7] Creating product code mapping...")
+
+        # PRODUCT_MAPPING (Telefónica code -> Latcom product) is defined in reconciliation/products.py
+        # Latcom products were coalesced per file in normalize_latcom()
+        if latcom_found['product']:
+            print(f"  ✓ Merged product columns: {list(latcom_found['product'])}")
+            print(f"  Product column stats: {latcom_stats['PRODUCT_NORMALIZED'].filled:,} non-empty / {latcom_total_rows:,} total")
+            print(f"  Unique products: {len(latcom_stats['PRODUCT_NORMALIZED'].top_values())}")
+        else:
+            print(f"  ✗ WARNING: No product columns found!")
 
-if status_columns:
-    latcom_df['STATUS'] = latcom_df[status_columns[0]].astype(str).str.upper().str.strip()
-else:
-    print("  ✗ WARNING: No status column found in Latcom data!")
-    latcom_df['STATUS'] = 'UNKNOWN'
+        # For Telefónica, map to Latcom product names
+        if 'COD_BONO' in telefonica_df.columns:
+            telefonica_df['PRODUCT_LATCOM_EQUIVALENT'] = telefonica_df['COD_BONO'].map(PRODUCT_MAPPING).fillna('')
+            telefonica_df['PRODUCT_CODE'] = telefonica_df['COD_BONO'].astype(str).str.strip()
+        else:
+            telefonica_df['PRODUCT_LATCOM_EQUIVALENT'] = ''
+            telefonica_df['PRODUCT_CODE'] = ''
 
-if amount_columns:
-    try:
-        latcom_df['AMOUNT'] = pd.to_numeric(latcom_df[amount_columns[0]], errors='coerce')
-    except:
-        latcom_df['AMOUNT'] = 0
-else:
-    latcom_df['AMOUNT'] = 0
-
-if txn_id_columns:
-    latcom_df['TXN_ID'] = latcom_df[txn_id_columns[0]].astype(str).str.strip()
-else:
-    latcom_df['TXN_ID'] = ''
-
-if duration_columns:
-    try:
-        latcom_df['DURATION_SECONDS'] = pd.to_numeric(latcom_df[duration_columns[0]], errors='coerce')
-    except:
-        latcom_df['DURATION_SECONDS'] = np.nan
-else:
-    latcom_df['DURATION_SECONDS'] = np.nan
-
-# Add sequential index for tracking
-latcom_df['LATCOM_INDEX'] = range(len(latcom_df))
-telefonica_df['TELEFONICA_INDEX'] = range(len(telefonica_df))
-
-print(f"  ✓ Normalized {len(latcom_df):,} Latcom records")
-print(f"  Date range: {latcom_df['DATE_PARSED'].min()} to {latcom_df['DATE_PARSED'].max()}")
-print(f"  Unique phone numbers: {latcom_df['PHONE_NORMALIZED'].nunique():,}")
-print(f"  Status values: {latcom_df['STATUS'].value_counts().to_dict()}")
-
-# Step 4: Product code mapping
-print("\n[4/7] Creating product code mapping...")
-
-# Map Telefónica product codes to Latcom product codes
-PRODUCT_MAPPING = {
-    'BFRECINT': 'TEMXN_BFRECINT_30_DAYS',
-    'BFSPRINT': 'TEMXN_BFSPRINT_UNLIMITED_30_DAYS',
-    'BFRIQUIN': 'TEMXN_BFRIQUIN_28_DAYS',
-    'BFRISEM': 'TEMXN_BFRISEM_7_DAYS',
-    'BFRIMEN': 'TEMXN_BFRIMEN_15_DAYS',
-    'PQRI412D': 'TEM_4GB_12_DAYS',
-    'PQRI3G9D': 'TEM_3GB_9_DAYS',
-    'PQRI2G7D': 'TEM_2GB_7_DAYS',
-    'PQRI1G4D': 'TEM_1GB_3_DAYS',  # Found this in bundles!
-    'PQRI6M2D': 'TEM_600MB_2_DAYS',
-}
+        print(f"  ✓ Product mapping created")
+        print(f"  Telefónica products: {telefonica_df['PRODUCT_CODE'].value_counts().to_dict()}")
 
-# Add mapped product to Latcom data
-# Different files have different product column names - merge them
-product_columns = [col for col in latcom_df.columns if col in ['Product', 'Product MobiFin', 'Product MoviStar', 'Product Sagar', 'Product ']]
-
-if product_columns:
-    # Coalesce all product columns into one - handle NaN properly
-    latcom_df['PRODUCT_NORMALIZED'] = ''
-    for col in product_columns:
-        # Fill empty values with values from this column
-        mask = (latcom_df['PRODUCT_NORMALIZED'] == '') & (latcom_df[col].notna())
-        latcom_df.loc[mask, 'PRODUCT_NORMALIZED'] = latcom_df.loc[mask, col].astype(str)
-
-    # Clean up any remaining 'nan' strings
-    latcom_df['PRODUCT_NORMALIZED'] = latcom_df['PRODUCT_NORMALIZED'].str.strip()
-    latcom_df['PRODUCT_NORMALIZED'] = latcom_df['PRODUCT_NORMALIZED'].replace('nan', '')
-    latcom_df['PRODUCT_NORMALIZED'] = latcom_df['PRODUCT_NORMALIZED'].replace('None', '')
-
-    print(f"  ✓ Merged product columns: {product_columns}")
-    print(f"  Product column stats: {latcom_df['PRODUCT_NORMALIZED'].ne('').sum():,} non-empty / {len(latcom_df):,} total")
-    print(f"  Unique products: {latcom_df['PRODUCT_NORMALIZED'][latcom_df['PRODUCT_NORMALIZED'].ne('')].nunique()}")
-else:
-    latcom_df['PRODUCT_NORMALIZED'] = ''
-    print(f"  ✗ WARNING: No product columns found!")
-
-# For Telefónica, map to Latcom product names
-if 'COD_BONO' in telefonica_df.columns:
-    telefonica_df['PRODUCT_LATCOM_EQUIVALENT'] = telefonica_df['COD_BONO'].map(PRODUCT_MAPPING).fillna('')
-    telefonica_df['PRODUCT_CODE'] = telefonica_df['COD_BONO'].astype(str).str.strip()
-else:
-    telefonica_df['PRODUCT_LATCOM_EQUIVALENT'] = ''
-    telefonica_df['PRODUCT_CODE'] = ''
-
-print(f"  ✓ Product mapping created")
-print(f"  Telefónica products: {telefonica_df['PRODUCT_CODE'].value_counts().to_dict()}")
-
-# Step 5: Matching logic
-print("\n[5/7] Matching transactions between Telefónica and Latcom...")
-
-# IMPORTANT: Latcom transactions are ALL successful (they're in CDR because they were processed)
-# We need to match on phone + product + date window (allowing +/- 7 days)
-
-matches = []
-matched_telefonica_indices = set()
-matched_latcom_indices = set()
-
-# Strategy: For each Telefónica transaction, find matching Latcom transactions
-# Match criteria: Phone number + Product + Date within 7-day window
-
-print("  Matching by phone + product + date window (±7 days)...")
-
-# Split by transaction type for efficiency
-bundles_mask = latcom_df['TRANSACTION_TYPE'] == 'BUNDLES'
-topup_mask = latcom_df['TRANSACTION_TYPE'] == 'TOPUP'
-
-latcom_bundles = latcom_df[bundles_mask].copy()
-latcom_topup = latcom_df[topup_mask].copy()
-
-print(f"    Latcom BUNDLES: {len(latcom_bundles):,}")
-print(f"    Latcom TOPUP: {len(latcom_topup):,}")
-
-# Match BUNDLES (have product codes)
-bundle_product_codes = set(PRODUCT_MAPPING.keys())
-telefonica_bundles = telefonica_df[telefonica_df['PRODUCT_CODE'].isin(bundle_product_codes)].copy()
-
-print(f"    Telefónica BUNDLES to match: {len(telefonica_bundles):,}")
-
-# Optimized matching using merge operations
-# Create a temporary key for exact matching (phone + product)
-telefonica_bundles_clean = telefonica_bundles[
-    telefonica_bundles['PRODUCT_LATCOM_EQUIVALENT'].ne('') &
-    telefonica_bundles['FECHA'].notna()
-].copy()
-
-latcom_bundles_clean = latcom_bundles[
-    latcom_bundles['DATE_PARSED'].notna()
-].copy()
-
-print(f"    Telefónica BUNDLES (clean): {len(telefonica_bundles_clean):,}")
-print(f"    Latcom BUNDLES (clean): {len(latcom_bundles_clean):,}")
-
-# OPTIMIZED matching using groupby and merge
-print(f"    Using optimized matching algorithm...")
-
-# Group Latcom by phone + product for faster lookup
-latcom_bundles_clean['PHONE_PRODUCT'] = (
-    latcom_bundles_clean['PHONE_NORMALIZED'] + '|' +
-    latcom_bundles_clean['PRODUCT_NORMALIZED']
-)
+        # Step 5: Matching logic
+        print("\n[5/7] Matching transactions between Telefónica and Latcom...")
 
-telefonica_bundles_clean['PHONE_PRODUCT'] = (
-    telefonica_bundles_clean['PHONE_NORMALIZED'] + '|' +
-    telefonica_bundles_clean['PRODUCT_LATCOM_EQUIVALENT']
-)
+        # IMPORTANT: Latcom transactions are ALL successful (they're in CDR because they were processed)
+        # We need to match on phone + product + date window (allowing +/- 7 days)
 
-# Create a lookup dictionary
-latcom_grouped = {}
-for phone_product, group in latcom_bundles_clean.groupby('PHONE_PRODUCT'):
-    latcom_grouped[phone_product] = group
-
-print(f"    Created lookup index with {len(latcom_grouped):,} unique phone+product combinations")
-
-# Match efficiently
-total_to_match = len(telefonica_bundles_clean)
-progress_interval = max(1, total_to_match // 20)
-
-for i, (idx, tf_row) in enumerate(telefonica_bundles_clean.iterrows()):
-    if i % progress_interval == 0:
-        print(f"      Progress: {i:,} / {total_to_match:,} ({i/total_to_match*100:.1f}%) - Matches: {len(matches):,}")
-
-    phone_product = tf_row['PHONE_PRODUCT']
-    date = tf_row['FECHA']
-
-    # Quick lookup in dictionary
-    if phone_product not in latcom_grouped:
-        continue
-
-    candidates = latcom_grouped[phone_product]
-
-    # Filter by date window (±7 days)
-    date_min = date - timedelta(days=7)
-    date_max = date + timedelta(days=7)
-
-    matching_latcom = candidates[
-        (candidates['DATE_PARSED'] >= date_min) &
-        (candidates['DATE_PARSED'] <= date_max) &
-        (~candidates['LATCOM_INDEX'].isin(matched_latcom_indices))
-    ]
-
-    if not matching_latcom.empty:
-        # Take the closest match by date
-        date_diffs = abs((matching_latcom['DATE_PARSED'] - date).dt.total_seconds())
-        best_idx = date_diffs.idxmin()
-        best_match = matching_latcom.loc[best_idx]
-
-        matches.append({
-            'TELEFONICA_INDEX': tf_row['TELEFONICA_INDEX'],
-            'LATCOM_INDEX': best_match['LATCOM_INDEX'],
-            'MATCH_METHOD': 'PHONE_PRODUCT_DATE_WINDOW',
-            'DATE_DIFF_DAYS': date_diffs[best_idx] / 86400,
-            'DURATION_SECONDS': best_match.get('DURATION_SECONDS', np.nan)
-        })
-        matched_telefonica_indices.add(tf_row['TELEFONICA_INDEX'])
-        matched_latcom_indices.add(best_match['LATCOM_INDEX'])
-
-print(f"      Progress: {total_to_match:,} / {total_to_match:,} (100.0%) - Matches: {len(matches):,}")
-
-print(f"    ✓ Matched {len([m for m in matches if m['MATCH_METHOD'] == 'PHONE_PRODUCT_DATE_WINDOW']):,} BUNDLES transactions")
-
-# Match TOPUP (no product codes, match by phone + date + amount if possible)
-# Telefónica doesn't distinguish TOPUP in their codes, so we skip TOPUP matching for now
-# OR try to match remaining transactions as TOPUP
-
-print(f"    Note: TOPUP matching not implemented (no product codes in Telefónica data)")
-
-matches_df = pd.DataFrame(matches) if matches else pd.DataFrame(columns=['TELEFONICA_INDEX', 'LATCOM_INDEX', 'MATCH_METHOD', 'DATE_DIFF_DAYS', 'DURATION_SECONDS'])
-
-print(f"\n  ✓ Total matches found: {len(matches_df):,}")
-print(f"  Telefónica records matched: {len(matched_telefonica_indices):,} / {len(telefonica_df):,} ({len(matched_telefonica_indices)/len(telefonica_df)*100:.1f}%)")
-print(f"  Latcom records matched: {len(matched_latcom_indices):,} / {len(latcom_df):,} ({len(matched_latcom_indices)/len(latcom_df)*100:.1f}%)")
-
-# Step 6: Categorize transactions
-print("\n[6/7] Categorizing transactions...")
-
-# IMPORTANT: All Latcom transactions are SUCCESSFUL (they're in CDR because they were processed)
-# Category A: Matched & Successful - ALL MATCHED transactions (WE OWE THESE)
-# Category B: Matched & Failed - N/A (no failed status in Latcom data)
-# Category C: In Telefónica only (their claim, not in our logs - INVESTIGATION NEEDED)
-# Category D: In Latcom only (not in their claim - extra transactions)
-
-# Category A: ALL Matched transactions (WE OWE)
-if not matches_df.empty:
-    category_a_full = pd.merge(
-        matches_df,
-        telefonica_df,
-        left_on='TELEFONICA_INDEX',
-        right_on='TELEFONICA_INDEX',
-        how='left'
-    ).merge(
-        latcom_df,
-        left_on='LATCOM_INDEX',
-        right_on='LATCOM_INDEX',
-        how='left',
-        suffixes=('_TELEFONICA', '_LATCOM')
-    )
-else:
-    category_a_full = pd.DataFrame()
-
-# Category B: Not applicable (no failed transactions in Latcom CDR)
-category_b_full = pd.DataFrame()
-category_b_slow = pd.DataFrame()
-
-# Category C: In Telefónica only (their claim, NOT in our logs)
-category_c = telefonica_df[~telefonica_df['TELEFONICA_INDEX'].isin(matched_telefonica_indices)].copy()
-
-# Category D: In Latcom only (not in their claim)
-category_d = latcom_df[~latcom_df['LATCOM_INDEX'].isin(matched_latcom_indices)].copy()
-
-print(f"  Category A (Matched - WE OWE): {len(category_a_full):,} transactions")
-print(f"  Category B (Failed): N/A (no failed transactions in Latcom CDR)")
-print(f"  Category C (Telefónica Only - NOT IN OUR LOGS): {len(category_c):,} transactions")
-print(f"  Category D (Latcom Only - NOT IN THEIR CLAIM): {len(category_d):,} transactions")
-
-# Step 7: Calculate summary statistics
-print("\n[7/7] Calculating summary statistics...")
-
-summary_stats = {
-    'Total Telefónica Transactions': len(telefonica_df),
-    'Total Latcom Transactions': len(latcom_df),
-    'Total Matches Found': len(matches_df),
-    'Match Rate (%)': f"{len(matches_df)/len(telefonica_df)*100:.2f}%",
-    '': '',
-    'Category A - Matched (WE OWE)': len(category_a_full),
-    'Category A - Amount USD': category_a_full['ImpUSD'].sum() if 'ImpUSD' in category_a_full.columns and not category_a_full.empty else 0,
-    '  ': '',
-    'Category B - Failed (N/A)': 'Not applicable - no failed status in Latcom CDR',
-    '   ': '',
-    'Category C - In Telefónica Only (NOT IN OUR LOGS)': len(category_c),
-    'Category C - Amount USD': category_c['ImpUSD'].sum() if 'ImpUSD' in category_c.columns else 'N/A',
-    '    ': '',
-    'Category D - In Latcom Only (NOT IN THEIR CLAIM)': len(category_d),
-}
+        # Strategy: For each Telefónica transaction, find matching Latcom transactions
+        # Match criteria: Phone number + Product + Date within 7-day window
 
-# Month-by-month breakdown
-print("  Calculating month-by-month breakdown...")
-monthly_telefonica = telefonica_df.groupby('YEAR_MONTH').size().reset_index(name='Telefonica_Count')
-monthly_telefonica_amount = telefonica_df.groupby('YEAR_MONTH')['ImpUSD'].sum().reset_index(name='Telefonica_Amount_USD')
+        print("  Matching by phone + product + date window (±7 days)...")
 
-if 'YEAR_MONTH' in latcom_df.columns:
-    monthly_latcom = latcom_df.groupby('YEAR_MONTH').size().reset_index(name='Latcom_Count')
-    monthly_breakdown = pd.merge(monthly_telefonica, monthly_latcom, on='YEAR_MONTH', how='outer')
-else:
-    monthly_breakdown = monthly_telefonica.copy()
-    monthly_breakdown['Latcom_Count'] = 0
-
-monthly_breakdown = pd.merge(monthly_breakdown, monthly_telefonica_amount, on='YEAR_MONTH', how='left')
-monthly_breakdown['YEAR_MONTH'] = monthly_breakdown['YEAR_MONTH'].astype(str)
-monthly_breakdown = monthly_breakdown.fillna(0)
-monthly_breakdown = monthly_breakdown.sort_values('YEAR_MONTH')
-
-# Step 8: Generate Excel report
-print("\n[8/8] Generating Excel report...")
-
-try:
-    with pd.ExcelWriter(OUTPUT_FILE, engine='openpyxl') as writer:
-        # Sheet 1: Summary
-        summary_df = pd.DataFrame(list(summary_stats.items()), columns=['Metric', 'Value'])
-        summary_df.to_excel(writer, sheet_name='Summary', index=False)
-
-        # Sheet 2: Category A - Matched (WE OWE)
-        if not category_a_full.empty:
-            category_a_full.to_excel(writer, sheet_name='A - Matched WE OWE', index=False)
-        else:
-            pd.DataFrame({'Note': ['No matched transactions']}).to_excel(writer, sheet_name='A - Matched WE OWE', index=False)
+        # Split by transaction type for efficiency
+        bundles_mask = latcom_df['TRANSACTION_TYPE'] == 'BUNDLES'
+        topup_mask = latcom_df['TRANSACTION_TYPE'] == 'TOPUP'
 
-        # Sheet 3: Category C - In Telefónica Only (NOT IN OUR LOGS)
-        if not category_c.empty:
-            category_c.to_excel(writer, sheet_name='C - TF Only NOT IN LOGS', index=False)
-        else:
-            pd.DataFrame({'Note': ['No transactions in Telefónica only']}).to_excel(writer, sheet_name='C - TF Only NOT IN LOGS', index=False)
+        latcom_type_rows = latcom_totals_all.groupby(level='TRANSACTION_TYPE')['ROWS'].sum()
+        print(f"    Latcom BUNDLES: {latcom_type_rows.get('BUNDLES', 0):,} ({bundles_mask.sum():,} kept)")
+        print(f"    Latcom TOPUP: {latcom_type_rows.get('TOPUP', 0):,} ({topup_mask.sum():,} kept)")
 
-        # Sheet 4: Category D - In Latcom Only (NOT IN THEIR CLAIM)
-        if not category_d.empty:
-            category_d.to_excel(writer, sheet_name='D - Latcom Only', index=False)
-        else:
-            pd.DataFrame({'Note': ['No transactions in Latcom only']}).to_excel(writer, sheet_name='D - Latcom Only', index=False)
-
-        # Sheet 5: Month-by-month breakdown
-        monthly_breakdown.to_excel(writer, sheet_name='Monthly Breakdown', index=False)
-
-        # Sheet 6: Data Quality Issues
-        quality_issues = []
-        quality_issues.append({'Issue Type': 'File Loading Errors', 'Count': len(file_issues), 'Details': '; '.join(file_issues) if file_issues else 'None'})
-        quality_issues.append({'Issue Type': 'Telefónica records without dates', 'Count': telefonica_df['FECHA'].isna().sum(), 'Details': ''})
-        quality_issues.append({'Issue Type': 'Latcom records without dates', 'Count': latcom_df['DATE_PARSED'].isna().sum(), 'Details': ''})
-        quality_issues.append({'Issue Type': 'Latcom records without phone numbers', 'Count': (latcom_df['PHONE_NORMALIZED'] == '').sum(), 'Details': ''})
-        quality_issues.append({'Issue Type': 'Products with no mapping', 'Count': telefonica_df[telefonica_df['PRODUCT_LATCOM_EQUIVALENT'] == '']['PRODUCT_CODE'].nunique(), 'Details': ''})
-
-        quality_df = pd.DataFrame(quality_issues)
-        quality_df.to_excel(writer, sheet_name='Data Quality Issues', index=False)
-
-        # Sheet 7: Matching Methodology
-        methodology = [
-            {'Step': 1, 'Description': 'Loaded Telefónica disputed transactions file', 'Records': len(telefonica_df)},
-            {'Step': 2, 'Description': 'Consolidated all Latcom CDR files (TOPUP + BUNDLES)', 'Records': len(latcom_df)},
-            {'Step': 3, 'Description': 'Normalized phone numbers and dates', 'Records': '-'},
-            {'Step': 4, 'Description': 'Created product code mapping (TF -> Latcom)', 'Records': len(PRODUCT_MAPPING)},
-            {'Step': 5, 'Description': 'Matched by phone + product + date window (±7 days)', 'Records': len(matches_df)},
-            {'Step': 6, 'Description': 'Categorized matched and unmatched records', 'Records': '-'},
-            {'Step': 7, 'Description': 'Generated comprehensive reconciliation report', 'Records': '-'},
+        # Match BUNDLES (have product codes)
+        bundle_product_codes = set(PRODUCT_MAPPING.keys())
+        telefonica_bundles_mask = telefonica_df['PRODUCT_CODE'].isin(bundle_product_codes)
+
+        print(f"    Telefónica BUNDLES to match: {telefonica_bundles_mask.sum():,}")
+
+        # Only the columns the matcher needs - no full copies of either side
+        telefonica_bundles_clean = telefonica_df.loc[
+            telefonica_bundles_mask &
+            telefonica_df['PRODUCT_LATCOM_EQUIVALENT'].ne('') &
+            telefonica_df['FECHA'].notna(),
+            ['TELEFONICA_INDEX', 'PHONE_NORMALIZED', 'PRODUCT_LATCOM_EQUIVALENT', 'FECHA']
         ]
-        methodology_df = pd.DataFrame(methodology)
-        methodology_df.to_excel(writer, sheet_name='Matching Methodology', index=False)
-
-        # Sheet 8: Product Mapping Reference
-        product_mapping_df = pd.DataFrame([
-            {'Telefónica Code': k, 'Latcom Product': v if v else 'NOT FOUND'}
-            for k, v in PRODUCT_MAPPING.items()
-        ])
-        product_mapping_df.to_excel(writer, sheet_name='Product Mapping', index=False)
-
-    print(f"  ✓ Excel report generated successfully: {OUTPUT_FILE}")
-
-except Exception as e:
-    print(f"  ✗ ERROR generating Excel report: {e}")
-    import traceback
-    traceback.print_exc()
-    exit(1)
-
-# Final summary output
-print("\n" + "="*80)
-print("RECONCILIATION ANALYSIS COMPLETE")
-print("="*80)
-print(f"\nOutput File: {OUTPUT_FILE}")
-print(f"\nSUMMARY STATISTICS:")
-print("-" * 80)
-for key, value in summary_stats.items():
-    if key.strip():  # Skip empty separator keys
-        print(f"  {key}: {value}")
-
-print("\n" + "="*80)
-print("DATA QUALITY ISSUES:")
-print("-" * 80)
-for issue in quality_issues:
-    if issue['Count'] > 0:
-        print(f"  {issue['Issue Type']}: {issue['Count']}")
-        if issue['Details']:
-            print(f"    Details: {issue['Details']}")
-
-print("\n" + "="*80)
-print("MATCHING METHODOLOGY:")
-print("-" * 80)
-print("  1. Transaction ID matching (most specific)")
-print("  2. Phone number + Date matching (fallback)")
-print("  3. Status categorization: SUCCESS / FAILED / UNKNOWN")
-print("  4. Duration analysis for failed transactions (>7 seconds threshold)")
-
-print("\n" + "="*80)
-print("CRITICAL FINDINGS:")
-print("-" * 80)
-cat_a_amount = category_a_full['ImpUSD'].sum() if 'ImpUSD' in category_a_full.columns and not category_a_full.empty else 0
-cat_c_amount = category_c['ImpUSD'].sum() if 'ImpUSD' in category_c.columns and not category_c.empty else 0
-
-print(f"  WE OWE (Category A - Matched): {len(category_a_full):,} transactions - ${cat_a_amount:,.2f} USD")
-print(f"  NOT IN OUR LOGS (Category C): {len(category_c):,} transactions - ${cat_c_amount:,.2f} USD")
-print(f"  NOT IN THEIR CLAIM (Category D): {len(category_d):,} transactions")
-print(f"\n  TOTAL TELEFONICA CLAIM: ${telefonica_df['ImpUSD'].sum():,.2f} USD")
-print(f"  AMOUNT WE CAN CONFIRM: ${cat_a_amount:,.2f} USD ({cat_a_amount/telefonica_df['ImpUSD'].sum()*100:.1f}%)")
-print(f"  AMOUNT NOT IN OUR LOGS: ${cat_c_amount:,.2f} USD ({cat_c_amount/telefonica_df['ImpUSD'].sum()*100:.1f}%)")
-
-print("\n" + "="*80)
-print(f"End Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-print("="*80)
+
+        latcom_bundles_clean = latcom_df.loc[
+            bundles_mask & latcom_df['DATE_PARSED'].notna(),
+            ['LATCOM_INDEX', 'PHONE_NORMALIZED', 'PRODUCT_NORMALIZED', 'DATE_PARSED', 'DURATION_SECONDS']
+        ]
+
+        print(f"    Telefónica BUNDLES (clean): {len(telefonica_bundles_clean):,}")
+        print(f"    Latcom BUNDLES (clean): {len(latcom_bundles_clean):,}")
+
+        # Integer phone+product keys over categories shared by both sides
+        tf_keys, latcom_keys = phone_product_keys(
+            telefonica_bundles_clean['PHONE_NORMALIZED'],
+            telefonica_bundles_clean['PRODUCT_LATCOM_EQUIVALENT'],
+            latcom_bundles_clean['PHONE_NORMALIZED'],
+            latcom_bundles_clean['PRODUCT_NORMALIZED']
+        )
+        telefonica_bundles_clean = telefonica_bundles_clean.assign(PHONE_PRODUCT=tf_keys)
+        latcom_bundles_clean = latcom_bundles_clean.assign(PHONE_PRODUCT=latcom_keys)
+
+        matches_df = match_by_phone(
+            telefonica_bundles_clean, latcom_bundles_clean, match_phone_product_window,
+            left_columns=['TELEFONICA_INDEX', 'PHONE_PRODUCT', 'FECHA'],
+            right_columns=['LATCOM_INDEX', 'PHONE_PRODUCT', 'DATE_PARSED', 'DURATION_SECONDS'],
+            label='BUNDLES'
+        )
+        del telefonica_bundles_clean, latcom_bundles_clean
+
+        # One matched bitmap per side; later strategies only see the rows still open
+        match_state = MatchState(telefonica_df['TELEFONICA_INDEX'], latcom_df['LATCOM_INDEX'])
+        match_state.mark(matches_df['TELEFONICA_INDEX'], matches_df['LATCOM_INDEX'])
+
+        print(f"    ✓ Matched {(matches_df['MATCH_METHOD'] == 'PHONE_PRODUCT_DATE_WINDOW').sum():,} BUNDLES transactions")
+
+        # Match TOPUP (no product codes): Telefónica doesn't distinguish TOPUP in their
+        # codes, so every claim still unmatched is tried against the TOPUP CDRs on
+        # phone + amount (integer cents, ±TOPUP_TOLERANCE_CENTS) + closest date
+        print(f"  Matching remaining claims to TOPUP by phone + amount + date window (±{TOPUP_WINDOW_DAYS} days)...")
+        telefonica_topup_clean = telefonica_df[['TELEFONICA_INDEX', 'PHONE_NORMALIZED', 'ImpUSD_CENTS', 'FECHA']].take(
+            match_state.pending_left()
+        )
+        telefonica_topup_clean = telefonica_topup_clean.loc[
+            telefonica_topup_clean['FECHA'].notna() & telefonica_topup_clean['ImpUSD_CENTS'].notna()
+        ].rename(columns={'ImpUSD_CENTS': 'AMOUNT_CENTS'})
+
+        latcom_topup_clean = latcom_df.loc[
+            topup_mask & latcom_df['DATE_PARSED'].notna() & latcom_df['AMOUNT_CENTS'].notna(),
+            ['LATCOM_INDEX', 'PHONE_NORMALIZED', 'AMOUNT_CENTS', 'DATE_PARSED', 'DURATION_SECONDS']
+        ]
+
+        print(f"    Telefónica claims to match: {len(telefonica_topup_clean):,}")
+        print(f"    Latcom TOPUP (clean): {len(latcom_topup_clean):,}")
+
+        topup_matches = match_by_phone(
+            telefonica_topup_clean, latcom_topup_clean,
+            partial(match_phone_amount_window, window_days=TOPUP_WINDOW_DAYS, tolerance_cents=TOPUP_TOLERANCE_CENTS),
+            left_columns=['TELEFONICA_INDEX', 'PHONE_NORMALIZED', 'AMOUNT_CENTS', 'FECHA'],
+            right_columns=['LATCOM_INDEX', 'PHONE_NORMALIZED', 'AMOUNT_CENTS', 'DATE_PARSED', 'DURATION_SECONDS'],
+            label='TOPUP'
+        )
+        del telefonica_topup_clean, latcom_topup_clean
+
+        matches_df = pd.concat([matches_df, topup_matches], ignore_index=True)
+        match_state.mark(topup_matches['TELEFONICA_INDEX'], topup_matches['LATCOM_INDEX'])
+        print(f"    ✓ Matched {len(topup_matches):,} TOPUP transactions")
+
+        # Near-miss phones: claims still unmatched against CDR rows still unmatched,
+        # blocked by day + product + amount, phones (cleaned) equal or one edit apart
+        if FUZZY_PHONE:
+            print("  Matching remaining rows by near-miss phone (same day + product + amount)...")
+            fuzzy_telefonica = telefonica_df[
+                ['TELEFONICA_INDEX', 'PHONE_NORMALIZED', 'FECHA', 'PRODUCT_LATCOM_EQUIVALENT', 'ImpUSD_CENTS']
+            ].take(match_state.pending_left())
+            fuzzy_telefonica = fuzzy_telefonica.loc[fuzzy_telefonica['FECHA'].notna()]
+            fuzzy_telefonica = pd.DataFrame({
+                'TELEFONICA_INDEX': fuzzy_telefonica['TELEFONICA_INDEX'],
+                'PHONE_NORMALIZED': normalize_phones(fuzzy_telefonica['PHONE_NORMALIZED']),
+                'FECHA': fuzzy_telefonica['FECHA'],
+                'PRODUCT': fuzzy_telefonica['PRODUCT_LATCOM_EQUIVALENT'].astype(str),
+                'AMOUNT_CENTS': fuzzy_telefonica['ImpUSD_CENTS'],
+            })
+            fuzzy_latcom = latcom_df[
+                ['LATCOM_INDEX', 'PHONE_NORMALIZED', 'DATE_PARSED', 'DURATION_SECONDS', 'PRODUCT_NORMALIZED', 'AMOUNT_CENTS']
+            ].take(match_state.pending_right())
+            fuzzy_latcom = fuzzy_latcom.loc[fuzzy_latcom['DATE_PARSED'].notna()]
+            fuzzy_latcom = pd.DataFrame({
+                'LATCOM_INDEX': fuzzy_latcom['LATCOM_INDEX'],
+                'PHONE_NORMALIZED': normalize_phones(fuzzy_latcom['PHONE_NORMALIZED']),
+                'DATE_PARSED': fuzzy_latcom['DATE_PARSED'],
+                'DURATION_SECONDS': fuzzy_latcom['DURATION_SECONDS'],
+                'PRODUCT': fuzzy_latcom['PRODUCT_NORMALIZED'].astype(str),
+                'AMOUNT_CENTS': fuzzy_latcom['AMOUNT_CENTS'],
+            })
+            fuzzy_matches = match_fuzzy_phone(fuzzy_telefonica, fuzzy_latcom)
+            del fuzzy_telefonica, fuzzy_latcom
+
+            matches_df = pd.concat([matches_df, fuzzy_matches], ignore_index=True)
+            match_state.mark(fuzzy_matches['TELEFONICA_INDEX'], fuzzy_matches['LATCOM_INDEX'])
+            print(f"    ✓ Matched {len(fuzzy_matches):,} transactions by near-miss phone (FUZZY_PHONE)")
+
+        print(f"\n  ✓ Total matches found: {len(matches_df):,}")
+        print(f"  Telefónica records matched: {match_state.left_count:,} / {len(telefonica_df):,} ({match_state.left_count/len(telefonica_df)*100:.1f}%)")
+        print(f"  Latcom records matched: {match_state.right_count:,} / {latcom_total_rows:,} ({match_state.right_count/latcom_total_rows*100:.1f}%)")
+        match_stage.save({'telefonica': telefonica_df, 'matches': matches_df})
+
+    categorize_stage = checkpoints.stage('categorize', code=code_fingerprint(categorize, latcom_totals, MatchPositions),
+                                         report_columns=LATCOM_REPORT_COLUMNS)
+    saved = categorize_stage.restore()
+    if saved is not None:
+        print("\n[6/7] Categorizing transactions... (restored from checkpoint)")
+        category_a_full, category_c, category_d = saved['category_a'], saved['category_c'], saved['category_d']
+        category_d_totals = saved['category_d_totals']
+        category_d_count, cat_d_cents = saved['category_d_count'], saved['cat_d_cents']
+        category_b_full = pd.DataFrame()
+        category_b_slow = pd.DataFrame()
+    else:
+        # Step 6: Categorize transactions
+        print("\n[6/7] Categorizing transactions...")
+
+        category_a_full, category_c, category_d, category_d_totals = categorize(
+            telefonica_df, latcom_df, matches_df, latcom_totals_all
+        )
+        # Category B: Not applicable (no failed transactions in Latcom CDR)
+        category_b_full = pd.DataFrame()
+        category_b_slow = pd.DataFrame()
+        category_d_count = int(category_d_totals['ROWS'].sum())
+        cat_d_cents = int(category_d_totals['AMOUNT_CENTS'].sum())
+
+        print(f"  Category A (Matched - WE OWE): {len(category_a_full):,} transactions")
+        print(f"  Category B (Failed): N/A (no failed transactions in Latcom CDR)")
+        print(f"  Category C (Telefónica Only - NOT IN OUR LOGS): {len(category_c):,} transactions")
+        print(f"  Category D (Latcom Only - NOT IN THEIR CLAIM): {category_d_count:,} transactions")
+        categorize_stage.save(
+            {'category_a': category_a_full, 'category_c': category_c, 'category_d': category_d,
+             'category_d_totals': category_d_totals},
+            {'category_d_count': category_d_count, 'cat_d_cents': cat_d_cents}
+        )
+
+    # Step 7: Calculate summary statistics
+    print("\n[7/7] Calculating summary statistics...")
+
+    # USD totals are exact sums of integer cents
+    cat_a_cents = total_cents(category_a_full['ImpUSD_CENTS']) if 'ImpUSD_CENTS' in category_a_full.columns and not category_a_full.empty else 0
+    cat_c_cents = total_cents(category_c['ImpUSD_CENTS'])
+    telefonica_cents = total_cents(telefonica_df['ImpUSD_CENTS'])
+
+    summary_stats = {
+        'Total Telefónica Transactions': len(telefonica_df),
+        'Total Latcom Transactions': latcom_total_rows,
+        'Total Matches Found': len(matches_df),
+        'Match Rate (%)': f"{len(matches_df)/len(telefonica_df)*100:.2f}%",
+        '': '',
+        'Category A - Matched (WE OWE)': len(category_a_full),
+        'Category A - Amount USD': cents_to_usd(cat_a_cents),
+        '  ': '',
+        'Category B - Failed (N/A)': 'Not applicable - no failed status in Latcom CDR',
+        '   ': '',
+        'Category C - In Telefónica Only (NOT IN OUR LOGS)': len(category_c),
+        'Category C - Amount USD': cents_to_usd(cat_c_cents),
+        '    ': '',
+        'Category D - In Latcom Only (NOT IN THEIR CLAIM)': category_d_count,
+        'Category D - Amount USD': cents_to_usd(cat_d_cents),
+    }
+
+    # Month-by-month breakdown
+    print("  Calculating month-by-month breakdown...")
+    monthly_telefonica = telefonica_df.groupby('YEAR_MONTH').size().reset_index(name='Telefonica_Count')
+    monthly_telefonica_amount = telefonica_df.groupby('YEAR_MONTH')['ImpUSD_CENTS'].sum().reset_index(name='Telefonica_Amount_USD')
+    monthly_telefonica_amount['Telefonica_Amount_USD'] = cents_to_usd(monthly_telefonica_amount['Telefonica_Amount_USD'])
+
+    monthly_latcom = latcom_totals_all.groupby(level='YEAR_MONTH')['ROWS'].sum().reset_index(name='Latcom_Count')
+    monthly_breakdown = pd.merge(monthly_telefonica, monthly_latcom, on='YEAR_MONTH', how='outer')
+
+    monthly_breakdown = pd.merge(monthly_breakdown, monthly_telefonica_amount, on='YEAR_MONTH', how='left')
+    monthly_breakdown['YEAR_MONTH'] = monthly_breakdown['YEAR_MONTH'].astype(str)
+    monthly_breakdown = monthly_breakdown.fillna(0)
+    monthly_breakdown = monthly_breakdown.sort_values('YEAR_MONTH')
+
+    # Step 8: Generate Excel report
+    print("\n[8/8] Generating Excel report...")
+
+    try:
+        with pd.ExcelWriter(OUTPUT_FILE, engine='openpyxl') as writer:
+            # Sheet 1: Summary
+            summary_df = pd.DataFrame(list(summary_stats.items()), columns=['Metric', 'Value'])
+            summary_df.to_excel(writer, sheet_name='Summary', index=False)
+
+            # Sheet 2: Category A - Matched (WE OWE)
+            if not category_a_full.empty:
+                lineage.resolve(category_a_full).to_excel(writer, sheet_name='A - Matched WE OWE', index=False)
+            else:
+                pd.DataFrame({'Note': ['No matched transactions']}).to_excel(writer, sheet_name='A - Matched WE OWE', index=False)
+
+            # Sheet 3: Category C - In Telefónica Only (NOT IN OUR LOGS)
+            if not category_c.empty:
+                category_c.to_excel(writer, sheet_name='C - TF Only NOT IN LOGS', index=False)
+            else:
+                pd.DataFrame({'Note': ['No transactions in Telefónica only']}).to_excel(writer, sheet_name='C - TF Only NOT IN LOGS', index=False)
+
+            # Sheet 4: Category D - In Latcom Only (NOT IN THEIR CLAIM), totals per month and type
+            category_d_sheet = category_d_totals[category_d_totals['ROWS'] > 0].reset_index()
+            if not category_d_sheet.empty:
+                category_d_sheet = pd.DataFrame({
+                    'YEAR_MONTH': category_d_sheet['YEAR_MONTH'].astype(str),
+                    'TRANSACTION_TYPE': category_d_sheet['TRANSACTION_TYPE'].astype(str),
+                    'Transactions': category_d_sheet['ROWS'].astype(int),
+                    'Amount_USD': cents_to_usd(category_d_sheet['AMOUNT_CENTS'].astype('Int64')),
+                })
+                category_d_sheet.to_excel(writer, sheet_name='D - Latcom Only', index=False)
+            else:
+                pd.DataFrame({'Note': ['No transactions in Latcom only']}).to_excel(writer, sheet_name='D - Latcom Only', index=False)
+
+            # Sheet 4b: unmatched CDR rows kept in memory (claim-key candidates when prefiltered)
+            if not category_d.empty:
+                lineage.resolve(category_d).to_excel(writer, sheet_name='D - Unmatched Detail', index=False)
+
+            # Sheet 5: Month-by-month breakdown
+            monthly_breakdown.to_excel(writer, sheet_name='Monthly Breakdown', index=False)
+
+            # Sheet 6: Data Quality Issues
+            quality_issues = []
+            quality_issues.append({'Issue Type': 'File Loading Errors', 'Count': len(file_issues), 'Details': '; '.join(file_issues) if file_issues else 'None'})
+            quality_issues.append({'Issue Type': 'Telefónica records without dates', 'Count': telefonica_stats['FECHA'].nulls, 'Details': ''})
+            quality_issues.append({'Issue Type': 'Latcom records without dates', 'Count': latcom_stats['DATE_PARSED'].nulls, 'Details': ''})
+            quality_issues.append({'Issue Type': 'Latcom records without phone numbers', 'Count': latcom_stats['PHONE_NORMALIZED'].nulls + latcom_stats['PHONE_NORMALIZED'].empty, 'Details': ''})
+            quality_issues.append({'Issue Type': 'Products with no mapping', 'Count': telefonica_df[telefonica_df['PRODUCT_LATCOM_EQUIVALENT'] == '']['PRODUCT_CODE'].nunique(), 'Details': ''})
+
+            quality_df = pd.DataFrame(quality_issues)
+            quality_df.to_excel(writer, sheet_name='Data Quality Issues', index=False)
+
+            # Sheet 7: Matching Methodology
+            methodology = [
+                {'Step': 1, 'Description': 'Loaded Telefónica disputed transactions file', 'Records': len(telefonica_df)},
+                {'Step': 2, 'Description': 'Consolidated all Latcom CDR files (TOPUP + BUNDLES)', 'Records': latcom_total_rows},
+                {'Step': 2, 'Description': 'Kept CDR rows sharing a phone / SEC_ACTUACION with a claim (Bloom prefilter)', 'Records': len(latcom_df)},
+                {'Step': 3, 'Description': 'Normalized phone numbers and dates', 'Records': '-'},
+                {'Step': 4, 'Description': 'Created product code mapping (TF -> Latcom)', 'Records': len(PRODUCT_MAPPING)},
+                {'Step': 5, 'Description': 'Matched by phone + product + date window (±7 days)', 'Records': int((matches_df['MATCH_METHOD'] == 'PHONE_PRODUCT_DATE_WINDOW').sum())},
+                {'Step': 5, 'Description': f'Matched remaining claims to TOPUP by phone + amount (±{TOPUP_TOLERANCE_CENTS} cent) + date window (±{TOPUP_WINDOW_DAYS} days)', 'Records': int((matches_df['MATCH_METHOD'] == 'TOPUP_PHONE_AMOUNT_DATE_WINDOW').sum())},
+                {'Step': 5, 'Description': 'Matched leftovers by near-miss phone (one edit) + day + product + amount', 'Records': int((matches_df['MATCH_METHOD'] == 'FUZZY_PHONE').sum())},
+                {'Step': 6, 'Description': 'Categorized matched and unmatched records', 'Records': '-'},
+                {'Step': 7, 'Description': 'Generated comprehensive reconciliation report', 'Records': '-'},
+            ]
+            methodology_df = pd.DataFrame(methodology)
+            methodology_df.to_excel(writer, sheet_name='Matching Methodology', index=False)
+
+            # Sheet 8: Product Mapping Reference
+            product_mapping_df = pd.DataFrame([
+                {'Telefónica Code': k, 'Latcom Product': v if v else 'NOT FOUND'}
+                for k, v in PRODUCT_MAPPING.items()
+            ])
+            product_mapping_df.to_excel(writer, sheet_name='Product Mapping', index=False)
+
+        print(f"  ✓ Excel report generated successfully: {OUTPUT_FILE}")
+
+    except Exception as e:
+        print(f"  ✗ ERROR generating Excel report: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
+
+    # Final summary output
+    print("\n" + "="*80)
+    print("RECONCILIATION ANALYSIS COMPLETE")
+    print("="*80)
+    print(f"\nOutput File: {OUTPUT_FILE}")
+    print(f"\nSUMMARY STATISTICS:")
+    print("-" * 80)
+    for key, value in summary_stats.items():
+        if key.strip():  # Skip empty separator keys
+            print(f"  {key}: {value}")
+
+    print("\n" + "="*80)
+    print("DATA QUALITY ISSUES:")
+    print("-" * 80)
+    for issue in quality_issues:
+        if issue['Count'] > 0:
+            print(f"  {issue['Issue Type']}: {issue['Count']}")
+            if issue['Details']:
+                print(f"    Details: {issue['Details']}")
+
+    print("\n" + "="*80)
+    print("MATCHING METHODOLOGY:")
+    print("-" * 80)
+    print("  1. Transaction ID matching (most specific)")
+    print("  2. Phone number + Date matching (fallback)")
+    print(f"  2a. TOPUP: phone + amount (integer cents, ±{TOPUP_TOLERANCE_CENTS} cent) + closest date within ±{TOPUP_WINDOW_DAYS} days")
+    print("  2b. Near-miss phone (one edit or 52 prefix) + day + product + amount (FUZZY_PHONE)")
+    print("  3. Status categorization: SUCCESS / FAILED / UNKNOWN")
+    print("  4. Duration analysis for failed transactions (>7 seconds threshold)")
+
+    print("\n" + "="*80)
+    print("CRITICAL FINDINGS:")
+    print("-" * 80)
+    print(f"  WE OWE (Category A - Matched): {len(category_a_full):,} transactions - ${format_usd(cat_a_cents)} USD")
+    print(f"  NOT IN OUR LOGS (Category C): {len(category_c):,} transactions - ${format_usd(cat_c_cents)} USD")
+    print(f"  NOT IN THEIR CLAIM (Category D): {category_d_count:,} transactions - ${format_usd(cat_d_cents)} USD")
+    print(f"\n  TOTAL TELEFONICA CLAIM: ${format_usd(telefonica_cents)} USD")
+    print(f"  AMOUNT WE CAN CONFIRM: ${format_usd(cat_a_cents)} USD ({cat_a_cents/telefonica_cents*100:.1f}%)")
+    print(f"  AMOUNT NOT IN OUR LOGS: ${format_usd(cat_c_cents)} USD ({cat_c_cents/telefonica_cents*100:.1f}%)")
+
+    print("\n" + "="*80)
+    print(f"End Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("="*80)
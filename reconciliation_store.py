@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Indexed lookup store for Telefónica claims and Latcom CDRs
+
+    python reconciliation_store.py build              # load new/changed files
+    python reconciliation_store.py lookup 5512345678  # phone, SEC_ACTUACION or TransactionID
+
+`build` loads the TEMM CSV and every BUNDLES / TOPUP workbook into an
+SQLite file (RECON_STORE, default reconciliation_reports/reconciliation_store.sqlite),
+skipping files unchanged since the last build. `lookup` then prints every
+record for a phone number or transaction ID across all sources in
+milliseconds - no workbook reloads.
+"""
+
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+from reconciliation.readers import read_table
+from reconciliation.store import connect, load_file, lookup
+
+# Sources (same locations as reconciliation_analysis.py)
+TELEFONICA_FILE = "/Users/richardmas/Downloads/Datos de TF auditoria/Registros_TEMM_NoSoporteActual_202309_202412.csv"
+LATCOM_DIR = "/Users/richardmas/Downloads/Reconciliacion TF Latcom 2023 al presente"
+
+LATCOM_FILES = {
+    'TOPUP': glob.glob(f"{LATCOM_DIR}/TOPUP  2023/*.xlsx") + glob.glob(f"{LATCOM_DIR}/TOPUP  2024/*.xlsx"),
+    'BUNDLES': glob.glob(f"{LATCOM_DIR}/BUNDLES 2023/*.xlsx") + glob.glob(f"{LATCOM_DIR}/BUNDLES 2024/*.xlsx"),
+}
+
+
+def build():
+    conn = connect()
+    sources = [('TEMM', TELEFONICA_FILE)]
+    for source, files in LATCOM_FILES.items():
+        sources += [(source, path) for path in sorted(files) if '~$' not in path]
+
+    print(f"📦 Building lookup store ({len(sources)} source files)...")
+    for source, path in sources:
+        if not os.path.exists(path):
+            print(f"   ✗ Not found: {path}")
+            continue
+        try:
+            loaded = load_file(conn, path, source, read_table)
+        except Exception as e:
+            print(f"   ✗ {os.path.basename(path)}: {e}")
+            continue
+        if loaded is None:
+            print(f"   = {os.path.basename(path)} (unchanged)")
+        else:
+            print(f"   ✓ {os.path.basename(path)}: {loaded:,} records")
+
+    total = conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+    print(f"\n✅ Store ready: {total:,} records")
+
+
+def show(value):
+    conn = connect()
+    started = time.perf_counter()
+    rows = lookup(conn, value)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\n🔍 {value}: {len(rows):,} records ({elapsed_ms:.1f} ms)")
+    for source, group in rows.groupby('source', sort=False):
+        print(f"\n{source} ({len(group):,}):")
+        detail = pd.DataFrame(list(group['data']))
+        detail.insert(0, 'SOURCE_FILE', group['source_file'].map(os.path.basename).to_numpy())
+        print(detail.to_string(index=False))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'lookup') or (sys.argv[1] == 'lookup' and len(sys.argv) < 3):
+        print("Usage:")
+        print("  python reconciliation_store.py build")
+        print("  python reconciliation_store.py lookup <phone | SEC_ACTUACION | TransactionID> [...]")
+        sys.exit(1)
+
+    if sys.argv[1] == 'build':
+        build()
+    else:
+        for value in sys.argv[2:]:
+            show(value)
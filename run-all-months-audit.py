@@ -8,6 +8,10 @@ import os
 from datetime import datetime
 import importlib.util
 
+from reconciliation.ids import ID_DTYPES, align_ids
+from reconciliation.money import cents_to_usd
+from reconciliation.progress import Progress
+
 # Import the Luis analysis function
 spec = importlib.util.spec_from_file_location("luis_audit", "/Users/richardmas/latcom-fix/luis-automated-monthly-audit.py")
 luis_audit = importlib.util.module_from_spec(spec)
@@ -46,7 +50,7 @@ months_2024 = {
 
 def extract_month_from_temm(temm_file, year, month_num):
     """Extract a specific month from the TEMM file"""
-    df = pd.read_csv(temm_file, encoding='utf-8-sig')
+    df = pd.read_csv(temm_file, encoding='utf-8-sig', dtype=ID_DTYPES)
     df['FECHA'] = pd.to_datetime(df['FECHA'], format='%d/%m/%Y')
     df['Year'] = df['FECHA'].dt.year
     df['Month'] = df['FECHA'].dt.month
@@ -62,8 +66,8 @@ def extract_latcom_sheets(base_dir, file_name, total_sheet):
     """Extract sheets from Latcom Excel file"""
     file_path = f'{base_dir}/{file_name}'
 
-    df_adjusted = pd.read_excel(file_path, sheet_name='ADJUSTED')
-    df_total = pd.read_excel(file_path, sheet_name=total_sheet)
+    df_adjusted = pd.read_excel(file_path, sheet_name='ADJUSTED', dtype=ID_DTYPES)
+    df_total = pd.read_excel(file_path, sheet_name=total_sheet, dtype=ID_DTYPES)
 
     temp_adjusted = f'/tmp/latcom_adjusted_{file_name}.csv'
     temp_total = f'/tmp/latcom_total_{file_name}.csv'
@@ -163,18 +167,20 @@ def create_month_excel(month_name, year, result, df_temm, df_adjusted, df_total,
 
         # TEMM Data
         df_temm_clean = clean_transaction_id(df_temm.copy(), 'SEC_ACTUACION')
+        df_adjusted_clean = clean_transaction_id(df_adjusted.copy(), 'VENDOR_TRANSACTION_ID')
+        df_total_clean = clean_transaction_id(df_total.copy(), 'VENDOR_TRANSACTION_ID')
+        df_temm_clean['SEC_ACTUACION_CLEAN'], df_adjusted_clean['VENDOR_TRANSACTION_ID_CLEAN'], df_total_clean['VENDOR_TRANSACTION_ID_CLEAN'] = align_ids(
+            df_temm_clean['SEC_ACTUACION_CLEAN'], df_adjusted_clean['VENDOR_TRANSACTION_ID_CLEAN'], df_total_clean['VENDOR_TRANSACTION_ID_CLEAN'])
         df_temm_clean[['FECHA', 'NUM_TELEFONO', 'SEC_ACTUACION', 'ImpUSD', 'SEC_ACTUACION_CLEAN']].to_excel(
             writer, sheet_name='TEMM_Telefonica', index=False
         )
 
         # Adjusted Data
-        df_adjusted_clean = clean_transaction_id(df_adjusted.copy(), 'VENDOR_TRANSACTION_ID')
         df_adjusted_clean[['VENDOR_TRANSACTION_ID', 'TransactionAmountUSD', 'VENDOR_TRANSACTION_ID_CLEAN']].to_excel(
             writer, sheet_name='Adjusted_Latcom', index=False
         )
 
         # Total Data
-        df_total_clean = clean_transaction_id(df_total.copy(), 'VENDOR_TRANSACTION_ID')
         df_total_clean[['VENDOR_TRANSACTION_ID', 'TransactionAmountUSD', 'VENDOR_TRANSACTION_ID_CLEAN']].to_excel(
             writer, sheet_name='Total_Latcom', index=False
         )
@@ -202,6 +208,7 @@ print('Running analysis for all months with Excel reports')
 print('=' * 120)
 
 all_results = []
+month_progress = Progress('Monthly audits', total=len(months_2023) + len(months_2024), unit='months', indent='   ')
 
 # Process 2023 months
 print('\n' + '═' * 120)
@@ -242,9 +249,12 @@ for month_num, config in months_2023.items():
         # Print summary
         print(f'   ✅ Pattern Detected: {result["luis_pattern_detected"]}')
         print(f'   💰 Real Issue: ${result["missing_usd"]:,.2f} | Artificial: ${result["adjusted_not_in_temm_usd"]:,.2f}')
+        month_progress.update(rows=len(df_temm) + len(df_adjusted) + len(df_total),
+                              patterns=int(bool(result["luis_pattern_detected"])))
 
     except Exception as e:
         print(f'   ❌ ERROR: {str(e)}')
+        month_progress.update(errors=1)
 
 # Process 2024 months
 print('\n' + '═' * 120)
@@ -285,9 +295,14 @@ for month_num, config in months_2024.items():
         # Print summary
         print(f'   ✅ Pattern Detected: {result["luis_pattern_detected"]}')
         print(f'   💰 Real Issue: ${result["missing_usd"]:,.2f} | Artificial: ${result["adjusted_not_in_temm_usd"]:,.2f}')
+        month_progress.update(rows=len(df_temm) + len(df_adjusted) + len(df_total),
+                              patterns=int(bool(result["luis_pattern_detected"])))
 
     except Exception as e:
         print(f'   ❌ ERROR: {str(e)}')
+        month_progress.update(errors=1)
+
+month_progress.finish()
 
 print('\n' + '═' * 120)
 print('CREATING MASTER SUMMARY')
@@ -329,11 +344,12 @@ with pd.ExcelWriter(summary_output, engine='xlsxwriter') as writer:
             df_master['Missing_Count'].sum(),
             df_master['Adjusted_NOT_In_TEMM'].sum()
         ],
+        # Summed in cents across months, converted once
         'Amount_USD': [
-            df_master['TEMM_USD'].sum(),
-            df_master['Adjusted_USD'].sum(),
-            df_master['Missing_USD'].sum(),
-            df_master['Excluded_USD'].sum()
+            cents_to_usd(sum(r['temm_cents'] for r in all_results)),
+            cents_to_usd(sum(r['adjusted_cents'] for r in all_results)),
+            cents_to_usd(sum(r['missing_cents'] for r in all_results)),
+            cents_to_usd(sum(r['adjusted_not_in_temm_cents'] for r in all_results))
         ]
     }
 
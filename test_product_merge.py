@@ -2,6 +2,8 @@
 import pandas as pd
 import glob
 
+from reconciliation.products import product_columns_in, normalize_products
+
 # Load ALL Bundles
 bundles_files = glob.glob("/Users/richardmas/Downloads/Reconciliacion TF Latcom 2023 al presente/BUNDLES 2023/*.xlsx") + \
                 glob.glob("/Users/richardmas/Downloads/Reconciliacion TF Latcom 2023 al presente/BUNDLES 2024/*.xlsx")
@@ -17,21 +19,14 @@ bundles = pd.concat(all_bundles, ignore_index=True)
 print(f"Total bundles: {len(bundles):,}")
 print(f"Columns: {list(bundles.columns)}")
 
-# Try merging product columns as in the script
-product_columns = [col for col in bundles.columns if col in ['Product', 'Product MobiFin', 'Product MoviStar', 'Product Sagar', 'Product ']]
+# Merge product columns as in the script
+product_columns = product_columns_in(bundles)
 
 print(f"\nProduct columns found: {product_columns}")
 
 if product_columns:
-    # Coalesce all product columns into one
-    bundles['PRODUCT_NORMALIZED'] = bundles[product_columns[0]].astype(str)
-    for col in product_columns[1:]:
-        bundles['PRODUCT_NORMALIZED'] = bundles['PRODUCT_NORMALIZED'].fillna(bundles[col].astype(str))
-
-    # Clean up 'nan' strings
-    bundles['PRODUCT_NORMALIZED'] = bundles['PRODUCT_NORMALIZED'].str.strip()
-    bundles['PRODUCT_NORMALIZED'] = bundles['PRODUCT_NORMALIZED'].replace('nan', '')
-    bundles['PRODUCT_NORMALIZED'] = bundles['PRODUCT_NORMALIZED'].replace('None', '')
+    # Coalesce all product columns into one (categorical, 'nan'/'None' already blanked)
+    bundles['PRODUCT_NORMALIZED'] = normalize_products(bundles, product_columns)
 
     print(f"\nProduct column stats:")
     print(f"  Non-empty: {bundles['PRODUCT_NORMALIZED'].ne('').sum():,}")
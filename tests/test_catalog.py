@@ -0,0 +1,76 @@
+import os
+from datetime import date
+
+import pandas as pd
+
+from reconciliation.catalog import DatasetCatalog, span_from_filename
+
+
+def _csv(path, dates=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dates = dates or ['2024-08-15']
+    pd.DataFrame({'DATETIME': dates, 'AMOUNT': range(len(dates))}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_span_from_filename():
+    assert span_from_filename('/x/TOPUP AGOSTO 2024.xlsx') == (date(2024, 8, 1), date(2024, 8, 31))
+    assert span_from_filename('/x/Registros_202309_202312.csv') == (date(2023, 9, 1), date(2023, 12, 31))
+    assert span_from_filename('/x/cdr_2024.xlsx') == (date(2024, 1, 1), date(2024, 12, 31))
+    assert span_from_filename('/x/2023/cdr.xlsx') == (date(2023, 1, 1), date(2023, 12, 31))
+    assert span_from_filename('/x/cdr.xlsx') is None
+
+
+def test_year_only_files_do_not_count_as_coverage(tmp_path):
+    catalog = DatasetCatalog(str(tmp_path / 'catalog.json'))
+    month_named = _csv(tmp_path / 'TOPUP AGOSTO 2024.csv')
+    year_named = _csv(tmp_path / 'TOPUP_2024.csv')
+    year_folder = _csv(tmp_path / '2024' / 'topup.csv')
+    scanned = _csv(tmp_path / '2024' / 'topup_scanned.csv', ['2024-10-02', '2024-11-30'])
+    dated = _csv(tmp_path / 'claims.csv', ['2024-06-01', '2024-06-02', '2024-07-09'])
+    for path in (month_named, year_named, year_folder, scanned):
+        catalog.refresh(path, 'TOPUP')
+    catalog.read_period(scanned, 'DATETIME', '2024-01-01', '2024-12-31')
+    catalog.refresh(dated, 'TEMM', date_column='DATETIME')
+
+    covered = catalog.covered_months('TOPUP')
+    assert sorted(covered) == ['2024-08', '2024-10', '2024-11']
+    assert covered['2024-08'] == [month_named]
+    assert catalog.unverified('TOPUP') == sorted([year_named, year_folder])
+    # The gap report: claim months with no verified CDR file
+    claim_months = set(catalog.covered_months('TEMM'))
+    assert claim_months == {'2024-06', '2024-07'}
+    assert sorted(claim_months - set(covered)) == ['2024-06', '2024-07']
+
+
+def test_changed_file_drops_out_of_coverage(tmp_path):
+    catalog = DatasetCatalog(str(tmp_path / 'catalog.json'))
+    path = _csv(tmp_path / 'TOPUP AGOSTO 2024.csv')
+    catalog.refresh(path, 'TOPUP')
+    catalog.save()
+    assert list(DatasetCatalog(catalog.path).covered_months('TOPUP')) == ['2024-08']
+    _csv(tmp_path / 'TOPUP AGOSTO 2024.csv', ['2024-08-01', '2024-08-02'])
+    os.utime(path, (1, 1))
+    assert DatasetCatalog(catalog.path).covered_months('TOPUP') == {}
+
+
+def test_read_period_keeps_the_whole_end_day(tmp_path):
+    catalog = DatasetCatalog(str(tmp_path / 'catalog.json'))
+    path = _csv(tmp_path / 'company.csv', ['2023-08-31 23:59:59', '2023-09-01 00:00:00', '2024-12-31 00:00:00',
+                                           '2024-12-31 18:30:00', '2025-01-01 00:00:00'])
+    df = catalog.read_period(path, 'DATETIME', pd.to_datetime('2023-09-01'), pd.to_datetime('2024-12-31'))
+    assert df['DATETIME'].dt.strftime('%Y-%m-%d %H:%M').tolist() == [
+        '2023-09-01 00:00', '2024-12-31 00:00', '2024-12-31 18:30']
+    assert catalog.date_span(path) == (date(2023, 8, 31), date(2025, 1, 1))
+
+
+def test_month_named_file_spilling_into_next_month_is_not_pruned(tmp_path):
+    catalog = DatasetCatalog(str(tmp_path / 'catalog.json'))
+    # Local evening of Aug 31 is Sep 1 in UTC, which is what read_period compares
+    path = _csv(tmp_path / 'TOPUP AGOSTO 2024.csv', ['2024-08-31T20:00:00-05:00'])
+    files, skipped = catalog.select([path], '2024-09-01', '2024-09-30')
+    assert files == [path] and skipped == []
+    assert len(catalog.read_period(path, 'DATETIME', '2024-09-01', '2024-09-30')) == 1
+    # Once scanned, the exact span decides
+    assert catalog.select([path], '2024-09-02', '2024-09-30') == ([], [path])
+    assert catalog.select([path], '2024-07-01', '2024-07-31') == ([], [path])
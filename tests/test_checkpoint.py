@@ -0,0 +1,66 @@
+import pandas as pd
+
+from reconciliation.checkpoint import StageCheckpoints, code_fingerprint, resume_option
+
+
+def rules_v1(df):
+    return df['AMOUNT'] > 0
+
+
+def rules_v2(df):
+    return df['AMOUNT'] >= 0
+
+
+def _run(root, inputs, rules, resume=True, match_setting=1):
+    """One pass over two stages; returns which stages were restored"""
+    checkpoints = StageCheckpoints(inputs, root=str(root), resume=resume)
+    restored = {}
+    frame = pd.DataFrame({'AMOUNT': [1, 0, 2]})
+    for name, settings in (('match', {'window': match_setting}),
+                           ('categorize', {'code': code_fingerprint(rules)})):
+        stage = checkpoints.stage(name, **settings)
+        saved = stage.restore()
+        restored[name] = saved is not None
+        if saved is None:
+            stage.save({'frame': frame[rules(frame)]}, {'rows': 3})
+        else:
+            assert saved['rows'] == 3
+    return restored
+
+
+def test_unchanged_stages_are_restored(tmp_path):
+    inputs = [str(tmp_path / 'input.csv')]
+    (tmp_path / 'input.csv').write_text('AMOUNT\n1\n')
+    root = tmp_path / 'checkpoints'
+    assert _run(root, inputs, rules_v1) == {'match': False, 'categorize': False}
+    assert _run(root, inputs, rules_v1) == {'match': True, 'categorize': True}
+
+
+def test_code_change_invalidates_only_that_stage(tmp_path):
+    root = tmp_path / 'checkpoints'
+    _run(root, [], rules_v1)
+    assert code_fingerprint(rules_v1) != code_fingerprint(rules_v2)
+    assert _run(root, [], rules_v2) == {'match': True, 'categorize': False}
+
+
+def test_setting_or_input_change_invalidates_downstream(tmp_path):
+    root = tmp_path / 'checkpoints'
+    source = tmp_path / 'input.csv'
+    source.write_text('AMOUNT\n1\n')
+    _run(root, [str(source)], rules_v1)
+    assert _run(root, [str(source)], rules_v1, match_setting=2) == {'match': False, 'categorize': False}
+    source.write_text('AMOUNT\n1\n2\n')
+    assert _run(root, [str(source)], rules_v1, match_setting=2) == {'match': False, 'categorize': False}
+
+
+def test_resume_up_to_a_stage(tmp_path):
+    root = tmp_path / 'checkpoints'
+    _run(root, [], rules_v1)
+    assert _run(root, [], rules_v1, resume='match') == {'match': True, 'categorize': False}
+    assert _run(root, [], rules_v1, resume=False) == {'match': False, 'categorize': False}
+
+
+def test_resume_option():
+    assert resume_option(['--resume']) is True
+    assert resume_option(['x', '--resume=match']) == 'match'
+    assert resume_option([]) is False
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from reconciliation.dates import parse_dates
+
+
+def row_wise(value):
+    # The per-row cascade parse_dates replaced
+    for fmt in ['%d/%m/%Y', '%Y-%m-%d', '%m/%d/%Y']:
+        try:
+            return pd.to_datetime(value, format=fmt)
+        except (ValueError, TypeError):
+            continue
+    return pd.to_datetime(value)
+
+
+def test_ambiguous_values_parse_like_row_wise_cascade():
+    values = ['01/13/2023', '01/02/2023', '2023-03-04', '13/01/2023', '01/02/2023']
+    parsed = parse_dates(values, errors='raise')
+    assert parsed.tolist() == [row_wise(value) for value in values]
+    assert parsed[1] == pd.Timestamp('2023-02-01')
+
+
+def test_numeric_and_fixed_format():
+    parsed = parse_dates([20230901, 20231015.0, None], formats=['%Y%m%d'], infer=False)
+    assert parsed.tolist()[:2] == [pd.Timestamp('2023-09-01'), pd.Timestamp('2023-10-15')]
+    assert pd.isna(parsed[2])
@@ -0,0 +1,16 @@
+import pandas as pd
+
+from reconciliation.ids import transaction_ids
+
+
+def test_nineteen_digit_ids_stay_int64():
+    ids, invalid = transaction_ids(pd.Series(['9223372036854775807', '1000000000000000001', '12', '']))
+    assert str(ids.dtype) == 'Int64'
+    assert ids.tolist()[:3] == [9223372036854775807, 1000000000000000001, 12]
+    assert not invalid.any()
+
+
+def test_ids_beyond_int64_are_flagged():
+    ids, invalid = transaction_ids(pd.Series(['9223372036854775808', '12', 'LT178061', '12.0']))
+    assert invalid.tolist() == [True, False, True, False]
+    assert ids.tolist() == ['9223372036854775808', '12', 'LT178061', '12']
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from reconciliation.lineage import FileLineage
+
+
+def test_stamp_and_resolve():
+    lineage = FileLineage()
+    topup = lineage.stamp(pd.DataFrame({'PHONE': ['a', 'b']}), lineage.add('/data/TOPUP_202401.csv'), 'TOPUP')
+    bundles = lineage.stamp(pd.DataFrame({'PHONE': ['c']}), lineage.add('/data/BUNDLES_202401.csv'), 'BUNDLES')
+    rows = pd.concat([topup, bundles], ignore_index=True)
+    assert rows['FILE_ID'].tolist() == [0, 0, 1]
+    assert rows['ROW_IN_FILE'].tolist() == [0, 1, 0]
+    assert list(rows['TRANSACTION_TYPE']) == ['TOPUP', 'TOPUP', 'BUNDLES']
+
+    report = FileLineage.from_list(lineage.to_list()).resolve(rows)
+    assert list(report.columns) == ['PHONE', 'SOURCE_FILE', 'FILE_ID', 'ROW_IN_FILE', 'TRANSACTION_TYPE']
+    assert list(report['SOURCE_FILE']) == ['TOPUP_202401.csv', 'TOPUP_202401.csv', 'BUNDLES_202401.csv']
+    assert 'SOURCE_FILE' not in rows.columns
+
+
+def test_null_file_id_resolves_to_null():
+    lineage = FileLineage(['a.csv'])
+    names = lineage.names(pd.Series([0, None], dtype='Int16'))
+    assert names[0] == 'a.csv' and pd.isna(names[1])
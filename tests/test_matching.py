@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reconciliation import matching
+
+
+@pytest.fixture(params=['packed', 'lexsort'])
+def key_path(request, monkeypatch):
+    if request.param == 'lexsort':
+        # Force the overflow-safe path that millions of distinct phones take
+        monkeypatch.setattr(matching, 'PACKED_CODE_LIMIT', 0)
+    return request.param
+
+
+def test_band_ranges_past_packed_code_limit():
+    codes = np.array([1 << 23, 1 << 23, 5, 1 << 24])
+    cents = np.array([1000, 1002, 1001, 1001])
+    order, starts, ends = matching._band_ranges(codes, cents, np.array([1 << 23, 1 << 24, 7]),
+                                                np.array([999, 1000, 0]), np.array([1001, 1002, 10 ** 6]))
+    assert [sorted(order[s:e].tolist()) for s, e in zip(starts, ends)] == [[0], [3], []]
+
+
+def test_phone_amount_window(key_path):
+    telefonica = pd.DataFrame({
+        'TELEFONICA_INDEX': [0, 1, 2],
+        'PHONE_NORMALIZED': ['5511111111', '5522222222', '5533333333'],
+        'AMOUNT_CENTS': [10000, 5000, 2000],
+        'FECHA': pd.to_datetime(['2024-01-10', '2024-01-10', '2024-01-10']),
+    })
+    latcom = pd.DataFrame({
+        'LATCOM_INDEX': [10, 11, 12, 13],
+        'PHONE_NORMALIZED': ['5522222222', '5511111111', '5511111111', '5533333333'],
+        'AMOUNT_CENTS': [5001, 10000, 10000, 2500],
+        'DATE_PARSED': pd.to_datetime(['2024-01-12', '2024-01-20', '2024-01-11', '2024-01-10']),
+        'DURATION_SECONDS': [1.0, 2.0, 3.0, 4.0],
+    })
+    matches = matching.match_phone_amount_window(telefonica, latcom, window_days=7, tolerance_cents=1)
+    pairs = dict(zip(matches['TELEFONICA_INDEX'], matches['LATCOM_INDEX']))
+    assert pairs == {0: 12, 1: 10}
+
+
+def test_first_match_amount_band(key_path):
+    left_keys = pd.DataFrame({'PHONE': ['a', 'b', 'c'], 'DAY': ['d1', 'd1', 'd1']})
+    right_keys = pd.DataFrame({'PHONE': ['b', 'a', 'a'], 'DAY': ['d1', 'd1', 'd1']})
+    positions, adjustment = matching.first_match_amount_band(
+        left_keys, [11600, 10000, 500], right_keys, [11600, 10000, 11600]
+    )
+    assert positions.tolist() == [1, 0, -1]
+    assert adjustment.tolist() == [0, 1, -1]
+
+
+def _claim_order_greedy(tf_rows, lc_rows, diffs):
+    """Reference: claims in order, each takes its closest free CDR row (CDR order on ties)"""
+    used, won = set(), {}
+    for claim in sorted(set(tf_rows.tolist())):
+        mine = [(d, r) for t, r, d in zip(tf_rows.tolist(), lc_rows.tolist(), diffs.tolist()) if t == claim]
+        free = [(d, r) for d, r in sorted(mine) if r not in used]
+        if free:
+            used.add(free[0][1])
+            won[claim] = free[0][1]
+    return won
+
+
+def _sides(n_claims, n_cdrs):
+    telefonica = pd.DataFrame({'TELEFONICA_INDEX': np.arange(n_claims)})
+    latcom = pd.DataFrame({'LATCOM_INDEX': np.arange(n_cdrs), 'DURATION_SECONDS': np.zeros(n_cdrs)})
+    return telefonica, latcom
+
+
+def test_assign_closest_is_claim_order_greedy_under_contention():
+    # Claim 0 takes A; claim 1 falls back to B, so claim 2 (which only wants B) loses.
+    # Taking first choices round by round would give B to claim 2 and leave claim 1 empty.
+    tf_rows, lc_rows, diffs = np.array([0, 1, 1, 2]), np.array([0, 0, 1, 1]), np.array([5, 1, 2, 0])
+    telefonica, latcom = _sides(3, 2)
+    matches = matching._assign_closest(telefonica, latcom, tf_rows, lc_rows, diffs, 'M')
+    assert dict(zip(matches['TELEFONICA_INDEX'], matches['LATCOM_INDEX'])) == {0: 0, 1: 1}
+
+
+def test_assign_closest_matches_reference_on_random_contention():
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        n_pairs = int(rng.integers(1, 60))
+        tf_rows = rng.integers(0, 15, n_pairs)
+        lc_rows = rng.integers(0, 10, n_pairs)
+        keep = ~pd.DataFrame({'t': tf_rows, 'l': lc_rows}).duplicated().to_numpy()
+        tf_rows, lc_rows = tf_rows[keep], lc_rows[keep]
+        diffs = rng.integers(0, 4, len(tf_rows))
+        telefonica, latcom = _sides(15, 10)
+        matches = matching._assign_closest(telefonica, latcom, tf_rows, lc_rows, diffs, 'M')
+        assert dict(zip(matches['TELEFONICA_INDEX'], matches['LATCOM_INDEX'])) == \
+            _claim_order_greedy(tf_rows, lc_rows, diffs)
+        assert matches['TELEFONICA_INDEX'].is_monotonic_increasing
+
+
+def _product_window_loop(telefonica, latcom, window_days=7):
+    """Reference: the per-claim scan match_phone_product_window replaced"""
+    lc = latcom.reset_index(drop=True)
+    used, won = set(), {}
+    window = pd.Timedelta(days=window_days)
+    for claim in telefonica.itertuples():
+        diffs = (lc['DATE_PARSED'] - claim.FECHA).abs()
+        eligible = (lc['PHONE_PRODUCT'] == claim.PHONE_PRODUCT) & (diffs <= window) & ~lc.index.isin(list(used))
+        if eligible.any():
+            best = diffs[eligible].idxmin()
+            used.add(best)
+            won[claim.TELEFONICA_INDEX] = lc.at[best, 'LATCOM_INDEX']
+    return won
+
+
+def test_phone_product_window_matches_per_claim_loop():
+    rng = np.random.default_rng(11)
+    for _ in range(30):
+        n_tf, n_lc = int(rng.integers(1, 40)), int(rng.integers(1, 60))
+        telefonica = pd.DataFrame({
+            'TELEFONICA_INDEX': np.arange(n_tf) + 100,
+            'PHONE_PRODUCT': rng.integers(0, 5, n_tf),
+            'FECHA': pd.Timestamp('2024-03-01') + pd.to_timedelta(rng.integers(0, 20, n_tf), unit='D'),
+        })
+        latcom = pd.DataFrame({
+            'LATCOM_INDEX': np.arange(n_lc) + 1000,
+            'PHONE_PRODUCT': rng.integers(0, 5, n_lc),
+            'DATE_PARSED': pd.Timestamp('2024-03-01') + pd.to_timedelta(rng.integers(0, 20 * 24, n_lc), unit='h'),
+            'DURATION_SECONDS': rng.random(n_lc),
+        })
+        matches = matching.match_phone_product_window(telefonica, latcom)
+        assert dict(zip(matches['TELEFONICA_INDEX'], matches['LATCOM_INDEX'])) == _product_window_loop(telefonica, latcom)
+        assert list(matches.columns) == matching.MATCH_COLUMNS
@@ -0,0 +1,22 @@
+import pandas as pd
+
+from reconciliation.money import cents_to_usd, format_usd, to_cents, total_cents
+
+
+def test_to_cents_rounds_half_to_even():
+    cents = to_cents(pd.Series([0.125, 0.135, '10.5', 'n/a', None]))
+    assert str(cents.dtype) == 'Int64'
+    assert cents.tolist()[:3] == [12, 14, 1050]
+    assert cents.isna().tolist()[3:] == [True, True]
+
+
+def test_total_is_exact():
+    cents = to_cents(pd.Series([0.1] * 1_000_000 + [None]))
+    assert total_cents(cents) == 10_000_000
+    assert cents_to_usd(total_cents(cents)) == 100_000.0
+
+
+def test_format_usd():
+    assert format_usd(1234567) == '12,345.67'
+    assert format_usd(-5) == '-0.05'
+    assert format_usd(0) == '0.00'
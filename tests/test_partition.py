@@ -0,0 +1,85 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from reconciliation.matching import match_phone_amount_window, match_phone_product_window
+from reconciliation.partition import SERIAL_SHARDS, SpillPartitions, match_partitions, match_sharded, partition_of
+from reconciliation.progress import Progress
+
+
+def _sides(seed=5, n_tf=400, n_lc=900, phones=60):
+    rng = np.random.default_rng(seed)
+    tf_phones = rng.integers(0, phones, n_tf)
+    lc_phones = rng.integers(0, phones, n_lc)
+    telefonica = pd.DataFrame({
+        'TELEFONICA_INDEX': np.arange(n_tf),
+        'PHONE_NORMALIZED': [f'55{p:08d}' for p in tf_phones],
+        'PHONE_PRODUCT': tf_phones * 3 + rng.integers(0, 3, n_tf),
+        'AMOUNT_CENTS': pd.array(rng.choice([1000, 2000, 5000], n_tf), dtype='Int64'),
+        'FECHA': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 60, n_tf), unit='D'),
+    })
+    latcom = pd.DataFrame({
+        'LATCOM_INDEX': np.arange(n_lc) + 10_000,
+        'PHONE_NORMALIZED': [f'55{p:08d}' for p in lc_phones],
+        'PHONE_PRODUCT': lc_phones * 3 + rng.integers(0, 3, n_lc),
+        'AMOUNT_CENTS': pd.array(rng.choice([999, 1000, 2001, 5000], n_lc), dtype='Int64'),
+        'DATE_PARSED': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 60 * 24, n_lc), unit='h'),
+        'DURATION_SECONDS': rng.random(n_lc),
+    })
+    return telefonica, latcom
+
+
+MATCHERS = [
+    match_phone_product_window,
+    partial(match_phone_amount_window, window_days=7, tolerance_cents=1),
+]
+
+
+@pytest.mark.parametrize('match_fn', MATCHERS)
+@pytest.mark.parametrize('workers', [1, 2])
+def test_match_sharded_equals_in_memory(match_fn, workers):
+    telefonica, latcom = _sides()
+    expected = match_fn(telefonica, latcom).reset_index(drop=True)
+    found = match_sharded(telefonica, latcom, telefonica['PHONE_NORMALIZED'], latcom['PHONE_NORMALIZED'],
+                          match_fn, sort_by='TELEFONICA_INDEX', workers=workers)
+    assert len(expected) > 50
+    pd.testing.assert_frame_equal(found.reset_index(drop=True), expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_match_partitions_equals_in_memory(tmp_path, workers):
+    telefonica, latcom = _sides(seed=9)
+    expected = match_phone_product_window(telefonica, latcom).reset_index(drop=True)
+    left = SpillPartitions(str(tmp_path), 'telefonica', 8)
+    right = SpillPartitions(str(tmp_path), 'latcom', 8)
+    # Appended in several chunks, as the scripts spill file by file
+    for chunk in np.array_split(np.arange(len(telefonica)), 3):
+        part = telefonica.iloc[chunk]
+        left.append(part, part['PHONE_NORMALIZED'])
+    right.append(latcom, latcom['PHONE_NORMALIZED'])
+    assert left.partition_rows.sum() == len(telefonica)
+
+    found = match_partitions(left, right, match_phone_product_window, sort_by='TELEFONICA_INDEX', workers=workers)
+    pd.testing.assert_frame_equal(found.reset_index(drop=True), expected, check_dtype=False)
+
+
+def test_partition_of_is_stable():
+    keys = pd.Series(['5511111111', '5522222222', '5511111111'])
+    parts = partition_of(keys, 16)
+    assert parts[0] == parts[2]
+    assert parts.tolist() == partition_of(keys.tolist(), 16).tolist()
+
+
+def test_serial_match_with_progress_reports_per_shard():
+    telefonica, latcom = _sides(seed=3)
+    expected = match_phone_product_window(telefonica, latcom).reset_index(drop=True)
+    progress = Progress('test', unit='shards', every=3600)
+    found = match_sharded(telefonica, latcom, telefonica['PHONE_NORMALIZED'], latcom['PHONE_NORMALIZED'],
+                          match_phone_product_window, sort_by='TELEFONICA_INDEX', workers=1, progress=progress)
+    progress.finish()
+    pd.testing.assert_frame_equal(found.reset_index(drop=True), expected, check_dtype=False)
+    assert progress.total == SERIAL_SHARDS and progress.done == SERIAL_SHARDS
+    assert progress.rows == len(telefonica)
+    assert progress.counts['matches'] == len(expected)
@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+import pytest
+
+from reconciliation.pgextract import (_company_frame, _slice_done, date_slices, extract_transactions,
+                                      read_extracted, slice_path)
+
+TEST_DSN = os.environ.get('RECON_TEST_DATABASE_URL')
+
+
+def test_date_slices_cover_range_without_gaps():
+    slices = date_slices('2024-01-01', '2024-01-20', slice_days=7)
+    assert slices == [
+        (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-08')),
+        (pd.Timestamp('2024-01-08'), pd.Timestamp('2024-01-15')),
+        (pd.Timestamp('2024-01-15'), pd.Timestamp('2024-01-20')),
+    ]
+    assert date_slices('2024-01-01', '2024-01-15', slice_days=7)[-1][1] == pd.Timestamp('2024-01-15')
+    assert date_slices('2024-01-01', '2024-01-01') == []
+
+
+def test_company_frame_renames_and_types():
+    raw = pd.DataFrame({
+        'created_at': ['2024-01-02 10:00:00', 'garbage'],
+        'phone': ['5512345678', '5587654321'],
+        'amount': ['12.50', 'x'],
+        'status': ['SUCCESS', 'REVERSED'],
+        'transaction_id': ['T1', 'T2'],
+        'operator_transaction_id': ['123', None],
+        'customer_id': ['C1', 'C1'],
+        'reference': ['R1', 'R2'],
+    })
+    frame = _company_frame(raw)
+    assert list(frame.columns) == ['DATETIME', 'MSISDN', 'AMOUNT', 'STATUS', 'TRANSACTION_ID',
+                                   'VENDOR_TRANSACTION_ID', 'CUSTOMER_ID', 'REFERENCE']
+    assert frame['DATETIME'].iloc[0] == pd.Timestamp('2024-01-02 10:00:00')
+    assert pd.isna(frame['DATETIME'].iloc[1])
+    assert frame['AMOUNT'].iloc[0] == 12.5 and pd.isna(frame['AMOUNT'].iloc[1])
+    assert frame['STATUS'].tolist() == ['Success', 'REVERSED']
+
+
+def test_only_closed_slices_are_skipped(tmp_path):
+    start, end = pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-08')
+    assert not _slice_done(tmp_path, start, end, now='2024-01-10')
+    open(slice_path(tmp_path, start, end), 'w').close()
+    assert _slice_done(tmp_path, start, end, now='2024-01-10')
+    assert _slice_done(tmp_path, start, end, now='2024-01-08')
+    assert not _slice_done(tmp_path, start, end, now='2024-01-05')
+
+
+@pytest.mark.skipif(not TEST_DSN, reason='set RECON_TEST_DATABASE_URL to a scratch Postgres database')
+def test_copy_extract_against_local_database(tmp_path):
+    psycopg2 = pytest.importorskip('psycopg2')
+    from psycopg2.extensions import make_dsn
+
+    schema = f'recon_test_{os.getpid()}'
+    conn = psycopg2.connect(TEST_DSN)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f'CREATE SCHEMA {schema}')
+            cur.execute(f'''
+                CREATE TABLE {schema}.transactions (
+                    id SERIAL PRIMARY KEY,
+                    transaction_id VARCHAR(50) UNIQUE NOT NULL,
+                    customer_id VARCHAR(50),
+                    phone VARCHAR(20),
+                    amount DECIMAL(10,2),
+                    status VARCHAR(20),
+                    reference VARCHAR(100),
+                    operator_transaction_id VARCHAR(100),
+                    created_at TIMESTAMP DEFAULT NOW()
+                )''')
+            cur.executemany(
+                f'INSERT INTO {schema}.transactions (transaction_id, customer_id, phone, amount, status, '
+                f'reference, operator_transaction_id, created_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)',
+                [('T1', 'C1', '0551234567', '10.00', 'SUCCESS', 'R1', '0001', '2024-01-02 08:00'),
+                 ('T2', 'C1', '5587654321', '20.25', 'FAILED', 'R2', None, '2024-01-09 09:30'),
+                 ('T3', 'C1', '5511111111', '5.00', 'SUCCESS', 'R3', '3', '2024-02-01 00:00')])
+
+        dsn = make_dsn(TEST_DSN, options=f'-c search_path={schema}')
+        paths = extract_transactions(dsn, '2024-01-01', '2024-01-15', tmp_path, slice_days=7, workers=2)
+        assert paths == [slice_path(tmp_path, *bounds) for bounds in date_slices('2024-01-01', '2024-01-15')]
+
+        company = read_extracted(tmp_path)
+        assert company['TRANSACTION_ID'].tolist() == ['T1', 'T2']
+        assert company['MSISDN'].tolist() == ['0551234567', '5587654321']
+        assert company['VENDOR_TRANSACTION_ID'].iloc[0] == '0001'
+        assert company['STATUS'].tolist() == ['Success', 'Fail']
+        assert company['AMOUNT'].tolist() == [10.0, 20.25]
+    finally:
+        with conn.cursor() as cur:
+            cur.execute(f'DROP SCHEMA IF EXISTS {schema} CASCADE')
+        conn.close()
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from reconciliation.prefilter import ClaimKeyFilter, key_hashes
+
+
+def test_key_hash_does_not_depend_on_batch():
+    phones = ['5512345678', '5598765432']
+    alone = key_hashes(phones)
+    assert np.array_equal(key_hashes(phones + ['NUMERO NO DISPONIBLE'])[:2], alone)
+    assert np.array_equal(key_hashes(phones + ['teléfono'])[:2], alone)
+    assert np.array_equal(key_hashes(['x' * 40] + phones)[1:], alone)
+
+
+def test_integer_and_text_ids_hash_alike():
+    numeric = pd.array([1000000001, 1000000002], dtype='Int64')
+    mixed = pd.Series(['1000000001', 'LT178061', '1000000002'], dtype='string')
+    assert np.array_equal(key_hashes(numeric), key_hashes(mixed)[[0, 2]])
+
+
+def test_claim_keys_found_in_noisy_cdr_file():
+    claim_filter = ClaimKeyFilter(['5512345678', '5598765432'],
+                                  pd.array([1000000001, 1000000002], dtype='Int64'))
+    phones = pd.Series(['5512345678', 'NUMERO NO DISPONIBLE', 'teléfono', '5598765432'])
+    ids = pd.Series([None, None, None, None], dtype='string')
+    assert claim_filter.candidates(phones, ids).tolist() == [True, False, False, True]
+
+    ids = pd.Series(['1000000001', 'LT178061'], dtype='string')
+    assert claim_filter.candidates(pd.Series(['0000000000', '1111111111']), ids).tolist() == [True, False]
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from reconciliation.readers import read_tables, sniff_format
+
+
+def _write_csvs(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f'cdr_{i}.csv'
+        pd.DataFrame({'MSISDN': [f'55{i:08d}', f'56{i:08d}'], 'AMOUNT': [i, i + 0.5]}).to_csv(path, index=False)
+        paths.append(str(path))
+    return paths
+
+
+def test_read_tables_on_spawned_workers_keeps_order(tmp_path):
+    paths = _write_csvs(tmp_path, 5)
+    missing = str(tmp_path / 'missing.csv')
+    results = list(read_tables(paths[:2] + [missing] + paths[2:], workers=2, dtype={'MSISDN': str}))
+
+    assert [path for path, _, _ in results] == paths[:2] + [missing] + paths[2:]
+    assert results[2][1] is None and results[2][2]
+    serial = list(read_tables(paths, workers=1, dtype={'MSISDN': str}))
+    for (_, df, error), (_, expected, _) in zip([r for r in results if r[0] != missing], serial):
+        assert error is None
+        pd.testing.assert_frame_equal(df, expected)
+
+
+def test_sniff_format_detects_latin1(tmp_path):
+    path = tmp_path / 'latin.csv'
+    path.write_bytes('NOMBRE\nPeña\n'.encode('latin1'))
+    assert sniff_format(str(path)).encoding == 'latin1'
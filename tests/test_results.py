@@ -0,0 +1,34 @@
+import pandas as pd
+
+from reconciliation.results import MatchPositions, index_positions
+
+
+def frames():
+    claims = pd.DataFrame({'TELEFONICA_INDEX': [0, 1, 2], 'PHONE': ['a', 'b', 'c'], 'AMOUNT': [1, 2, 3]})
+    # LATCOM_INDEX has gaps where screening dropped rows
+    cdrs = pd.DataFrame({'LATCOM_INDEX': [0, 4, 7, 9], 'PHONE': ['b', 'x', 'c', 'y'],
+                         'STATUS': pd.array(['Success', 'Fail', None, 'Success'], dtype='string')})
+    matches = pd.DataFrame({'TELEFONICA_INDEX': [2, 1], 'LATCOM_INDEX': [7, 0], 'MATCH_STRATEGY': ['exact', 'window']})
+    return claims, cdrs, matches
+
+
+def test_matched_equals_merge():
+    claims, cdrs, matches = frames()
+    positions = MatchPositions(matches, claims['TELEFONICA_INDEX'], cdrs['LATCOM_INDEX'])
+    result = positions.matched(matches, claims, cdrs)
+    expected = (matches.merge(claims, on='TELEFONICA_INDEX')
+                .merge(cdrs, on='LATCOM_INDEX', suffixes=('_TELEFONICA', '_LATCOM')))
+    pd.testing.assert_frame_equal(result, expected[list(result.columns)])
+    assert str(result['STATUS'].dtype) == 'string'
+
+
+def test_unmatched_sides():
+    claims, cdrs, matches = frames()
+    positions = MatchPositions(matches, claims['TELEFONICA_INDEX'], cdrs['LATCOM_INDEX'])
+    assert positions.unmatched_left(claims)['TELEFONICA_INDEX'].tolist() == [0]
+    assert positions.unmatched_right(cdrs)['LATCOM_INDEX'].tolist() == [4, 9]
+    assert positions.matched_right(cdrs, ['PHONE'])['PHONE'].tolist() == ['b', 'c']
+
+
+def test_index_positions_unsorted_index():
+    assert index_positions([5, 3, 9], [9, 5]).tolist() == [2, 0]
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reconciliation.rules import RuleTable
+
+# Same order as reconcile-enhanced.py: an unmatched claim is NOT_FOUND
+# whatever its STATUS says
+DISPUTE_RULES = (
+    ('NOT_FOUND', {'MATCH_STRATEGY': None}),
+    ('SUCCESSFUL', {'STATUS': 'Success'}),
+    ('FAILED', {'STATUS': 'Fail'}),
+)
+
+
+def claims():
+    return pd.DataFrame({
+        'MATCH_STRATEGY': ['exact', None, 'window', None, 'exact'],
+        'STATUS': ['Success', 'Success', 'Fail', None, 'Pending'],
+        'AMOUNT': [10, 20, 30, 40, 50],
+    })
+
+
+def test_first_matching_rule_wins():
+    rules = RuleTable(DISPUTE_RULES, default='MATCHED_OTHER')
+    category = rules.assign(claims())
+    assert list(category) == ['SUCCESSFUL', 'NOT_FOUND', 'FAILED', 'NOT_FOUND', 'MATCHED_OTHER']
+    assert list(category.categories) == ['NOT_FOUND', 'SUCCESSFUL', 'FAILED', 'MATCHED_OTHER']
+
+
+def test_matches_row_by_row_filters():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'MATCH_STRATEGY': rng.choice(np.array(['exact', None], dtype=object), 1000),
+        'STATUS': rng.choice(np.array(['Success', 'Fail', 'Pending', None], dtype=object), 1000),
+    })
+    rules = RuleTable(DISPUTE_RULES, default='MATCHED_OTHER')
+
+    def reference(row):
+        if pd.isna(row.MATCH_STRATEGY):
+            return 'NOT_FOUND'
+        if row.STATUS == 'Success':
+            return 'SUCCESSFUL'
+        if row.STATUS == 'Fail':
+            return 'FAILED'
+        return 'MATCHED_OTHER'
+
+    assert list(rules.assign(df)) == [reference(row) for row in df.itertuples()]
+
+
+def test_conditions_and_together():
+    rules = RuleTable((
+        ('BIG_OK', {'STATUS': ['Success', 'Pending'], 'AMOUNT': lambda amount: amount >= 30}),
+        ('OK', {'STATUS': {'Success'}}),
+    ))
+    assert list(rules.assign(claims())) == ['OK', 'OK', 'OTHER', 'OTHER', 'BIG_OK']
+
+
+def test_split_and_counts_include_empty_categories():
+    df = claims()
+    rules = RuleTable(DISPUTE_RULES, default='MATCHED_OTHER')
+    category = rules.assign(df.iloc[:2])
+    parts = rules.split(df.iloc[:2], category, columns=['AMOUNT'])
+    assert list(parts) == rules.names
+    assert parts['SUCCESSFUL']['AMOUNT'].tolist() == [10]
+    assert parts['NOT_FOUND']['AMOUNT'].tolist() == [20]
+    assert parts['FAILED'].empty and list(parts['FAILED'].columns) == ['AMOUNT']
+    assert rules.counts(rules.assign(df)) == {'NOT_FOUND': 2, 'SUCCESSFUL': 1, 'FAILED': 1, 'MATCHED_OTHER': 1}
+
+
+def test_duplicate_names_rejected():
+    with pytest.raises(ValueError):
+        RuleTable((('OK', {'STATUS': 'Success'}),), default='OK')
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from reconciliation.state import MatchState
+
+
+def test_pending_shrinks_as_strategies_mark():
+    state = MatchState([0, 1, 2, 3], [10, 12, 15])
+    assert state.mark([1, 3], [15, 10]) == 2
+    assert state.pending_left().tolist() == [0, 2]
+    assert state.pending_right().tolist() == [1]
+    assert (state.left_count, state.right_count) == (2, 2)
+
+
+def test_reused_row_marks_nothing():
+    state = MatchState([0, 1, 2, 3], [10, 12, 15])
+    state.mark([0], [10])
+    with pytest.raises(ValueError):
+        state.mark([1, 2], [12, 10])
+    with pytest.raises(ValueError):
+        state.mark([1, 1], [12, 15])
+    assert state.pending_left().tolist() == [1, 2, 3]
+    assert state.pending_right().tolist() == [1, 2]
+
+
+def test_left_only_state():
+    state = MatchState(np.arange(5))
+    state.mark([4, 0], [7, 7])
+    assert state.pending_left().tolist() == [1, 2, 3]
+    assert state.right_count == 0
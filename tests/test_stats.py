@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from reconciliation.stats import ColumnProfile
+
+
+def test_refeeding_same_values_keeps_distinct():
+    phones = pd.Series(np.arange(5_500_000_000, 5_500_200_000).astype(str))
+    profile = ColumnProfile('PHONE_NORMALIZED')
+    profile.update(phones)
+    first = profile.distinct
+    # Same values again, in a chunk that also holds one long value
+    profile.update(pd.concat([phones, pd.Series(['NUMERO NO DISPONIBLE ' * 3])], ignore_index=True))
+    assert abs(profile.distinct - first) <= first * 0.01
+    assert abs(first - len(phones)) <= len(phones) * 0.03
+
+
+def test_profile_round_trips():
+    profile = ColumnProfile('STATUS', top=True)
+    profile.update(pd.Series(['OK', 'OK', 'FAIL', None, '']))
+    restored = ColumnProfile.from_dict('STATUS', profile.to_dict())
+    assert (restored.rows, restored.nulls, restored.empty) == (5, 1, 1)
+    assert restored.top_values() == {'OK': 2, 'FAIL': 1}
+    assert restored.distinct == profile.distinct == 2